@@ -79,6 +79,9 @@ class Settings:
     # 接入方通常用于声明 ``_system``、``_loop`` 这类 Mako 渲染期才注入的特殊对象名。
     MAKO_TEMPLATE_NAME_EXTRA_WHITELIST = frozenset()
 
+    # 进程内缓存的模板片段编译结果及安全检查结论的最大条目数，为 0 时不缓存
+    MAKO_TEMPLATE_CACHE_SIZE = 4096
+
     RERUN_INDEX_OFFSET = 0
 
     # 当字符串是纯mako字符串时，是否自动渲染成对象，默认还是会渲染成字符串
@@ -90,4 +93,11 @@ class Settings:
 
     PIPELINE_ENABLE_ROLLBACK = False
 
+    # 推进循环中进程心跳的最小写入间隔（秒），为 0 时每个节点都会写入心跳
+    # 执行插件等耗时操作前总会补充一次心跳，不影响僵死进程的检测
+    PIPELINE_PROCESS_BEAT_INTERVAL = 0
+
+    # 推进循环中节点执行前后产生的写入是否分别放在同一个事务中提交
+    PIPELINE_ENABLE_NODE_TRANSACTION = False
+
     LOOP_OUTPUTS_INNER_KEY = "outputs"
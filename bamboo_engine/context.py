@@ -28,6 +28,7 @@ from bamboo_engine.eri import (
 )
 
 from .eri import Node
+from .exceptions import ReferenceCycleError
 from .template.template import Template
 from .utils.string import deformat_var_key
 
@@ -52,15 +53,20 @@ class SpliceVariable(Variable):
     模板类型变量，会尝试在流程上下文中解析变量中定义的模板
     """
 
-    def __init__(self, key: str, value: Any, pool: WeakValueDictionary):
+    def __init__(self, key: str, value: Any, pool: WeakValueDictionary, resolved: Dict[str, Any] = None):
         self.key = key
         self.value = value
         self.pool = pool
+        # 上下文解析过程中已经求值的变量，命中时不再重复求值
+        self.resolved = resolved if resolved is not None else {}
         self.refs = [k for k in Template(value).get_reference()]
 
     def get(self):
         context = {}
         for r in self.refs:
+            if r in self.resolved:
+                context[deformat_var_key(r)] = self.resolved[r]
+                continue
             if r not in self.pool:
                 continue
 
@@ -98,21 +104,29 @@ class Context:
         self.pool = WeakValueDictionary()
         self.variables = {}
         self.additional_data = additional_data
+        # 变量所引用的其他变量，以及 hydrate 过程中各变量的求值结果
+        self.references = {}
+        self._resolved = {}
+        self._hydrate_order = None
 
         # 将上下文数据转换成变量，变量内封装了自身解析的逻辑，且实现了 Variable 接口
         for v in self.values:
             if v.type is ContextValueType.PLAIN:
                 self.variables[v.key] = PlainVariable(key=v.key, value=v.value)
             elif v.type is ContextValueType.SPLICE:
-                self.variables[v.key] = SpliceVariable(key=v.key, value=v.value, pool=self.pool)
+                var = SpliceVariable(key=v.key, value=v.value, pool=self.pool, resolved=self._resolved)
+                self.variables[v.key] = var
+                self.references[v.key] = var.refs
             elif v.type is ContextValueType.COMPUTE:
+                value = SpliceVariable(key=v.key, value=v.value, pool=self.pool, resolved=self._resolved)
                 self.variables[v.key] = self.runtime.get_compute_variable(
                     code=v.code,
                     key=v.key,
-                    value=SpliceVariable(key=v.key, value=v.value, pool=self.pool),
+                    value=value,
                     additional_data=self.additional_data,
                     inner_loop=inner_loop,
                 )
+                self.references[v.key] = value.refs
 
         for k, var in self.variables.items():
             self.pool[k] = var
@@ -121,24 +135,83 @@ class Context:
         """
         将当前上下文中的数据清洗成 Dict[str, Any] 类型的朴素数据，过程中会进行变量引用的分析和替换
 
+        变量按照引用关系的拓扑顺序求值，每个变量在一次 hydrate 中只会求值一次，引用它的变量直接复用求值结果
+
         :param deformat: 是否将返回字典中的 key 值从 ${%s} 替换为 %s
         :type deformat: bool, optional
         :return: 上下文数据朴素值字典
         :rtype: Dict[str, Any]
         """
         key_formatter = deformat_var_key if deformat else _raw_key
-        hydrated = {}
+        if self._hydrate_order is None:
+            self._hydrate_order = self._sort_references()
+        order, cyclic_keys = self._hydrate_order
 
-        for key, var in self.pool.items():
-            try:
-                hydrated[key_formatter(key)] = var.get()
-            except Exception as e:
-                if not mute_error:
-                    raise e
-                logger.exception("%s get error." % key)
-                hydrated[key_formatter(key)] = str(e)
+        errors = {}
+        try:
+            for key in order:
+                try:
+                    if key in cyclic_keys:
+                        raise ReferenceCycleError(
+                            cyclic_keys, "variable %s references form a cycle: %s" % (key, sorted(cyclic_keys))
+                        )
+                    # 依赖的变量求值失败时，沿用其异常，与递归求值时异常向上传递的行为保持一致
+                    for r in self.references.get(key, ()):
+                        if r in errors:
+                            raise errors[r]
+                    self._resolved[key] = self.pool[key].get()
+                except Exception as e:
+                    if not mute_error:
+                        raise e
+                    logger.exception("%s get error." % key)
+                    errors[key] = e
+
+            return {
+                key_formatter(key): str(errors[key]) if key in errors else self._resolved[key]
+                for key in self.pool.keys()
+            }
+        finally:
+            self._resolved.clear()
+
+    def _sort_references(self):
+        """
+        对上下文中的变量按照引用关系进行拓扑排序
 
-        return hydrated
+        :return: (被引用的变量排在前面的变量 key 列表, 处于循环引用中的变量 key 集合)
+        :rtype: Tuple[List[str], Set[str]]
+        """
+        order = []
+        cyclic_keys = set()
+        visited = set()
+
+        for root in self.pool.keys():
+            if root in visited:
+                continue
+            visited.add(root)
+            path = [root]
+            on_path = {root}
+            stack = [iter(self.references.get(root, ()))]
+            while stack:
+                for ref in stack[-1]:
+                    if ref not in self.pool:
+                        continue
+                    if ref in on_path:
+                        cyclic_keys.update(path[path.index(ref) :])
+                        continue
+                    if ref in visited:
+                        continue
+                    visited.add(ref)
+                    path.append(ref)
+                    on_path.add(ref)
+                    stack.append(iter(self.references.get(ref, ())))
+                    break
+                else:
+                    stack.pop()
+                    key = path.pop()
+                    on_path.discard(key)
+                    order.append(key)
+
+        return order, cyclic_keys
 
     def extract_outputs(
         self, pipeline_id: str, data_outputs: Dict[str, str], execution_data_outputs: Dict[str, Any], node: Node = None
@@ -155,18 +228,7 @@ class Context:
         :param node: 节点对象，用于判断是否启用循环
         :type node: Node
         """
-        update = {}
-        if not getattr(node, "loop_enabled", False):
-            # 非循环节点：保持原有逻辑
-            for origin_key, target_key in data_outputs.items():
-                if origin_key not in execution_data_outputs:
-                    continue
-                update[target_key] = ContextValue(
-                    key=target_key,
-                    type=ContextValueType.PLAIN,
-                    value=execution_data_outputs[origin_key],
-                )
-        else:
+        if getattr(node, "loop_enabled", False):
             # 循环节点：使用列表结构存储所有循环节点输出
             loop_outputs_key = node.loop_outputs_key
 
@@ -175,37 +237,18 @@ class Context:
             current_outputs["result"] = execution_data_outputs["_result"]
             current_outputs["inner_loop"] = execution_data_outputs["_inner_loop"]
 
-            # 获取现有的循环输出列表，追加本次结果
-            existing_loop_outputs = self._get_existing_context_value(pipeline_id, loop_outputs_key)
-            if existing_loop_outputs is None or not isinstance(existing_loop_outputs.value, list):
-                loop_outputs_list = []
-            else:
-                loop_outputs_list = existing_loop_outputs.value.copy()
+            # 循环输出列表只追加本次结果，不需要读取及重写之前的结果
+            self.runtime.append_context_value(pipeline_id=pipeline_id, key=loop_outputs_key, value=current_outputs)
+            return
 
-            loop_outputs_list.append(current_outputs)
-
-            # 更新循环输出列表
-            update[loop_outputs_key] = ContextValue(
-                key=loop_outputs_key,
+        update = {}
+        for origin_key, target_key in data_outputs.items():
+            if origin_key not in execution_data_outputs:
+                continue
+            update[target_key] = ContextValue(
+                key=target_key,
                 type=ContextValueType.PLAIN,
-                value=loop_outputs_list,
+                value=execution_data_outputs[origin_key],
             )
 
         self.runtime.upsert_plain_context_values(pipeline_id=pipeline_id, update=update)
-
-    def _get_existing_context_value(self, pipeline_id: str, key: str) -> ContextValue:
-        """
-        获取现有的上下文值
-
-        :param pipeline_id: 流程 ID
-        :type pipeline_id: str
-        :param key: 键名
-        :type key: str
-        :return: 上下文值，如果不存在则返回 None
-        :rtype: ContextValue
-        """
-        try:
-            context_values = self.runtime.get_context_values(pipeline_id, {key})
-            return context_values[0] if context_values else None
-        except Exception:
-            return None
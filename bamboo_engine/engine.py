@@ -13,9 +13,11 @@ specific language governing permissions and limitations under the License.
 
 # 引擎核心模块
 
+import copy
 import logging
 import random
 import time
+from contextlib import ExitStack, contextmanager
 from functools import wraps
 from typing import Any, Dict, Optional
 
@@ -46,7 +48,11 @@ from .local import CurrentNodeInfo, clear_node_info, set_node_info
 from .metrics import (
     ENGINE_EXECUTE_POST_PROCESS_DURATION,
     ENGINE_EXECUTE_PRE_PROCESS_DURATION,
+    ENGINE_NODE_EXECUTE_BROKER_PUBLISHES,
+    ENGINE_NODE_EXECUTE_DB_QUERIES,
     ENGINE_NODE_EXECUTE_TIME,
+    ENGINE_NODE_SCHEDULE_BROKER_PUBLISHES,
+    ENGINE_NODE_SCHEDULE_DB_QUERIES,
     ENGINE_NODE_SCHEDULE_TIME,
     ENGINE_PROCESS_RUNNING_TIME,
     ENGINE_RUNNING_PROCESSES,
@@ -54,6 +60,7 @@ from .metrics import (
     ENGINE_SCHEDULE_POST_PROCESS_DURATION,
     ENGINE_SCHEDULE_PRE_PROCESS_DURATION,
     ENGINE_SCHEDULE_RUNNING_TIME,
+    observe_round_trips,
     setup_gauge,
     setup_histogram,
 )
@@ -77,12 +84,68 @@ def interrupt_exception_catcher(func):
     return _wrapper
 
 
+class NodeTransaction:
+    """
+    引擎推进一个节点时使用的事务，节点执行可能产生无法回滚的外部副作用，所以节点执行期间会先提交事务，
+    执行结果记录到检查点后再开启新的事务
+    """
+
+    def __init__(self, runtime: EngineRuntimeInterface, interrupter: ExecuteInterrupter, enabled: bool):
+        self.runtime = runtime
+        self.interrupter = interrupter
+        self.enabled = enabled
+        self._stack = None
+        self._check_point = None
+
+    def __enter__(self) -> "NodeTransaction":
+        self._begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self._end(exc_type, exc_value, traceback)
+        return False
+
+    def _begin(self):
+        if not self.enabled:
+            return
+
+        # 事务回滚后事务内的所有写入都不会生效，此时中断恢复需要从事务开始时的检查点重新开始
+        self._check_point = copy.deepcopy(self.interrupter.check_point)
+        self._stack = ExitStack()
+        self._stack.enter_context(self.runtime.node_transaction())
+
+    def _end(self, exc_type, exc_value, traceback):
+        if self._stack is None:
+            return
+
+        stack, self._stack = self._stack, None
+        try:
+            stack.__exit__(exc_type, exc_value, traceback)
+        except Exception:
+            self.interrupter.check_point = self._check_point
+            raise
+
+        if exc_type is not None:
+            self.interrupter.check_point = self._check_point
+
+    @contextmanager
+    def suspend(self):
+        """
+        提交当前事务，上下文中的写入不在事务中进行，上下文正常退出后开启新的事务
+        """
+        self._end(None, None, None)
+        yield
+        self._begin()
+
+
 class Engine:
     """
     流程引擎，封装流程核心调度逻辑
     """
 
     PURE_SKIP_ENABLE_NODE_TYPE = {NodeType.ServiceActivity, NodeType.EmptyStartEvent}
+    # 执行前需要保证进程心跳是最新的节点类型（执行过程中可能会运行耗时较长的用户代码）
+    BEAT_BEFORE_EXECUTE_NODE_TYPE = {NodeType.ServiceActivity, NodeType.ExecutableEndEvent}
 
     def __init__(self, runtime: EngineRuntimeInterface):
         self.runtime = runtime
@@ -153,6 +216,7 @@ class Engine:
         self.runtime.pre_pause_pipeline(pipeline_id)
 
         self.runtime.set_state(node_id=pipeline_id, to_state=states.SUSPENDED)
+        self.runtime.bump_control_epoch(pipeline_id)
 
         self.runtime.post_pause_pipeline(pipeline_id)
 
@@ -169,6 +233,7 @@ class Engine:
         self.runtime.pre_revoke_pipeline(pipeline_id)
 
         self.runtime.set_state(node_id=pipeline_id, to_state=states.REVOKED)
+        self.runtime.bump_control_epoch(pipeline_id)
 
         self.runtime.post_revoke_pipeline(pipeline_id)
 
@@ -189,6 +254,7 @@ class Engine:
         self.runtime.pre_resume_pipeline(pipeline_id)
 
         self.runtime.set_state(node_id=pipeline_id, to_state=states.RUNNING)
+        self.runtime.bump_control_epoch(pipeline_id)
 
         if info_list:
             self.runtime.batch_resume(process_id_list=[i.process_id for i in info_list])
@@ -829,313 +895,344 @@ class Engine:
         current_node_id = node_id
         with interrupter():
             process_info = self.runtime.get_process_info(process_id)
-            self.runtime.wake_up(process_id)
+            need_wake_up = True
+            beat_interval = float(self.runtime.get_config(RuntimeSettings.PIPELINE_PROCESS_BEAT_INTERVAL.value) or 0)
+            last_beat_at = None
+            control_epoch = None
+            checked_stack = None
+            node_transaction_enabled = bool(
+                self.runtime.get_config(RuntimeSettings.PIPELINE_ENABLE_NODE_TRANSACTION.value)
+            )
 
             # 推进循环
             while True:
-                interrupter.check(ExecuteKeyPoint.START_PUSH_NODE)
-                ignore_boring_set = interrupter.recover_point is not None
-                # 进程心跳
-                try:
-                    self.runtime.beat(process_id)
-                except Exception:
-                    # do not fail the flow when beat failed
-                    logger.exception("process(%s) beat error" % process_id)
-
-                # 遇到推进终点后需要尝试唤醒父进程
-                if current_node_id == process_info.destination_id:
-                    wake_up_seccess = self.runtime.child_process_finish(process_info.parent_id, process_id)
-
-                    if wake_up_seccess:
+                # 统计每个节点推进过程中产生的数据库查询及消息队列投递次数
+                with observe_round_trips(
+                    ENGINE_NODE_EXECUTE_DB_QUERIES, ENGINE_NODE_EXECUTE_BROKER_PUBLISHES
+                ) as round_trips, self._node_transaction(interrupter, node_transaction_enabled) as node_transaction:
+                    interrupter.check(ExecuteKeyPoint.START_PUSH_NODE)
+                    ignore_boring_set = interrupter.recover_point is not None
+
+                    # 遇到推进终点后需要尝试唤醒父进程
+                    if current_node_id == process_info.destination_id:
+                        wake_up_seccess = self.runtime.child_process_finish(process_info.parent_id, process_id)
+
+                        if wake_up_seccess:
+                            logger.info(
+                                "[pipeline-trace](root_pipeline: %s) child(%s) wake up parent(%s) success",
+                                root_pipeline_id,
+                                process_id,
+                                process_info.parent_id,
+                            )
+                            self.runtime.execute(
+                                process_id=process_info.parent_id,
+                                node_id=process_info.destination_id,
+                                root_pipeline_id=process_info.root_pipeline_id,
+                                parent_pipeline_id=process_info.top_pipeline_id,
+                                headers=headers,
+                            )
+
                         logger.info(
-                            "[pipeline-trace](root_pipeline: %s) child(%s) wake up parent(%s) success",
+                            "[pipeline-trace](root_pipeline: %s) child(%s) wake up parent(%s) fail",
                             root_pipeline_id,
                             process_id,
                             process_info.parent_id,
                         )
-                        self.runtime.execute(
-                            process_id=process_info.parent_id,
-                            node_id=process_info.destination_id,
-                            root_pipeline_id=process_info.root_pipeline_id,
-                            parent_pipeline_id=process_info.top_pipeline_id,
-                            headers=headers,
-                        )
-
-                    logger.info(
-                        "[pipeline-trace](root_pipeline: %s) child(%s) wake up parent(%s) fail",
-                        root_pipeline_id,
-                        process_id,
-                        process_info.parent_id,
-                    )
-                    return
-
-                logger.info("[pipeline-trace](root_pipeline: %s) execute node %s", root_pipeline_id, current_node_id)
-                self.runtime.set_current_node(process_id, current_node_id)
-
-                node_state_map = self.runtime.batch_get_state_name(process_info.pipeline_stack)
-
-                # 检测根流程是否被撤销
-                if node_state_map[process_info.root_pipeline_id] == states.REVOKED:
-                    self.runtime.die(process_id)
+                        return
 
                     logger.info(
-                        "[pipeline-trace](root_pipeline: %s) revoked checked at node %s",
-                        process_info.root_pipeline_id,
-                        current_node_id,
+                        "[pipeline-trace](root_pipeline: %s) execute node %s", root_pipeline_id, current_node_id
                     )
-                    return
-
-                # 检测流程栈中是否有被暂停的流程
-                for pid in process_info.pipeline_stack:
-                    if node_state_map[pid] == states.SUSPENDED:
-                        logger.info(
-                            "[pipeline-trace](root_pipeline: %s) process %s suspended by subprocess %s",
-                            process_info.root_pipeline_id,
-                            process_id,
-                            pid,
-                        )
-
-                        self.runtime.suspend(process_id, pid)
-                        return
-
-                node = self.runtime.get_node(current_node_id)
-                node_state = self.runtime.get_state_or_none(current_node_id)
+                    # 进程心跳，当前节点及唤醒标记合并为一次更新，距上次心跳不足 beat_interval 时跳过心跳
+                    # 该更新失败时与单独设置当前节点失败一样会使节点执行失败，不在可能已经中止的事务中重试
+                    enter_at = time.monotonic()
+                    need_beat = last_beat_at is None or enter_at - last_beat_at >= beat_interval
+                    self.runtime.enter_node(process_id, current_node_id, wake_up=need_wake_up, beat=need_beat)
+                    need_wake_up = False
+                    if need_beat:
+                        last_beat_at = enter_at
+
+                    # 控制版本号未变化时流程栈中的流程没有被暂停或撤销，无需再检查流程栈状态
+                    epoch = self.runtime.get_control_epoch(process_info.root_pipeline_id)
+                    if epoch is None or epoch != control_epoch or process_info.pipeline_stack != checked_stack:
+                        node_state_map = self.runtime.batch_get_state_name(process_info.pipeline_stack)
+
+                        # 检测根流程是否被撤销
+                        if node_state_map[process_info.root_pipeline_id] == states.REVOKED:
+                            self.runtime.die(process_id)
 
-                loop = 1
-                inner_loop = 1
-                reset_mark_bit = False
+                            logger.info(
+                                "[pipeline-trace](root_pipeline: %s) revoked checked at node %s",
+                                process_info.root_pipeline_id,
+                                current_node_id,
+                            )
+                            return
 
-                if node_state:
-                    if interrupter.recover_point and not interrupter.recover_point.state_already_exist:
+                        # 检测流程栈中是否有被暂停的流程
+                        for pid in process_info.pipeline_stack:
+                            if node_state_map[pid] == states.SUSPENDED:
+                                logger.info(
+                                    "[pipeline-trace](root_pipeline: %s) process %s suspended by subprocess %s",
+                                    process_info.root_pipeline_id,
+                                    process_id,
+                                    pid,
+                                )
+
+                                self.runtime.suspend(process_id, pid)
+                                return
+
+                        control_epoch = epoch
+                        checked_stack = list(process_info.pipeline_stack)
+
+                    node_bundle = self.runtime.get_node_bundle(current_node_id, prefetch_next=True)
+                    node = node_bundle.node
+                    node_state = node_bundle.state
+
+                    loop = 1
+                    inner_loop = 1
+                    reset_mark_bit = False
+
+                    if node_state:
+                        if interrupter.recover_point and not interrupter.recover_point.state_already_exist:
+                            interrupter.check_and_set(
+                                ExecuteKeyPoint.SET_NODE_RUNNING_PRE_CHECK_DONE, state_already_exist=False
+                            )
+                            # 如果 running_node_version 不为空，则说明节点是在设置 RUNNING 成功后失败
+                            # 此时不能够设置 running_node_version，防止当前实际 version 和 running_node_version 不一致
+                            if not interrupter.recover_point.running_node_version:
+                                interrupter.recover_point.running_node_version = node_state.version
+                        else:
+                            interrupter.check_and_set(
+                                ExecuteKeyPoint.SET_NODE_RUNNING_PRE_CHECK_DONE, state_already_exist=True
+                            )
+                            rerun_limit = self.runtime.node_rerun_limit(process_info.root_pipeline_id, current_node_id)
+                            # 重入次数超过限制
+                            if (
+                                node_state.name == states.FINISHED
+                                and node.type != NodeType.SubProcess
+                                and node_state.loop > rerun_limit
+                            ):
+                                exec_outputs = self.runtime.get_execution_data_outputs(current_node_id)
+
+                                exec_outputs["ex_data"] = "node execution exceed rerun limit {}".format(rerun_limit)
+
+                                self.runtime.set_execution_data_outputs(current_node_id, exec_outputs)
+
+                                self.runtime.sleep(process_id)
+
+                                self.runtime.set_state(
+                                    node_id=current_node_id,
+                                    version=node_state.version,
+                                    to_state=states.FAILED,
+                                    set_archive_time=True,
+                                    ignore_boring_set=ignore_boring_set,
+                                )
+
+                                return
+
+                            # 检测节点是否被预约暂停
+                            if node_state.name == states.SUSPENDED:
+                                # 预约暂停的节点在预约时获取不到 root_id 和 parent_id，故在此进行设置
+                                self.runtime.set_state_root_and_parent(
+                                    node_id=current_node_id,
+                                    root_id=process_info.root_pipeline_id,
+                                    parent_id=process_info.top_pipeline_id,
+                                )
+
+                                self.runtime.suspend(process_id, current_node_id)
+
+                                logger.info(
+                                    "[pipeline-trace](root_pipeline: %s) process %s suspended by node %s",
+                                    process_info.root_pipeline_id,
+                                    process_id,
+                                    current_node_id,
+                                )
+                                return
+
+                            # 设置状态前检测
+                            if node_state.name not in states.INVERTED_TRANSITION[states.RUNNING]:
+                                logger.info(
+                                    "[pipeline-trace](root_pipeline: %s) can not transit state from %s to RUNNING "
+                                    "for exist state",
+                                    process_info.root_pipeline_id,
+                                    node_state.name,
+                                )
+                                self.runtime.sleep(process_id)
+                                return
+
+                            if node_state.name == states.FINISHED:
+                                loop = node_state.loop + 1
+                                inner_loop = node_state.inner_loop + 1
+                                reset_mark_bit = True
+                                # 重入前记录历史
+                                self._add_history(node_id=current_node_id, state=node_state)
+                            elif node.loop_enabled and node_state.name == states.READY:
+                                loop = 1
+                                inner_loop = 1
+                            else:
+                                loop = node_state.loop
+                                inner_loop = node_state.inner_loop
+                    else:
                         interrupter.check_and_set(
                             ExecuteKeyPoint.SET_NODE_RUNNING_PRE_CHECK_DONE, state_already_exist=False
                         )
-                        # 如果 running_node_version 不为空，则说明节点是在设置 RUNNING 成功后失败
-                        # 此时不能够设置 running_node_version，防止当前实际 version 和 running_node_version 不一致
-                        if not interrupter.recover_point.running_node_version:
-                            interrupter.recover_point.running_node_version = node_state.version
+
+                    if interrupter.recover_point and interrupter.recover_point.running_node_version:
+                        version = interrupter.recover_point.running_node_version
                     else:
-                        interrupter.check_and_set(
-                            ExecuteKeyPoint.SET_NODE_RUNNING_PRE_CHECK_DONE, state_already_exist=True
+                        version = self.runtime.set_state(
+                            node_id=current_node_id,
+                            to_state=states.RUNNING,
+                            version=interrupter.recover_point.running_node_version
+                            if interrupter.recover_point
+                            else None,
+                            loop=loop,
+                            inner_loop=inner_loop,
+                            root_id=process_info.root_pipeline_id,
+                            parent_id=process_info.top_pipeline_id,
+                            set_started_time=True,
+                            reset_skip=reset_mark_bit,
+                            reset_retry=reset_mark_bit if not node.loop_enabled else False,
+                            reset_error_ignored=reset_mark_bit,
+                            refresh_version=reset_mark_bit,
+                            ignore_boring_set=ignore_boring_set,
                         )
-                        rerun_limit = self.runtime.node_rerun_limit(process_info.root_pipeline_id, current_node_id)
-                        # 重入次数超过限制
-                        if (
-                            node_state.name == states.FINISHED
-                            and node.type != NodeType.SubProcess
-                            and node_state.loop > rerun_limit
-                        ):
-                            exec_outputs = self.runtime.get_execution_data_outputs(current_node_id)
+                    interrupter.check_and_set(ExecuteKeyPoint.SET_NODE_RUNNING_DONE, running_node_version=version)
 
-                            exec_outputs["ex_data"] = "node execution exceed rerun limit {}".format(rerun_limit)
-
-                            self.runtime.set_execution_data_outputs(current_node_id, exec_outputs)
-
-                            self.runtime.sleep(process_id)
-
-                            self.runtime.set_state(
-                                node_id=current_node_id,
-                                version=node_state.version,
-                                to_state=states.FAILED,
-                                set_archive_time=True,
-                                ignore_boring_set=ignore_boring_set,
-                            )
+                    set_node_info(CurrentNodeInfo(node_id=current_node_id, version=version, loop=loop))
 
-                            return
-
-                        # 检测节点是否被预约暂停
-                        if node_state.name == states.SUSPENDED:
-                            # 预约暂停的节点在预约时获取不到 root_id 和 parent_id，故在此进行设置
-                            self.runtime.set_state_root_and_parent(
-                                node_id=current_node_id,
-                                root_id=process_info.root_pipeline_id,
-                                parent_id=process_info.top_pipeline_id,
-                            )
-
-                            self.runtime.suspend(process_id, current_node_id)
-
-                            logger.info(
-                                "[pipeline-trace](root_pipeline: %s) process %s suspended by node %s",
-                                process_info.root_pipeline_id,
-                                process_id,
-                                current_node_id,
-                            )
-                            return
+                    logger.info(
+                        "root pipeline[%s] before execute %s(%s) state: %s",
+                        process_info.root_pipeline_id,
+                        node.__class__.__name__,
+                        current_node_id,
+                        node_state,
+                    )
+                    type_label = self._get_metrics_node_type(node)
+                    round_trips.labels(type=type_label, hostname=self._hostname)
+                    execute_start = time.time()
 
-                        # 设置状态前检测
-                        if node_state.name not in states.INVERTED_TRANSITION[states.RUNNING]:
+                    # 节点执行不在事务中进行，避免回滚后重复执行已经产生外部副作用的插件，同时避免长时间持有行锁
+                    with node_transaction.suspend():
+                        if interrupter.recover_point and interrupter.recover_point.execute_result:
                             logger.info(
-                                "[pipeline-trace](root_pipeline: %s) can not transit state from %s to RUNNING "
-                                "for exist state",
-                                process_info.root_pipeline_id,
-                                node_state.name,
+                                "root pipeline[%s] skip real execute node %s, using recover result",
+                                root_pipeline_id,
+                                node,
                             )
-                            self.runtime.sleep(process_id)
-                            return
-
-                        if node_state.name == states.FINISHED:
-                            loop = node_state.loop + 1
-                            inner_loop = node_state.inner_loop + 1
-                            reset_mark_bit = True
-                            # 重入前记录历史
-                            self._add_history(node_id=current_node_id, state=node_state)
-                        elif node.loop_enabled and node_state.name == states.READY:
-                            loop = 1
-                            inner_loop = 1
+                            execute_result = interrupter.recover_point.execute_result
                         else:
-                            loop = node_state.loop
-                            inner_loop = node_state.inner_loop
-                else:
-                    interrupter.check_and_set(
-                        ExecuteKeyPoint.SET_NODE_RUNNING_PRE_CHECK_DONE, state_already_exist=False
-                    )
-
-                if interrupter.recover_point and interrupter.recover_point.running_node_version:
-                    version = interrupter.recover_point.running_node_version
-                else:
-                    version = self.runtime.set_state(
-                        node_id=current_node_id,
-                        to_state=states.RUNNING,
-                        version=interrupter.recover_point.running_node_version if interrupter.recover_point else None,
-                        loop=loop,
-                        inner_loop=inner_loop,
-                        root_id=process_info.root_pipeline_id,
-                        parent_id=process_info.top_pipeline_id,
-                        set_started_time=True,
-                        reset_skip=reset_mark_bit,
-                        reset_retry=reset_mark_bit if not node.loop_enabled else False,
-                        reset_error_ignored=reset_mark_bit,
-                        refresh_version=reset_mark_bit,
-                        ignore_boring_set=ignore_boring_set,
-                    )
-                interrupter.check_and_set(ExecuteKeyPoint.SET_NODE_RUNNING_DONE, running_node_version=version)
-
-                set_node_info(CurrentNodeInfo(node_id=current_node_id, version=version, loop=loop))
+                            if not need_beat and node.type in self.BEAT_BEFORE_EXECUTE_NODE_TYPE:
+                                self._beat(process_id)
+                                last_beat_at = time.monotonic()
+                            handler = HandlerFactory.get_handler(node, self.runtime, interrupter)
+                            ENGINE_EXECUTE_PRE_PROCESS_DURATION.labels(
+                                type=node.type.value, hostname=self._hostname
+                            ).observe(time.time() - engine_pre_execute_start_at)
+                            execute_result = handler.execute(
+                                process_info=process_info,
+                                loop=loop,
+                                inner_loop=inner_loop,
+                                version=version,
+                                recover_point=interrupter.recover_point,
+                            )
 
-                logger.info(
-                    "root pipeline[%s] before execute %s(%s) state: %s",
-                    process_info.root_pipeline_id,
-                    node.__class__.__name__,
-                    current_node_id,
-                    node_state,
-                )
-                type_label = self._get_metrics_node_type(node)
-                execute_start = time.time()
+                        engine_post_execute_start_at = time.time()
+                        interrupter.check_and_set(ExecuteKeyPoint.EXECUTE_NODE_DONE, execute_result=execute_result)
 
-                if interrupter.recover_point and interrupter.recover_point.execute_result:
                     logger.info(
-                        "root pipeline[%s] skip real execute node %s, using recover result",
-                        root_pipeline_id,
-                        node,
-                    )
-                    execute_result = interrupter.recover_point.execute_result
-                else:
-                    handler = HandlerFactory.get_handler(node, self.runtime, interrupter)
-                    ENGINE_EXECUTE_PRE_PROCESS_DURATION.labels(type=node.type.value, hostname=self._hostname).observe(
-                        time.time() - engine_pre_execute_start_at
-                    )
-                    execute_result = handler.execute(
-                        process_info=process_info,
-                        loop=loop,
-                        inner_loop=inner_loop,
-                        version=version,
-                        recover_point=interrupter.recover_point,
+                        "root pipeline[%s] node(%s) execute result: %s",
+                        process_info.root_pipeline_id,
+                        node.id,
+                        execute_result.__dict__,
                     )
 
-                engine_post_execute_start_at = time.time()
-                interrupter.check_and_set(ExecuteKeyPoint.EXECUTE_NODE_DONE, execute_result=execute_result)
-
-                logger.info(
-                    "root pipeline[%s] node(%s) execute result: %s",
-                    process_info.root_pipeline_id,
-                    node.id,
-                    execute_result.__dict__,
-                )
-
-                ENGINE_NODE_EXECUTE_TIME.labels(type=type_label, hostname=self._hostname).observe(
-                    time.time() - execute_start
-                )
+                    ENGINE_NODE_EXECUTE_TIME.labels(type=type_label, hostname=self._hostname).observe(
+                        time.time() - execute_start
+                    )
 
-                # 节点运行成功并且不需要进行调度
-                if not execute_result.should_sleep and execute_result.next_node_id != node.id:
-                    self.runtime.node_finish(root_pipeline_id=root_pipeline_id, node_id=node.id)
-                    if process_info.pipeline_stack:
-                        self.hook_dispatch(
-                            top_pipeline_id=process_info.top_pipeline_id,
-                            root_pipeline_id=process_info.root_pipeline_id,
-                            node_id=node.id,
-                            hook=HookType.NODE_FINISH,
-                            node=node,
+                    # 节点运行成功并且不需要进行调度
+                    if not execute_result.should_sleep and execute_result.next_node_id != node.id:
+                        self.runtime.node_finish(root_pipeline_id=root_pipeline_id, node_id=node.id)
+                        if process_info.pipeline_stack:
+                            self.hook_dispatch(
+                                top_pipeline_id=process_info.top_pipeline_id,
+                                root_pipeline_id=process_info.root_pipeline_id,
+                                node_id=node.id,
+                                hook=HookType.NODE_FINISH,
+                                node=node,
+                            )
+                        if node.type == NodeType.ServiceActivity and self.runtime.get_config(
+                            RuntimeSettings.PIPELINE_ENABLE_ROLLBACK.value
+                        ):
+                            self._set_snapshot(root_pipeline_id, node)
+                            # 判断是否已经预约了回滚，如果已经预约，则kill掉当前的process，直接return
+                            if node.reserve_rollback:
+                                self.runtime.die(process_id)
+                                self.runtime.start_rollback(root_pipeline_id, node_id)
+                                return
+
+                    # 进程是否要进入睡眠
+                    if execute_result.should_sleep:
+                        self.runtime.sleep(process_id)
+
+                    # 节点是否准备好进入调度
+                    if execute_result.schedule_ready:
+                        schedule = self.runtime.set_schedule(
+                            process_id=process_id,
+                            node_id=current_node_id,
+                            version=version,
+                            schedule_type=execute_result.schedule_type,
                         )
-                    if node.type == NodeType.ServiceActivity and self.runtime.get_config(
-                        RuntimeSettings.PIPELINE_ENABLE_ROLLBACK.value
-                    ):
-                        self._set_snapshot(root_pipeline_id, node)
-                        # 判断是否已经预约了回滚，如果已经预约，则kill掉当前的process，直接return
-                        if node.reserve_rollback:
-                            self.runtime.die(process_id)
-                            self.runtime.start_rollback(root_pipeline_id, node_id)
-                            return
+                        schedule_id = schedule.id
 
-                # 进程是否要进入睡眠
-                if execute_result.should_sleep:
-                    self.runtime.sleep(process_id)
-
-                # 节点是否准备好进入调度
-                if execute_result.schedule_ready:
-                    schedule = self.runtime.set_schedule(
-                        process_id=process_id,
-                        node_id=current_node_id,
-                        version=version,
-                        schedule_type=execute_result.schedule_type,
-                    )
-                    schedule_id = schedule.id
+                        if execute_result.schedule_type == ScheduleType.POLL and (
+                            not interrupter.recover_point or not interrupter.recover_point.set_schedule_done
+                        ):
+                            self.runtime.schedule(
+                                process_id=process_id, node_id=current_node_id, schedule_id=schedule_id, headers=headers
+                            )
 
-                    if execute_result.schedule_type == ScheduleType.POLL and (
-                        not interrupter.recover_point or not interrupter.recover_point.set_schedule_done
-                    ):
-                        self.runtime.schedule(
-                            process_id=process_id, node_id=current_node_id, schedule_id=schedule_id, headers=headers
+                        interrupter.check_and_set(
+                            ExecuteKeyPoint.EXECUTE_DONE_SET_SCHEDULE_DONE, set_schedule_done=True
                         )
 
-                    interrupter.check_and_set(ExecuteKeyPoint.EXECUTE_DONE_SET_SCHEDULE_DONE, set_schedule_done=True)
+                    # 是否有待调度的子进程
+                    elif execute_result.dispatch_processes:
+                        children = [d.process_id for d in execute_result.dispatch_processes]
+                        logger.info(
+                            "root pipeline[%s] with top pipeline[%s] dispatch %s children: %s",
+                            process_info.root_pipeline_id,
+                            process_info.top_pipeline_id,
+                            len(execute_result.dispatch_processes),
+                            execute_result.dispatch_processes,
+                        )
 
-                # 是否有待调度的子进程
-                elif execute_result.dispatch_processes:
-                    children = [d.process_id for d in execute_result.dispatch_processes]
-                    logger.info(
-                        "root pipeline[%s] with top pipeline[%s] dispatch %s children: %s",
-                        process_info.root_pipeline_id,
-                        process_info.top_pipeline_id,
-                        len(execute_result.dispatch_processes),
-                        execute_result.dispatch_processes,
-                    )
+                        self.runtime.join(process_id, children)
 
-                    self.runtime.join(process_id, children)
+                        for d in execute_result.dispatch_processes:
+                            self.runtime.execute(
+                                process_id=d.process_id,
+                                node_id=d.node_id,
+                                root_pipeline_id=process_info.root_pipeline_id,
+                                parent_pipeline_id=process_info.top_pipeline_id,
+                                headers=headers,
+                            )
 
-                    for d in execute_result.dispatch_processes:
-                        self.runtime.execute(
-                            process_id=d.process_id,
-                            node_id=d.node_id,
-                            root_pipeline_id=process_info.root_pipeline_id,
-                            parent_pipeline_id=process_info.top_pipeline_id,
-                            headers=headers,
-                        )
+                    if execute_result.should_die:
+                        self.runtime.die(process_id)
 
-                if execute_result.should_die:
-                    self.runtime.die(process_id)
+                    if execute_result.should_sleep or execute_result.should_die:
+                        ENGINE_EXECUTE_POST_PROCESS_DURATION.labels(
+                            type=node.type.value, hostname=self._hostname
+                        ).observe(time.time() - engine_post_execute_start_at)
+                        return
 
-                if execute_result.should_sleep or execute_result.should_die:
+                    current_node_id = execute_result.next_node_id
+                    interrupter.to_node(current_node_id)
                     ENGINE_EXECUTE_POST_PROCESS_DURATION.labels(type=node.type.value, hostname=self._hostname).observe(
                         time.time() - engine_post_execute_start_at
                     )
-                    return
-
-                current_node_id = execute_result.next_node_id
-                interrupter.to_node(current_node_id)
-                ENGINE_EXECUTE_POST_PROCESS_DURATION.labels(type=node.type.value, hostname=self._hostname).observe(
-                    time.time() - engine_post_execute_start_at
-                )
 
     @setup_gauge(ENGINE_RUNNING_SCHEDULES)
     @setup_histogram(ENGINE_SCHEDULE_RUNNING_TIME)
@@ -1171,7 +1268,9 @@ class Engine:
 
         root_pipeline_id = ""
 
-        with interrupter():
+        with interrupter(), observe_round_trips(
+            ENGINE_NODE_SCHEDULE_DB_QUERIES, ENGINE_NODE_SCHEDULE_BROKER_PUBLISHES
+        ) as round_trips:
             process_info = self.runtime.get_process_info(process_id)
             root_pipeline_id = process_info.root_pipeline_id
 
@@ -1290,6 +1389,7 @@ class Engine:
             # fetch node info and start schedule
             node = self.runtime.get_node(node_id)
             type_label = self._get_metrics_node_type(node)
+            round_trips.labels(type=type_label, hostname=self._hostname)
 
             logger.info(
                 "root pipeline[%s] before schedule node %s with data %s",
@@ -1379,6 +1479,16 @@ class Engine:
                 time.time() - engine_post_schedule_start_at
             )
 
+    def _node_transaction(self, interrupter: ExecuteInterrupter, enabled: bool) -> "NodeTransaction":
+        return NodeTransaction(self.runtime, interrupter, enabled)
+
+    def _beat(self, process_id: int):
+        try:
+            self.runtime.beat(process_id)
+        except Exception:
+            # do not fail the flow when beat failed
+            logger.exception("process(%s) beat error" % process_id)
+
     def _set_snapshot(self, root_pipeline_id, node):
         inputs = self.runtime.get_execution_data_inputs(node.id)
         outputs = self.runtime.get_execution_data_outputs(node.id)
@@ -12,12 +12,14 @@ specific language governing permissions and limitations under the License.
 """
 
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .models import (
     CallbackData,
     ContextValue,
+    ContextValueType,
     Data,
     DataInput,
     DispatchProcess,
@@ -28,6 +30,7 @@ from .models import (
     ExecutionShortHistory,
     HookType,
     Node,
+    NodeBundle,
     ProcessInfo,
     Schedule,
     ScheduleInterruptEvent,
@@ -39,7 +42,7 @@ from .models import (
 
 # plugin interface
 
-__version__ = "7.1.1"
+__version__ = "7.2.0"
 
 
 def version():
@@ -874,6 +877,27 @@ class ProcessMixin:
         :type node_id: str
         """
 
+    def enter_node(self, process_id: int, node_id: str, wake_up: bool = False, beat: bool = True):
+        """
+        该接口应为幂等接口
+        进程进入某个节点时更新进程心跳及当前处理节点，wake_up 为 True 时同时将进程标记为唤醒状态
+        默认实现会依次调用 beat, set_current_node 及 wake_up，运行时可以覆盖该方法将这些更新合并为一次写入
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param wake_up: 是否将进程标记为唤醒状态
+        :type wake_up: bool
+        :param beat: 是否更新进程心跳
+        :type beat: bool
+        """
+        if beat:
+            self.beat(process_id)
+        self.set_current_node(process_id, node_id)
+        if wake_up:
+            self.wake_up(process_id)
+
     @abstractmethod
     def child_process_finish(self, parent_id: int, process_id: int) -> bool:
         """
@@ -1017,6 +1041,26 @@ class StateMixin:
         :rtype: Dict[str, str]
         """
 
+    def get_control_epoch(self, root_pipeline_id: str) -> Optional[int]:
+        """
+        获取根流程的控制版本号，流程及其子流程被暂停、撤销或继续时该版本号会增加
+        默认实现返回 None，表示运行时不支持控制版本号，此时引擎每推进一个节点都会检查流程栈中所有流程的状态
+
+        :param root_pipeline_id: 根流程 ID
+        :type root_pipeline_id: str
+        :return: 控制版本号
+        :rtype: Optional[int]
+        """
+        return None
+
+    def bump_control_epoch(self, pipeline_id: str):
+        """
+        增加流程所属根流程的控制版本号，默认实现不做任何操作
+
+        :param pipeline_id: 流程 ID，可以是根流程或子流程 ID
+        :type pipeline_id: str
+        """
+
     @abstractmethod
     def has_state(self, node_id: str) -> bool:
         """
@@ -1160,6 +1204,22 @@ class NodeMixin:
         :type loop_times: int
         """
 
+    def get_node_bundle(self, node_id: str, prefetch_next: bool = False) -> NodeBundle:
+        """
+        获取节点推进时需要的节点详情及状态
+        默认实现会依次调用 get_node 及 get_state_or_none，不会获取节点数据，
+        运行时可以覆盖该方法在一次查询中同时获取节点数据，并在 prefetch_next 为 True 且节点
+        只有一个后继节点时预取后继节点不会发生变化的数据
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param prefetch_next: 是否预取后继节点的数据
+        :type prefetch_next: bool
+        :return: NodeBundle 实例
+        :rtype: NodeBundle
+        """
+        return NodeBundle(node=self.get_node(node_id), state=self.get_state_or_none(node_id))
+
 
 class ScheduleMixin:
     """
@@ -1295,6 +1355,21 @@ class ContextMixin:
         :rtype: set
         """
 
+    def get_context_values_with_references(self, pipeline_id: str, keys: set) -> List[ContextValue]:
+        """
+        获取某个流程上下文中 keys 所指定的变量及其直接和间接引用的其他所有变量的值
+        默认实现会依次调用 get_context_key_references 及 get_context_values，运行时可以覆盖该方法减少读取的次数及数据量
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param keys: 变量键
+        :type keys: set
+        :return: 变量值信息
+        :rtype: List[ContextValue]
+        """
+        references = self.get_context_key_references(pipeline_id=pipeline_id, keys=keys)
+        return self.get_context_values(pipeline_id=pipeline_id, keys=set(keys).union(references))
+
     @abstractmethod
     def update_context_values(self, pipeline_id: str, context_values: List[ContextValue]):
         """
@@ -1319,6 +1394,25 @@ class ContextMixin:
         :type update: Dict[str, ContextValue]
         """
 
+    def append_context_value(self, pipeline_id: str, key: str, value: Any):
+        """
+        向某个流程上下文中的列表变量末尾追加一个元素，变量不存在或不是列表时会以只包含该元素的列表覆盖
+        默认实现会读取整个列表并调用 upsert_plain_context_values 写回，运行时可以覆盖该方法只写入追加的元素
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param key: 变量键
+        :type key: str
+        :param value: 追加的元素
+        :type value: Any
+        """
+        context_values = self.get_context_values(pipeline_id=pipeline_id, keys={key})
+        values = list(context_values[0].value) if context_values and isinstance(context_values[0].value, list) else []
+        values.append(value)
+        self.upsert_plain_context_values(
+            pipeline_id=pipeline_id, update={key: ContextValue(key=key, type=ContextValueType.PLAIN, value=values)}
+        )
+
     def get_context(self, pipeline_id: str) -> List[ContextValue]:
         """
         获取某个流程的所有上下文数据
@@ -1602,6 +1696,15 @@ class InterruptMixin:
         :return: 需要中断的异常列表
         """
 
+    @contextmanager
+    def node_transaction(self):
+        """
+        开启 PIPELINE_ENABLE_NODE_TRANSACTION 后，引擎处理一个节点时产生的所有写入都会在该上下文中进行
+        运行时需要保证上下文中抛出异常时其中的所有写入都被回滚，并且在上下文中派发的任务在提交后才会被执行
+        默认实现不开启事务
+        """
+        yield
+
 
 class EventMixin:
     """
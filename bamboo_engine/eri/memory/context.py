@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from copy import deepcopy
+from typing import Any, Dict, List, Set
+
+from bamboo_engine.eri import ContextValue, ContextValueType
+from bamboo_engine.exceptions import NotFoundError
+from bamboo_engine.template import Template
+from bamboo_engine.utils.references import caculate_final_references
+
+
+class ContextMixin:
+    @staticmethod
+    def _to_context_value(key: str, record: dict) -> ContextValue:
+        return ContextValue(
+            key=key,
+            type=ContextValueType(record["type"]),
+            value=deepcopy(record["value"]),
+            code=record["code"] or None,
+        )
+
+    def get_context_values(self, pipeline_id: str, keys: set) -> List[ContextValue]:
+        """
+        获取某个流程上下文中的 keys 所指定的键对应变量的值
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param keys: 变量键
+        :type keys: set
+        :return: 变量值信息
+        :rtype: List[ContextValue]
+        """
+        context = self._context_values.get(pipeline_id, {})
+        return [self._to_context_value(key, context[key]) for key in keys if key in context]
+
+    def get_context_key_references(self, pipeline_id: str, keys: set) -> set:
+        """
+        获取某个流程上下文中 keys 所指定的变量直接和间接引用的其他所有变量的键
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param keys: 变量 key 列表
+        :type keys: set
+        :return: keys 所指定的变量直接和简介引用的其他所有变量的键
+        :rtype: set
+        """
+        context = self._context_values.get(pipeline_id, {})
+        references = set()
+        for key in keys:
+            if key in context:
+                references.update(context[key]["references"])
+        return references
+
+    def get_context_values_with_references(self, pipeline_id: str, keys: set) -> List[ContextValue]:
+        """
+        获取某个流程上下文中 keys 所指定的变量及其直接和间接引用的其他所有变量的值
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param keys: 变量键
+        :type keys: set
+        :return: 变量值信息
+        :rtype: List[ContextValue]
+        """
+        context = self._context_values.get(pipeline_id, {})
+        need_keys = set(keys)
+        for key in keys:
+            if key in context:
+                need_keys.update(context[key]["references"])
+        return [self._to_context_value(key, context[key]) for key in need_keys if key in context]
+
+    def update_context_values(self, pipeline_id: str, context_values: List[ContextValue]):
+        """
+        更新上下文数据
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param context_values: 上下文数据
+        :type context_values: List[ContextValue]
+        """
+        context = self._context_values.get(pipeline_id, {})
+        exist_references = {key: record["references"] for key, record in context.items()}
+
+        context_value_references = {}
+        for cv in context_values:
+            context_value_references[cv.key] = Template(cv.value).get_reference()
+
+        # 重新计算并更新整个流程的变量引用图
+        for key, record in context.items():
+            if key not in context_value_references:
+                context_value_references[key] = Template(record["value"]).get_reference()
+
+        # convert a:b, b:c,d -> a:b,c,d b:c,d
+        final_references = caculate_final_references(context_value_references)
+
+        for cv in context_values:
+            if cv.key not in context:
+                continue
+            context[cv.key] = {
+                "type": cv.type.value,
+                "value": deepcopy(cv.value),
+                "code": cv.code or "",
+                "references": final_references[cv.key],
+            }
+
+        for key, record in context.items():
+            record["references"] = final_references.get(key, set())
+
+        if any(record["references"] != exist_references[key] for key, record in context.items()):
+            self._refresh_closure_references(pipeline_id)
+
+    def upsert_plain_context_values(self, pipeline_id: str, update: Dict[str, ContextValue]):
+        """
+        更新或创建新的普通上下文数据
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param update: 更新数据
+        :type update: Dict[str, ContextValue]
+        """
+        context = self._context_values.setdefault(pipeline_id, {})
+        for key, context_value in update.items():
+            context[key] = {
+                "type": ContextValueType.PLAIN.value,
+                "value": deepcopy(context_value.value),
+                "code": "",
+                "references": set(),
+            }
+
+    def append_context_value(self, pipeline_id: str, key: str, value: Any):
+        """
+        向某个流程上下文中的列表变量末尾追加一个元素
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param key: 变量键
+        :type key: str
+        :param value: 追加的元素
+        :type value: Any
+        """
+        context = self._context_values.setdefault(pipeline_id, {})
+        record = context.get(key)
+        if record is None or record["type"] != ContextValueType.PLAIN.value or not isinstance(record["value"], list):
+            record = context[key] = {
+                "type": ContextValueType.PLAIN.value,
+                "value": record["value"] if record is not None and isinstance(record["value"], list) else [],
+                "code": "",
+                "references": set(),
+            }
+        record["value"].append(deepcopy(value))
+
+    def get_context(self, pipeline_id: str) -> List[ContextValue]:
+        """
+        获取某个流程的所有上下文数据
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :return: [description]
+        :rtype: List[ContextValue]
+        """
+        return [
+            self._to_context_value(key, record) for key, record in self._context_values.get(pipeline_id, {}).items()
+        ]
+
+    def get_context_outputs(self, pipeline_id: str) -> Set[str]:
+        """
+        获取流程上下文需要输出的数据
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :return: 输出数据 key
+        :rtype: Set[str]
+        """
+        try:
+            return set(self._context_outputs[pipeline_id])
+        except KeyError:
+            raise NotFoundError("ContextOutputs of pipeline({}) does not exist".format(pipeline_id))
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+import pickle
+from copy import deepcopy
+from typing import Dict, List, Tuple
+
+from bamboo_engine.eri import CallbackData, Data, DataInput, ExecutionData
+from bamboo_engine.exceptions import NotFoundError
+
+
+class DataMixin:
+    JSON_SERIALIZER = "json"
+    PICKLE_SERIALIZER = "pickle"
+
+    @staticmethod
+    def _get_data_inputs(inputs: dict) -> Dict[str, DataInput]:
+        return {k: DataInput(need_render=v["need_render"], value=deepcopy(v["value"])) for k, v in inputs.items()}
+
+    def get_data(self, node_id: str) -> Data:
+        """
+        获取某个节点的数据对象
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 数据对象实例
+        :rtype: Data
+        """
+        try:
+            data = self._data[node_id]
+        except KeyError:
+            raise NotFoundError
+        return Data(inputs=self._get_data_inputs(data["inputs"]), outputs=dict(data["outputs"]))
+
+    def get_batch_data(self, node_ids: List[str]) -> Dict[str, Data]:
+        """
+        批量获取节点数据对象
+
+        :param node_ids: 节点 ID 列表
+        :type node_ids: List[str]
+        :return: 节点数据对象字典 node_id: Data
+        :rtype: dict
+        """
+        return {node_id: self.get_data(node_id) for node_id in node_ids if node_id in self._data}
+
+    def get_data_inputs(self, node_id: str) -> Dict[str, DataInput]:
+        """
+        获取某个节点的输入数据
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 输入数据字典
+        :rtype: dict
+        """
+        return self.get_data(node_id).inputs
+
+    def get_data_outputs(self, node_id: str) -> dict:
+        """
+        获取某个节点的输出数据
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 输入数据字典
+        :rtype: dict
+        """
+        try:
+            return dict(self._data[node_id]["outputs"])
+        except KeyError:
+            raise NotFoundError
+
+    def set_data_inputs(self, node_id: str, data: Dict[str, DataInput]):
+        """
+        将节点数据对象的 inputs 设置为 data
+
+        : param node_id: 节点 ID
+        : type node_id: str
+        : param data: 目标数据
+        : type data: dict
+        """
+        inputs = {k: {"need_render": v.need_render, "value": deepcopy(v.value)} for k, v in data.items()}
+        self._data.setdefault(node_id, {"outputs": {}})["inputs"] = inputs
+        self._refresh_input_references(node_id, data)
+
+    def get_execution_data(self, node_id: str) -> ExecutionData:
+        """
+        获取某个节点的执行数据
+
+        : param node_id: 节点 ID
+        : type node_id: str
+        : return: 执行数据实例
+        : rtype: ExecutionData
+        """
+        try:
+            data = self._execution_data[node_id]
+        except KeyError:
+            raise NotFoundError
+        return ExecutionData(inputs=deepcopy(data["inputs"]), outputs=deepcopy(data["outputs"]))
+
+    def get_execution_data_inputs(self, node_id: str) -> dict:
+        """
+        获取某个节点的执行数据输入
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 执行数据输入
+        :rtype: dict
+        """
+        data = self._execution_data.get(node_id)
+        return deepcopy(data["inputs"]) if data is not None else {}
+
+    def get_execution_data_outputs(self, node_id: str) -> dict:
+        """
+        获取某个节点的执行数据输出
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 执行数据输出
+        :rtype: dict
+        """
+        data = self._execution_data.get(node_id)
+        return deepcopy(data["outputs"]) if data is not None else {}
+
+    def set_execution_data(self, node_id: str, data: ExecutionData):
+        """
+        设置某个节点的执行数据
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param data: 执行数据实例
+        :type data: ExecutionData
+        """
+        self._execution_data[node_id] = {"inputs": deepcopy(dict(data.inputs)), "outputs": deepcopy(dict(data.outputs))}
+
+    def set_execution_data_inputs(self, node_id: str, inputs: dict):
+        """
+        设置某个节点的执行数据输入
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param outputs: 输出数据
+        :type outputs: dict
+        """
+        self._execution_data.setdefault(node_id, {"outputs": {}})["inputs"] = deepcopy(inputs)
+
+    def set_execution_data_outputs(self, node_id: str, outputs: dict):
+        """
+        设置某个节点的执行数据输出
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param outputs: 输出数据
+        :type outputs: dict
+        """
+        self._execution_data.setdefault(node_id, {"inputs": {}})["outputs"] = deepcopy(outputs)
+
+    def set_callback_data(self, node_id: str, version: str, data: dict) -> int:
+        """
+        设置某个节点执行数据的回调数据
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param version: 节点执行版本
+        :type version: str
+        :param data: 回调数据
+        :type data: dict
+        :return: 回调数据 ID
+        :rtype: int
+        """
+        data_id = next(self._callback_data_id_counter)
+        self._callback_data[data_id] = {"node_id": node_id, "version": version, "data": deepcopy(data)}
+        return data_id
+
+    def get_callback_data(self, data_id: int) -> CallbackData:
+        """
+        获取回调数据
+
+        :param data_id: Data ID
+        :type data_id: int
+        :return: 回调数据实例
+        :rtype: CallbackData
+        """
+        try:
+            data = self._callback_data[data_id]
+        except KeyError:
+            raise NotFoundError("CallbackData with id({}) does not exist".format(data_id))
+        return CallbackData(id=data_id, node_id=data["node_id"], version=data["version"], data=deepcopy(data["data"]))
+
+    def serialize_execution_data(self, data: dict) -> Tuple[str, str]:
+        """
+        幂等接口
+        序列化执行数据输入或输出
+
+        :param data: 执行数据实例
+        :return: 序列化数据，序列化器标记
+        """
+        try:
+            return json.dumps(data), self.JSON_SERIALIZER
+        except TypeError:
+            return pickle.dumps(data).hex(), self.PICKLE_SERIALIZER
+
+    def deserialize_execution_data(self, data: str, serializer: str) -> dict:
+        """
+        幂等接口
+        反序列化执行数据
+
+        :param data: 序列化数据
+        :param data: 序列化器标记
+        :return: 执行数据输入或输出
+        """
+        if serializer == self.JSON_SERIALIZER:
+            return json.loads(data)
+        elif serializer == self.PICKLE_SERIALIZER:
+            return pickle.loads(bytes.fromhex(data))
+        else:
+            raise ValueError("unsupport serializer type: {}".format(serializer))
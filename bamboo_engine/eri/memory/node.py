@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from typing import Dict
+
+from bamboo_engine.eri import (
+    Condition,
+    ConditionalParallelGateway,
+    ConvergeGateway,
+    DefaultCondition,
+    EmptyEndEvent,
+    EmptyStartEvent,
+    ExclusiveGateway,
+    ExecutableEndEvent,
+    LoopControlConfig,
+    DataInput,
+    Node,
+    NodeReferences,
+    NodeType,
+    ParallelGateway,
+    ServiceActivity,
+    SubProcess,
+)
+from bamboo_engine.exceptions import NotFoundError
+from bamboo_engine.template import Template
+from bamboo_engine.utils.references import caculate_node_references
+
+
+def parse_node(node_detail: dict) -> Node:
+    """
+    将 prepare_run_pipeline 中生成的节点详情转换为 Node 实例
+
+    :param node_detail: 节点详情
+    :type node_detail: dict
+    :return: Node 实例
+    :rtype: Node
+    """
+    node_type = node_detail["type"]
+    targets = node_detail["targets"]
+    references = node_detail.get("references")
+    common_args = dict(
+        id=node_detail["id"],
+        target_flows=list(targets.keys()),
+        target_nodes=list(targets.values()),
+        targets=node_detail["targets"],
+        root_pipeline_id=node_detail["root_pipeline_id"],
+        parent_pipeline_id=node_detail["parent_pipeline_id"],
+        can_skip=node_detail["can_skip"],
+        name=node_detail.get("name"),
+        can_retry=node_detail["can_retry"],
+        reserve_rollback=node_detail.get("reserve_rollback", False),
+        references=NodeReferences(direct=set(references["direct"]), closure=set(references["closure"]))
+        if references is not None
+        else None,
+    )
+
+    if node_type == NodeType.ServiceActivity.value:
+        loop_config_dict = node_detail.get("loop_config") or {}
+        loop_config = (
+            LoopControlConfig(
+                loop_times=loop_config_dict.get("loop_times"),
+                fail_skip=loop_config_dict.get("fail_skip", False),
+                retryable=loop_config_dict.get("retryable", False),
+                skippable=loop_config_dict.get("skippable", False),
+                outputs_key=loop_config_dict.get("outputs_key", LoopControlConfig.DEFAULT_OUTPUTS_KEY),
+            )
+            if loop_config_dict.get("enable", False)
+            else None
+        )
+        return ServiceActivity(
+            type=NodeType.ServiceActivity,
+            code=node_detail["code"],
+            version=node_detail["version"],
+            error_ignorable=node_detail["error_ignorable"],
+            loop_config=loop_config,
+            **common_args
+        )
+
+    elif node_type == NodeType.SubProcess.value:
+        return SubProcess(type=NodeType.SubProcess, start_event_id=node_detail["start_event_id"], **common_args)
+
+    elif node_type == NodeType.ExclusiveGateway.value:
+        default_condition = node_detail.get("default_condition")
+        return ExclusiveGateway(
+            type=NodeType.ExclusiveGateway,
+            conditions=[Condition(**c) for c in node_detail["conditions"]],
+            default_condition=DefaultCondition(**default_condition) if default_condition else None,
+            extra_info=node_detail.get("extra_info"),
+            **common_args
+        )
+
+    elif node_type == NodeType.ParallelGateway.value:
+        return ParallelGateway(
+            type=NodeType.ParallelGateway, converge_gateway_id=node_detail["converge_gateway_id"], **common_args
+        )
+
+    elif node_type == NodeType.ConditionalParallelGateway.value:
+        default_condition = node_detail.get("default_condition")
+        return ConditionalParallelGateway(
+            type=NodeType.ConditionalParallelGateway,
+            converge_gateway_id=node_detail["converge_gateway_id"],
+            conditions=[Condition(**c) for c in node_detail["conditions"]],
+            default_condition=DefaultCondition(**default_condition) if default_condition else None,
+            extra_info=node_detail.get("extra_info"),
+            **common_args
+        )
+
+    elif node_type == NodeType.ConvergeGateway.value:
+        return ConvergeGateway(type=NodeType.ConvergeGateway, **common_args)
+
+    elif node_type == NodeType.EmptyStartEvent.value:
+        return EmptyStartEvent(type=NodeType.EmptyStartEvent, **common_args)
+
+    elif node_type == NodeType.EmptyEndEvent.value:
+        return EmptyEndEvent(type=NodeType.EmptyEndEvent, **common_args)
+
+    elif node_type == NodeType.ExecutableEndEvent.value:
+        return ExecutableEndEvent(type=NodeType.ExecutableEndEvent, code=node_detail["code"], **common_args)
+
+    else:
+        raise ValueError("unknown node type: {}".format(node_type))
+
+
+class NodeMixin:
+    def _set_node(self, node_detail: dict):
+        self._node_details[node_detail["id"]] = node_detail
+        self._nodes[node_detail["id"]] = parse_node(node_detail)
+
+    def get_node(self, node_id: str) -> Node:
+        """
+        获取某个节点的详细信息
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: Node 实例
+        :rtype: Node
+        """
+        try:
+            return self._nodes[node_id]
+        except KeyError:
+            raise NotFoundError("Node with node_id({}) does not exist".format(node_id))
+
+    def update_node_loop_times(self, node_id: str, loop_times: int):
+        """
+        更新某个节点的 loop_config.loop_times 配置
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param loop_times: 新的循环次数
+        :type loop_times: int
+        """
+        if not isinstance(loop_times, int) or loop_times < 0:
+            raise ValueError("loop_times must be a non-negative integer, got: {}".format(loop_times))
+
+        if node_id not in self._node_details:
+            raise NotFoundError("Node with node_id({}) does not exist".format(node_id))
+
+        node_detail = dict(self._node_details[node_id])
+        loop_config = dict(node_detail.get("loop_config") or {})
+        loop_config["loop_times"] = loop_times
+        node_detail["loop_config"] = loop_config
+
+        self._set_node(node_detail)
+
+    def _pipeline_final_references(self, pipeline_id: str) -> Dict[str, set]:
+        return {key: record["references"] for key, record in self._context_values.get(pipeline_id, {}).items()}
+
+    def _refresh_input_references(self, node_id: str, inputs: Dict[str, DataInput]):
+        """
+        节点输入被修改后重新计算 prepare 阶段保存的输入引用
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param inputs: 新的节点输入
+        :type inputs: Dict[str, DataInput]
+        """
+        node_detail = self._node_details.get(node_id)
+        if node_detail is None or "references" not in node_detail:
+            return
+
+        direct = Template({k: di.value for k, di in inputs.items() if di.need_render}).get_reference()
+        node_detail = dict(node_detail)
+        node_detail["references"] = caculate_node_references(
+            direct, self._pipeline_final_references(node_detail["parent_pipeline_id"])
+        )
+        self._set_node(node_detail)
+
+    def _refresh_closure_references(self, pipeline_id: str):
+        """
+        流程上下文的变量引用关系发生变化后，重新计算该流程中所有节点保存的引用闭包
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        """
+        final_references = self._pipeline_final_references(pipeline_id)
+        for node_detail in list(self._node_details.values()):
+            if node_detail["parent_pipeline_id"] != pipeline_id or "references" not in node_detail:
+                continue
+
+            node_detail = dict(node_detail)
+            node_detail["references"] = caculate_node_references(
+                set(node_detail["references"]["direct"]), final_references
+            )
+            self._set_node(node_detail)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from typing import Callable
+
+from bamboo_engine.eri import ExecutableEvent, Service, Variable
+from bamboo_engine.exceptions import NotFoundError
+
+
+class PluginManagerMixin:
+    def register_service(self, code: str, factory: Callable[[], Service], version: str = "legacy"):
+        """
+        注册服务，每次执行节点时都会调用 factory 创建新的服务对象实例
+
+        :param code: 服务唯一代号
+        :type code: str
+        :param factory: 服务对象工厂，一般直接传入 Service 的子类
+        :type factory: Callable[[], Service]
+        :param version: 服务版本
+        :type version: str
+        """
+        self._services[(code, version)] = factory
+
+    def register_executable_end_event(self, code: str, factory: Callable[[], ExecutableEvent]):
+        """
+        注册可执行结束事件
+
+        :param code: 可执行结束事件唯一代号
+        :type code: str
+        :param factory: 可执行结束事件工厂，一般直接传入 ExecutableEvent 的子类
+        :type factory: Callable[[], ExecutableEvent]
+        """
+        self._executable_end_events[code] = factory
+
+    def register_compute_variable(self, code: str, factory: Callable[[str, Variable, dict], Variable]):
+        """
+        注册计算型变量，factory 会以 (key, value, additional_data) 为参数被调用，
+        其中 value 为变量配置解析后的 Variable 实例
+
+        :param code: 计算型变量唯一代号
+        :type code: str
+        :param factory: 变量工厂
+        :type factory: Callable[[str, Variable, dict], Variable]
+        """
+        self._compute_variables[code] = factory
+
+    def get_service(self, code: str, version: str, name: str = None, inner_loop: int = -1) -> Service:
+        """
+        根据代号与版本获取特定服务对象实例
+
+        :param code: 服务唯一代号
+        :type code: str
+        :param version: 服务版本
+        :type version: str
+        :param name: 服务名
+        :type version: str
+        :param inner_loop: 内循环次数
+        :type inner_loop: int
+        :return: 服务对象实例
+        :rtype: Service
+        """
+        try:
+            factory = self._services[(code, version)]
+        except KeyError:
+            raise NotFoundError("service({}, {}) is not registered".format(code, version))
+        return factory()
+
+    def get_executable_end_event(self, code: str) -> ExecutableEvent:
+        """
+        根据代号获取特定可执行结束事件实例
+
+        :param code: 可执行结束事件唯一代号
+        :type code: str
+        :return: 可执行结束事件实例
+        :rtype: ExecutableEvent:
+        """
+        try:
+            factory = self._executable_end_events[code]
+        except KeyError:
+            raise NotFoundError("executable end event({}) is not registered".format(code))
+        return factory()
+
+    def get_compute_variable(
+        self, code: str, key: str, value: Variable, additional_data: dict, inner_loop: int = -1
+    ) -> Variable:
+        """
+        根据代号获取变量实例
+
+        :param code: 唯一代号
+        :type code: str
+        :param key: 变量 key
+        :type key: str
+        :param value: 变量配置
+        :type value: Any
+        :param additional_data: 额外数据字典
+        :type additional_data: dict
+        :param inner_loop: 内循环次数
+        :type inner_loop: int
+        :return: 变量实例
+        :rtype: Variable
+        """
+        try:
+            factory = self._compute_variables[code]
+        except KeyError:
+            raise NotFoundError("compute variable({}) is not registered".format(code))
+        return factory(key, value, additional_data)
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bamboo_engine.eri import DispatchProcess, ProcessInfo, SuspendedProcessInfo
+from bamboo_engine.exceptions import NotFoundError
+
+
+class ProcessMixin:
+    def _create_process(self, root_pipeline_id: str, pipeline_stack: List[str], **fields) -> int:
+        process_id = next(self._process_id_counter)
+        process = {
+            "id": process_id,
+            "parent_id": -1,
+            "ack_num": 0,
+            "need_ack": -1,
+            "asleep": True,
+            "suspended": False,
+            "frozen": False,
+            "dead": False,
+            "last_heartbeat": datetime.now(),
+            "destination_id": "",
+            "current_node_id": "",
+            "root_pipeline_id": root_pipeline_id,
+            "suspended_by": "",
+            "priority": 100,
+            "queue": "",
+            "pipeline_stack": list(pipeline_stack),
+        }
+        process.update(fields)
+        self._processes[process_id] = process
+        return process_id
+
+    def _get_process(self, process_id: int) -> dict:
+        try:
+            return self._processes[process_id]
+        except KeyError:
+            raise NotFoundError("Process with id({}) does not exist".format(process_id))
+
+    def _update_process(self, process_id: int, **fields):
+        process = self._processes.get(process_id)
+        if process is not None:
+            process.update(fields)
+
+    @staticmethod
+    def _process_info(process: dict) -> ProcessInfo:
+        return ProcessInfo(
+            process_id=process["id"],
+            destination_id=process["destination_id"],
+            root_pipeline_id=process["root_pipeline_id"],
+            pipeline_stack=list(process["pipeline_stack"]),
+            parent_id=process["parent_id"],
+        )
+
+    def beat(self, process_id: int):
+        """
+        进程心跳
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, last_heartbeat=datetime.now())
+
+    def wake_up(self, process_id: int):
+        """
+        将当前进程标记为唤醒状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, asleep=False)
+
+    def sleep(self, process_id: int):
+        """
+        将当前进程标记为睡眠状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, asleep=True)
+
+    def suspend(self, process_id: int, by: str):
+        """
+        将当前进程标记为阻塞状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param by: 造成阻塞的节点信息
+        :type by: str
+        """
+        self._update_process(process_id, suspended=True, suspended_by=by)
+
+    def resume(self, process_id: int):
+        """
+        将进程标记为非阻塞状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, suspended=False, suspended_by="")
+
+    def batch_resume(self, process_id_list: List[int]):
+        """
+        批量将进程标记为非阻塞状态
+
+        :param process_id_list: 进程 ID 列表
+        :type process_id_list: List[int]
+        """
+        for process_id in process_id_list:
+            self.resume(process_id)
+
+    def die(self, process_id: int):
+        """
+        将当前进程标记为非存活状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, dead=True)
+
+    def get_process_info(self, process_id: int) -> ProcessInfo:
+        """
+        获取某个进程的基本信息
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :return: 进程基本信息
+        :rtype: ProcessInfo
+        """
+        return self._process_info(self._get_process(process_id))
+
+    def get_process_info_with_root_pipeline(self, pipeline_id: str) -> List[ProcessInfo]:
+        """
+        根据根流程 ID 获取一批进程的信息
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :return: 进程基本信息
+        :rtype: List[ProcessInfo]
+        """
+        return [self._process_info(p) for p in self._processes.values() if p["root_pipeline_id"] == pipeline_id]
+
+    def kill(self, process_id: int):
+        """
+        强制结束某个进程正在进行的活动，并将其标志为睡眠状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, asleep=True)
+
+    def get_suspended_process_info(self, suspended_by: str) -> List[SuspendedProcessInfo]:
+        """
+        获取由于 pipeline 暂停而被暂停执行的进程信息
+
+        : param suspended_by: 进程 ID
+        : type suspended_by: str
+        : return: 暂停的进程信息
+        : rtype: SuspendedProcessInfo
+        """
+        return [
+            SuspendedProcessInfo(
+                process_id=p["id"],
+                current_node=p["current_node_id"],
+                root_pipeline_id=p["root_pipeline_id"],
+                pipeline_stack=list(p["pipeline_stack"]),
+            )
+            for p in self._processes.values()
+            if p["suspended_by"] == suspended_by
+        ]
+
+    def get_sleep_process_info_with_current_node_id(self, node_id: str) -> Optional[ProcessInfo]:
+        """
+        获取由于处于睡眠状态且当前节点 ID 为 node_id 的进程 ID
+
+        : param node_id: 节点 ID
+        : type node_id: str
+        : return: 进程 ID
+        : rtype: str
+        """
+        processes = [p for p in self._processes.values() if p["asleep"] and p["current_node_id"] == node_id]
+
+        if not processes:
+            return None
+
+        if len(processes) != 1:
+            raise ValueError(
+                "found multiple sleep process({}) with current_node_id({})".format(
+                    [p["id"] for p in processes], node_id
+                )
+            )
+
+        return self._process_info(processes[0])
+
+    def get_process_id_with_current_node_id(self, node_id: str) -> Optional[int]:
+        """
+        获取当前节点 ID 为 node_id 且存活的进程 ID
+
+        : param node_id: 节点 ID
+        : type node_id: str
+        : return: 进程 ID
+        : rtype: str
+        """
+        process_ids = [p["id"] for p in self._processes.values() if not p["dead"] and p["current_node_id"] == node_id]
+
+        if not process_ids:
+            return None
+
+        if len(process_ids) != 1:
+            raise ValueError("found multiple process({}) with current_node_id({})".format(process_ids, node_id))
+
+        return process_ids[0]
+
+    def set_current_node(self, process_id: int, node_id: str):
+        """
+        将进程当前处理节点标记为 node
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        """
+        self._update_process(process_id, current_node_id=node_id)
+
+    def enter_node(self, process_id: int, node_id: str, wake_up: bool = False, beat: bool = True):
+        """
+        进程进入某个节点时设置进程心跳及当前处理节点，wake_up 为 True 时同时将进程标记为唤醒状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param wake_up: 是否将进程标记为唤醒状态
+        :type wake_up: bool
+        :param beat: 是否更新进程心跳
+        :type beat: bool
+        """
+        fields = {"current_node_id": node_id}
+        if beat:
+            fields["last_heartbeat"] = datetime.now()
+        if wake_up:
+            fields["asleep"] = False
+        self._update_process(process_id, **fields)
+
+    def child_process_finish(self, parent_id: int, process_id: int) -> bool:
+        """
+        标记某个进程的子进程执行完成，并返回是否能够唤醒父进程继续执行的标志位
+
+        :param parent_id: 父进程 ID
+        :type parent_id: int
+        :param process_id: 子进程 ID
+        :type process_id: int
+        :return: 是否能够唤醒父进程继续执行
+        :rtype: bool
+        """
+        self._update_process(process_id, dead=True)
+
+        parent = self._processes.get(parent_id)
+        if parent is None:
+            return False
+
+        parent["ack_num"] += 1
+        if parent["ack_num"] != parent["need_ack"]:
+            return False
+
+        parent["ack_num"] = 0
+        parent["need_ack"] = -1
+        return True
+
+    def is_frozen(self, process_id: int) -> bool:
+        """
+        检测当前进程是否需要被冻结
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :return: 是否需要被冻结
+        :rtype: bool
+        """
+        process = self._processes.get(process_id)
+        return process is not None and process["frozen"]
+
+    def freeze(self, process_id: int):
+        """
+        冻结当前进程
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        """
+        self._update_process(process_id, frozen=True)
+
+    def fork(
+        self,
+        parent_id: str,
+        root_pipeline_id: str,
+        pipeline_stack: List[str],
+        from_to: Dict[str, str],
+    ) -> List[DispatchProcess]:
+        """
+        根据当前进程 fork 出多个子进程
+
+        :param parent_id: 父进程 ID
+        :type parent_id: str
+        :param root_pipeline_id: 根流程 ID
+        :type root_pipeline_id: str
+        :param pipeline_stack: 子流程栈
+        :type pipeline_stack: List[str]
+        :param from_to: 子进程的执行开始节点和目标节点
+        :type from_to: Dict[str, str]
+        :return: 待调度进程信息列表
+        :rtype: List[DispatchProcess]
+        """
+        parent = self._get_process(parent_id)
+
+        for current_node, destination in from_to.items():
+            self._create_process(
+                root_pipeline_id=root_pipeline_id,
+                pipeline_stack=pipeline_stack,
+                parent_id=parent_id,
+                destination_id=destination,
+                current_node_id=current_node,
+                priority=parent["priority"],
+                queue=parent["queue"],
+            )
+
+        children = [p for p in self._processes.values() if p["parent_id"] == parent_id and not p["dead"]]
+
+        children_count = len(children)
+        expect = len(from_to)
+        if children_count != expect:
+            raise ValueError(
+                "process({}) fork failed, children count({}) does not match expect({})".format(
+                    parent_id, children_count, expect
+                )
+            )
+
+        return [DispatchProcess(process_id=p["id"], node_id=p["current_node_id"]) for p in children]
+
+    def join(self, process_id: int, children_id: List[str]):
+        """
+        让父进程等待子进程
+
+        :param process_id: 父进程 ID
+        :type process_id: int
+        :param children_id: 子进程 ID 列表
+        :type children_id: List[str]
+        """
+        self._update_process(process_id, ack_num=0, need_ack=len(children_id))
+
+    def set_pipeline_stack(self, process_id: int, stack: List[str]):
+        """
+        设置进程的流程栈
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param stack: 流程栈
+        :type stack: List[str]
+        """
+        self._update_process(process_id, pipeline_stack=list(stack))
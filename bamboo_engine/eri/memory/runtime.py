@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import itertools
+from copy import deepcopy
+from typing import List, Optional, Tuple
+
+from bamboo_engine import handlers, states
+from bamboo_engine.config import Settings
+from bamboo_engine.eri import (
+    ContextValue,
+    ContextValueType,
+    EngineRuntimeInterface,
+    ExecuteInterruptEvent,
+    NodeType,
+    ScheduleInterruptEvent,
+)
+from bamboo_engine.template import Template
+from bamboo_engine.utils.constants import RUNTIME_ALLOWED_CONFIG, VAR_CONTEXT_MAPPING
+from bamboo_engine.utils.references import caculate_final_references, caculate_node_references
+
+from .context import ContextMixin
+from .data import DataMixin
+from .execution_history import ExecutionHistoryMixin
+from .node import NodeMixin
+from .plugin_manager import PluginManagerMixin
+from .process import ProcessMixin
+from .schedule import ScheduleMixin
+from .state import StateMixin
+from .task import TaskMixin
+
+
+class InMemoryRuntime(
+    TaskMixin,
+    ExecutionHistoryMixin,
+    ContextMixin,
+    DataMixin,
+    ScheduleMixin,
+    StateMixin,
+    NodeMixin,
+    ProcessMixin,
+    PluginManagerMixin,
+    EngineRuntimeInterface,
+):
+    """
+    所有数据都保存在当前进程字典中的引擎运行时，任务通过进程内的任务队列派发，
+    调用 run_tasks 后在当前线程中执行，适用于命令行嵌入执行及不涉及 I/O 的性能测试
+    该运行时不是线程安全的，也不支持回滚
+    """
+
+    def __init__(self, config: Optional[dict] = None, node_rerun_limit: int = 100, schedule_delay: bool = True):
+        """
+
+        :param config: 引擎配置，未配置的项使用 bamboo_engine.config.Settings 中的默认值
+        :type config: Optional[dict]
+        :param node_rerun_limit: 节点最大重入次数
+        :type node_rerun_limit: int
+        :param schedule_delay: 是否按照 set_next_schedule 中的调度倒数延迟调度，为 False 时立即调度
+        :type schedule_delay: bool
+        """
+        handlers.register()
+
+        self.config = config or {}
+        self.rerun_limit = node_rerun_limit
+        self.schedule_delay = schedule_delay
+
+        self._services = {}
+        self._executable_end_events = {}
+        self._compute_variables = {}
+
+        self._processes = {}
+        self._process_id_counter = itertools.count(1)
+        self._states = {}
+        self._control_epochs = {}
+        self._nodes = {}
+        self._node_details = {}
+        self._schedules = {}
+        self._schedule_index = {}
+        self._schedule_id_counter = itertools.count(1)
+        self._context_values = {}
+        self._context_outputs = {}
+        self._data = {}
+        self._execution_data = {}
+        self._callback_data = {}
+        self._callback_data_id_counter = itertools.count(1)
+        self._histories = {}
+        self._history_id_counter = itertools.count(1)
+        self._tasks = []
+        self._task_seq = itertools.count()
+
+    def _data_inputs_assemble(self, pipeline_id: str, node_id: str, node_inputs: dict) -> Tuple[dict, List[dict]]:
+        inputs = {}
+        context_values = []
+        for k, v in node_inputs.items():
+            if v["type"] == "lazy":
+                if k.startswith("${") and k.endswith("}"):
+                    cv_key = "${%s_%s}" % (k[2:-1], node_id)
+                else:
+                    cv_key = "${%s_%s}" % (k, node_id)
+                context_values.append(
+                    {
+                        "pipeline_id": pipeline_id,
+                        "key": cv_key,
+                        "type": ContextValueType.COMPUTE.value,
+                        "value": deepcopy(v["value"]),
+                        "code": v.get("custom_type", ""),
+                    }
+                )
+                inputs[k] = {"need_render": True, "value": cv_key}
+            else:
+                inputs[k] = {"need_render": v["type"] == "splice", "value": deepcopy(v["value"])}
+            # inject need_render from node_inputs[item].need_render
+            if not v.get("need_render", True):
+                inputs[k]["need_render"] = False
+        return inputs, context_values
+
+    @staticmethod
+    def _gen_node_detail(node: dict, node_type: str, targets: dict, root_id: str, parent_id: str, **detail) -> dict:
+        detail.setdefault("can_skip", False)
+        detail.setdefault("can_retry", True)
+        detail.update(
+            id=node["id"],
+            type=node_type,
+            targets=targets,
+            root_pipeline_id=root_id,
+            parent_pipeline_id=parent_id,
+        )
+        return detail
+
+    def _gen_gateway_node_detail(self, gateway: dict, pipeline: dict, root_id: str, parent_id: str) -> dict:
+        flows = pipeline["flows"]
+        if gateway["type"] == NodeType.ConvergeGateway.value:
+            return self._gen_node_detail(
+                gateway,
+                gateway["type"],
+                {gateway["outgoing"]: flows[gateway["outgoing"]]["target"]},
+                root_id,
+                parent_id,
+            )
+
+        detail = self._gen_node_detail(
+            gateway,
+            gateway["type"],
+            {flow_id: flows[flow_id]["target"] for flow_id in gateway["outgoing"]},
+            root_id,
+            parent_id,
+        )
+
+        if gateway["type"] in (NodeType.ExclusiveGateway.value, NodeType.ConditionalParallelGateway.value):
+            detail["can_skip"] = gateway["type"] == NodeType.ExclusiveGateway.value
+            detail["conditions"] = [
+                {
+                    "name": flow_id,
+                    "evaluation": cond["evaluate"],
+                    "target_id": flows[flow_id]["target"],
+                    "flow_id": flow_id,
+                }
+                for flow_id, cond in gateway["conditions"].items()
+            ]
+            default_condition = gateway.get("default_condition", {})
+            detail["default_condition"] = (
+                {
+                    "name": default_condition["flow_id"],
+                    "target_id": flows[default_condition["flow_id"]]["target"],
+                    "flow_id": default_condition["flow_id"],
+                }
+                if default_condition
+                else None
+            )
+            if gateway.get("extra_info"):
+                detail["extra_info"] = gateway["extra_info"]
+
+        if gateway["type"] in (NodeType.ParallelGateway.value, NodeType.ConditionalParallelGateway.value):
+            detail["converge_gateway_id"] = gateway["converge_gateway_id"]
+        elif gateway["type"] != NodeType.ExclusiveGateway.value:
+            raise ValueError("unsupport gateway type {}: {}".format(gateway["type"], gateway))
+
+        return detail
+
+    def _prepare(self, pipeline: dict, root_id: str, subprocess_context: dict, parent_id: Optional[str] = None):
+        parent_id = parent_id or root_id
+        flows = pipeline["flows"]
+
+        context_values = []
+        node_outputs = {}
+        context_var_references = {}
+        final_references = {}
+        node_references = {}
+
+        # collect all node outputs and initial reference
+        for key, input_data in pipeline["data"]["inputs"].items():
+            source_act = input_data.get("source_act")
+            source_key = input_data.get("source_key")
+            cv = {
+                "pipeline_id": pipeline["id"],
+                "key": key,
+                "type": VAR_CONTEXT_MAPPING[input_data["type"]].value,
+                "value": deepcopy(input_data["value"]),
+                "code": input_data.get("custom_type", ""),
+            }
+            if not source_act:
+                context_var_references[key] = Template(input_data["value"]).get_reference()
+                final_references[key] = set()
+                context_values.append(cv)
+            else:
+                if isinstance(source_act, list):
+                    for sa in source_act:
+                        node_outputs.setdefault(sa["source_act"], {})[sa["source_key"]] = key
+                else:
+                    node_outputs.setdefault(source_act, {})[source_key] = key
+
+            if input_data.get("need_initialization") is True:
+                context_values.append(dict(cv))
+
+        # pre_render_keys in start_event
+        if pipeline["data"].get("pre_render_keys"):
+            self._data[pipeline["start_event"]["id"]] = {
+                "inputs": {"pre_render_keys": {"need_render": False, "value": pipeline["data"]["pre_render_keys"]}},
+                "outputs": {},
+            }
+
+        # process activities
+        for act in pipeline["activities"].values():
+            targets = {act["outgoing"]: flows[act["outgoing"]]["target"]}
+            if act["type"] == NodeType.ServiceActivity.value:
+                self._set_node(
+                    self._gen_node_detail(
+                        act,
+                        NodeType.ServiceActivity.value,
+                        targets,
+                        root_id,
+                        parent_id,
+                        can_skip=act["skippable"],
+                        code=act["component"]["code"],
+                        name=act.get("name", ""),
+                        version=act["component"].get("version", "legacy"),
+                        error_ignorable=act["error_ignorable"],
+                        can_retry=act["retryable"],
+                        loop_config=act.get("loop_config", {}),
+                    )
+                )
+                node_inputs = act["component"]["inputs"]
+            elif act["type"] == NodeType.SubProcess.value:
+                self._set_node(
+                    self._gen_node_detail(
+                        act,
+                        NodeType.SubProcess.value,
+                        targets,
+                        root_id,
+                        parent_id,
+                        start_event_id=act["pipeline"]["start_event"]["id"],
+                    )
+                )
+                node_inputs = act["params"]
+            else:
+                raise ValueError("unsupport act type {}: {}".format(act["type"], act["id"]))
+
+            data_inputs, compute_cvs = self._data_inputs_assemble(parent_id, act["id"], node_inputs)
+            self._data[act["id"]] = {"inputs": data_inputs, "outputs": node_outputs.get(act["id"], {})}
+            node_references[act["id"]] = Template(
+                {k: v["value"] for k, v in data_inputs.items() if v["need_render"]}
+            ).get_reference()
+            for cv in compute_cvs:
+                context_values.append(cv)
+                final_references[cv["key"]] = set()
+                context_var_references[cv["key"]] = Template(cv["value"]).get_reference()
+
+            if act["type"] == NodeType.SubProcess.value:
+                # subprocess output
+                self._context_outputs[act["id"]] = list(act["pipeline"]["data"]["outputs"])
+                # subprocess preset context
+                for key, value in subprocess_context.items():
+                    context_values.append(
+                        {
+                            "pipeline_id": act["id"],
+                            "key": key,
+                            "type": ContextValueType.PLAIN.value,
+                            "value": deepcopy(value),
+                            "code": "",
+                        }
+                    )
+                self._prepare(
+                    pipeline=act["pipeline"],
+                    root_id=root_id,
+                    subprocess_context=subprocess_context,
+                    parent_id=act["id"],
+                )
+
+        # process events
+        start_event = pipeline["start_event"]
+        self._set_node(
+            self._gen_node_detail(
+                start_event,
+                start_event["type"],
+                {start_event["outgoing"]: flows[start_event["outgoing"]]["target"]},
+                root_id,
+                parent_id,
+                can_skip=True,
+            )
+        )
+        end_event = pipeline["end_event"]
+        if end_event["type"] == NodeType.EmptyEndEvent.value:
+            self._set_node(self._gen_node_detail(end_event, end_event["type"], {}, root_id, parent_id))
+        else:
+            self._set_node(
+                self._gen_node_detail(
+                    end_event, NodeType.ExecutableEndEvent.value, {}, root_id, parent_id, code=end_event["type"]
+                )
+            )
+
+        # process gateways
+        for gateway in pipeline["gateways"].values():
+            self._set_node(self._gen_gateway_node_detail(gateway, pipeline, root_id, parent_id))
+            if gateway["type"] in (NodeType.ExclusiveGateway.value, NodeType.ConditionalParallelGateway.value):
+                node_references[gateway["id"]] = Template(
+                    [cond["evaluate"] for cond in gateway["conditions"].values()]
+                ).get_reference()
+
+        # convert a:b, b:c,d -> a:b,c,d b:c,d
+        final_references.update(caculate_final_references(context_var_references))
+
+        # 节点输入及分支条件对上下文变量的引用在 prepare 阶段就能确定，提前计算好避免每次执行时重复解析
+        for node_id, direct in node_references.items():
+            node_detail = self._node_details[node_id]
+            node_detail["references"] = caculate_node_references(direct, final_references)
+            self._set_node(node_detail)
+
+        for cv in context_values:
+            self._context_values.setdefault(cv["pipeline_id"], {})[cv["key"]] = {
+                "type": cv["type"],
+                "value": cv["value"],
+                "code": cv["code"],
+                "references": final_references.get(cv["key"], set()) if cv["pipeline_id"] == parent_id else set(),
+            }
+
+        if parent_id == root_id:
+            self._context_outputs[root_id] = list(pipeline["data"]["outputs"])
+
+    def prepare_run_pipeline(
+        self, pipeline: dict, root_pipeline_data: dict, root_pipeline_context: dict, subprocess_context: dict, **options
+    ) -> int:
+        """
+        进行 pipeline 执行前的准备工作，并返回 进程 ID，该函数执行完成后即代表
+        pipeline 是随时可以通过 execute(process_id, start_event_id) 启动执行的
+
+        :param pipeline: pipeline 描述对象
+        :type pipeline: dict
+        :param root_pipeline_data 根流程数据
+        :type root_pipeline_data: dict
+        :param root_pipeline_context 根流程上下文
+        :type root_pipeline_context: dict
+        :param subprocess_context 子流程预置流程上下文
+        :type subprocess_context: dict
+        :return: 进程 ID
+        :rtype: str
+        """
+        pipeline_id = pipeline["id"]
+
+        self._prepare(pipeline=pipeline, root_id=pipeline_id, subprocess_context=subprocess_context)
+        self._data[pipeline_id] = {
+            "inputs": {k: {"need_render": False, "value": deepcopy(v)} for k, v in root_pipeline_data.items()},
+            "outputs": {},
+        }
+        self.upsert_plain_context_values(
+            pipeline_id,
+            {
+                key: ContextValue(key=key, type=ContextValueType.PLAIN, value=value)
+                for key, value in root_pipeline_context.items()
+            },
+        )
+
+        process_id = self._create_process(
+            root_pipeline_id=pipeline_id,
+            pipeline_stack=[pipeline_id],
+            queue=options.get("queue", ""),
+            priority=options.get("priority", 100),
+        )
+        self.set_state(
+            node_id=pipeline_id,
+            to_state=states.RUNNING,
+            root_id=pipeline_id,
+            parent_id="",
+            set_started_time=True,
+        )
+
+        return process_id
+
+    def node_rerun_limit(self, root_pipeline_id: str, node_id: str) -> int:
+        """
+        返回节点最大重入次数
+
+        :param root_pipeline_id: 根流程 ID
+        :type root_pipeline_id: str
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 节点最大重入次数
+        :rtype: int
+        """
+        return self.rerun_limit
+
+    def interrupt_errors(self) -> Tuple[Exception]:
+        return ()
+
+    def handle_execute_interrupt_event(self, event: ExecuteInterruptEvent):
+        """
+        execute 中断事件出现后的处理钩子
+        """
+
+    def handle_schedule_interrupt_event(self, event: ScheduleInterruptEvent):
+        """
+        schedule 中断事件出现后的处理钩子
+        """
+
+    def get_config(self, name):
+        if name not in RUNTIME_ALLOWED_CONFIG:
+            raise ValueError("unsupported pipeline config, name={}".format(name))
+
+        custom_config_value = self.config.get(name)
+        if custom_config_value:
+            return custom_config_value
+        return getattr(Settings, name)
+
+    def set_pipeline_token(self, pipeline_tree: dict):
+        raise NotImplementedError("rollback is not supported by InMemoryRuntime")
+
+    def set_node_snapshot(
+        self,
+        root_pipeline_id: str,
+        node_id: str,
+        code: str,
+        version: str,
+        context_values: dict,
+        inputs: dict,
+        outputs: dict,
+    ):
+        raise NotImplementedError("rollback is not supported by InMemoryRuntime")
+
+    def start_rollback(self, root_pipeline_id: str, node_id: str):
+        raise NotImplementedError("rollback is not supported by InMemoryRuntime")
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from bamboo_engine.eri import Schedule, ScheduleType
+from bamboo_engine.exceptions import NotFoundError
+
+
+class ScheduleMixin:
+    @staticmethod
+    def _to_schedule(schedule: dict) -> Schedule:
+        return Schedule(
+            id=schedule["id"],
+            type=ScheduleType(schedule["type"]),
+            process_id=schedule["process_id"],
+            node_id=schedule["node_id"],
+            finished=schedule["finished"],
+            expired=schedule["expired"],
+            version=schedule["version"],
+            times=schedule["schedule_times"],
+        )
+
+    def _get_schedule(self, schedule_id: int) -> dict:
+        try:
+            return self._schedules[int(schedule_id)]
+        except KeyError:
+            raise NotFoundError("Schedule with id({}) does not exist".format(schedule_id))
+
+    def set_schedule(self, process_id: int, node_id: str, version: str, schedule_type: ScheduleType) -> Schedule:
+        """
+        设置 schedule 对象
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param version: 执行版本
+        :type version: str
+        :param schedule_type: 调度类型
+        :type schedule_type: ScheduleType
+        :return: 调度对象实例
+        :rtype: Schedule
+        """
+        schedule_id = self._schedule_index.get((node_id, version))
+        if schedule_id is None:
+            schedule_id = next(self._schedule_id_counter)
+            self._schedules[schedule_id] = {
+                "id": schedule_id,
+                "type": schedule_type.value,
+                "process_id": process_id,
+                "node_id": node_id,
+                "finished": False,
+                "expired": False,
+                "scheduling": False,
+                "version": version,
+                "schedule_times": 0,
+            }
+            self._schedule_index[(node_id, version)] = schedule_id
+
+        return self._to_schedule(self._schedules[schedule_id])
+
+    def get_schedule(self, schedule_id: str) -> Schedule:
+        """
+        获取 Schedule 对象
+
+        :param schedule_id: 调度实例 ID
+        :type schedule_id: str
+        :return: Schedule 对象实例
+        :rtype: Schedule
+        """
+        return self._to_schedule(self._get_schedule(schedule_id))
+
+    def get_schedule_with_node_and_version(self, node_id: str, version: str) -> Schedule:
+        """
+        通过节点 ID 和执行版本来获取 Scheudle 对象
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param version: 执行版本
+        :type version: str
+        :return: Schedule 对象
+        :rtype: Schedule
+        """
+        schedule_id = self._schedule_index.get((node_id, version))
+        if schedule_id is None:
+            raise NotFoundError("Schedule with node_id({}) and version({}) does not exist".format(node_id, version))
+        return self._to_schedule(self._schedules[schedule_id])
+
+    def apply_schedule_lock(self, schedule_id: str) -> bool:
+        """
+        获取 Schedule 对象的调度锁，返回是否成功获取锁
+
+        :param schedule_id: 调度实例 ID
+        :type schedule_id: str
+        :return: 是否成功获取锁
+        :rtype: bool
+        """
+        schedule = self._schedules.get(int(schedule_id))
+        if schedule is None or schedule["scheduling"]:
+            return False
+        schedule["scheduling"] = True
+        return True
+
+    def release_schedule_lock(self, schedule_id: int):
+        """
+        释放指定 Schedule 的调度锁
+
+        :param schedule_id: Schedule ID
+        :type schedule_id: int
+        """
+        schedule = self._schedules.get(int(schedule_id))
+        if schedule is not None:
+            schedule["scheduling"] = False
+
+    def expire_schedule(self, schedule_id: int):
+        """
+        将某个 Schedule 对象标记为已过期
+
+        :param schedule_id: 调度实例 ID
+        :type schedule_id: int
+        """
+        schedule = self._schedules.get(int(schedule_id))
+        if schedule is not None:
+            schedule["expired"] = True
+
+    def finish_schedule(self, schedule_id: int):
+        """
+        将某个 Schedule 对象标记为已完成
+
+        :param schedule_id: 调度实例 ID
+        :type schedule_id: int
+        """
+        schedule = self._schedules.get(int(schedule_id))
+        if schedule is not None:
+            schedule["finished"] = True
+
+    def add_schedule_times(self, schedule_id: int):
+        """
+        将某个 Schedule 对象的调度次数 +1
+
+        :param schedule_id: 调度实例 ID
+        :type schedule_id: int
+        """
+        schedule = self._schedules.get(int(schedule_id))
+        if schedule is not None:
+            schedule["schedule_times"] += 1
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bamboo_engine import states
+from bamboo_engine.eri import State
+from bamboo_engine.exceptions import NotFoundError, StateVersionNotMatchError
+from bamboo_engine.utils.string import unique_id
+
+
+class StateMixin:
+    @staticmethod
+    def _to_state(state: dict) -> State:
+        return State(**state)
+
+    def get_state(self, node_id: str) -> State:
+        """
+        获取某个节点的状态对象
+
+        : param node_id: 节点 ID
+        : type node_id: str
+        : return: State 实例
+        : rtype: State
+        """
+        try:
+            return self._to_state(self._states[node_id])
+        except KeyError:
+            raise NotFoundError("State of node({}) does not exist".format(node_id))
+
+    def get_state_or_none(self, node_id: str) -> Optional[State]:
+        """
+        获取某个节点的状态对象，如果不存在则返回 None
+
+        : param node_id: 节点 ID
+        : type node_id: str
+        : return: State 实例
+        : rtype: State
+        """
+        state = self._states.get(node_id)
+        return self._to_state(state) if state is not None else None
+
+    def get_state_by_root(self, root_id: str) -> List[State]:
+        """
+        根据根节点 ID 获取一批节点状态
+
+        :param root_id: 根节点 ID
+        :type root_id: str
+        :return: 节点状态列表
+        :rtype: List[State]
+        """
+        return [self._to_state(s) for s in self._states.values() if s["root_id"] == root_id]
+
+    def get_state_by_parent(self, parent_id: str) -> List[State]:
+        """
+        根据父节点 ID 获取一批节点状态
+
+        :param parent_id: 父节点 ID
+        :type parent_id: str
+        :return: 节点状态列表
+        :rtype: List[State]
+        """
+        return [self._to_state(s) for s in self._states.values() if s["parent_id"] == parent_id]
+
+    def batch_get_state_name(self, node_id_list: List[str]) -> Dict[str, str]:
+        """
+        批量获取一批节点的状态
+
+        :param node_id_list: 节点 ID 列表
+        :type node_id_list: List[str]
+        :return: 节点ID -> 状态名称
+        :rtype: Dict[str, str]
+        """
+        return {node_id: self._states[node_id]["name"] for node_id in node_id_list if node_id in self._states}
+
+    def get_control_epoch(self, root_pipeline_id: str) -> Optional[int]:
+        """
+        获取根流程的控制版本号
+
+        :param root_pipeline_id: 根流程 ID
+        :type root_pipeline_id: str
+        :return: 控制版本号，根流程未被暂停、撤销或继续过时返回 0
+        :rtype: Optional[int]
+        """
+        return self._control_epochs.get(root_pipeline_id, 0)
+
+    def bump_control_epoch(self, pipeline_id: str):
+        """
+        增加流程所属根流程的控制版本号
+
+        :param pipeline_id: 流程 ID，可以是根流程或子流程 ID
+        :type pipeline_id: str
+        """
+        state = self._states.get(pipeline_id)
+        root_pipeline_id = (state and state["root_id"]) or pipeline_id
+        self._control_epochs[root_pipeline_id] = self._control_epochs.get(root_pipeline_id, 0) + 1
+
+    def has_state(self, node_id: str) -> bool:
+        """
+        是否存在某个节点的的状态
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 该节点状态是否存在
+        :rtype: bool
+        """
+        return node_id in self._states
+
+    def reset_state_inner_loop(self, node_id: str) -> int:
+        """
+        设置节点的当前流程重入次数
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :return: 更新状态行数
+        :rtype: int
+        """
+        state = self._states.get(node_id)
+        if state is None:
+            return 0
+        state["inner_loop"] = 0
+        return 1
+
+    def reset_children_state_inner_loop(self, node_id: str) -> int:
+        """
+        批量设置子流程节点的所有子节点inner_loop次数
+
+        :param node_id: 子流程节点 ID
+        :type node_id: str
+        :return: 更新状态行数
+        :rtype: int
+        """
+        rows = 0
+        for state in self._states.values():
+            if state["parent_id"] == node_id:
+                state["inner_loop"] = 0
+                rows += 1
+        return rows
+
+    def set_state_root_and_parent(self, node_id: str, root_id: str, parent_id: str):
+        """
+        设置节点的根流程和父流程 ID
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param root_id: 根流程 ID
+        :type root_id: str
+        :param parent_id: 父流程 ID
+        :type parent_id: str
+        """
+        state = self._states.get(node_id)
+        if state is not None:
+            state.update(root_id=root_id, parent_id=parent_id)
+
+    def set_state(
+        self,
+        node_id: str,
+        to_state: str,
+        version: Optional[str] = None,
+        loop: int = -1,
+        inner_loop: int = -1,
+        root_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        is_retry: bool = False,
+        is_skip: bool = False,
+        reset_retry: bool = False,
+        reset_skip: bool = False,
+        error_ignored: bool = False,
+        reset_error_ignored: bool = False,
+        refresh_version: bool = False,
+        clear_started_time: bool = False,
+        set_started_time: bool = False,
+        clear_archived_time: bool = False,
+        set_archive_time: bool = False,
+        ignore_boring_set: bool = False,
+        send_post_set_state_signal: bool = True,
+    ) -> str:
+        """
+        设置节点的状态，如果节点存在，进行状态转换时需要满足状态转换状态机
+        参数含义与 EngineRuntimeInterface.set_state 一致，内存运行时不发送 post_set_state 信号
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param to_state: 目标状态
+        :type to_state: str
+        :return: 该节点最新版本
+        :rtype: str
+        """
+        state = self._states.get(node_id)
+
+        if state and version and state["version"] != version:
+            raise StateVersionNotMatchError("state version({}) not match {}".format(state["version"], version))
+
+        # 只有在当前状态和版本一致的情况下允许实现幂等
+        if ignore_boring_set and state and version and state["version"] == version and state["name"] == to_state:
+            return state["version"]
+
+        fields = {}
+
+        if loop != -1:
+            fields["loop"] = loop
+
+        if inner_loop != -1:
+            fields["inner_loop"] = inner_loop
+
+        if root_id:
+            fields["root_id"] = root_id
+
+        if parent_id:
+            fields["parent_id"] = parent_id
+
+        if is_retry and state:
+            fields["retry"] = state["retry"] + 1
+
+        if is_skip and state:
+            fields["skip"] = True
+
+        if reset_retry and state:
+            fields["retry"] = 0
+
+        if reset_skip and state:
+            fields["skip"] = False
+
+        if reset_error_ignored and state:
+            fields["error_ignored"] = False
+
+        if error_ignored and state:
+            fields["error_ignored"] = True
+
+        if refresh_version or state is None:
+            fields["version"] = unique_id("v")
+
+        if clear_started_time and state:
+            fields["started_time"] = None
+
+        if set_started_time:
+            fields["started_time"] = datetime.now()
+
+        if clear_archived_time and state:
+            fields["archived_time"] = None
+
+        if set_archive_time:
+            fields["archived_time"] = datetime.now()
+
+        if state:
+            if not states.can_transit(from_state=state["name"], to_state=to_state):
+                raise RuntimeError(
+                    "can't not transit node({}) state from {} to {}".format(node_id, state["name"], to_state)
+                )
+
+            state.update(name=to_state, **fields)
+            return state["version"]
+
+        state = {
+            "node_id": node_id,
+            "root_id": "",
+            "parent_id": "",
+            "name": to_state,
+            "version": "",
+            "loop": 1,
+            "inner_loop": 1,
+            "retry": 0,
+            "skip": False,
+            "error_ignored": False,
+            "created_time": datetime.now(),
+            "started_time": None,
+            "archived_time": None,
+        }
+        state.update(fields)
+        self._states[node_id] = state
+        return state["version"]
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import heapq
+import time
+from typing import Optional
+
+from bamboo_engine import metrics
+from bamboo_engine.engine import Engine
+from bamboo_engine.eri import ExecuteInterruptPoint, ScheduleInterruptPoint
+from bamboo_engine.interrupt import (
+    ExecuteInterrupter,
+    ExecuteKeyPoint,
+    ScheduleInterrupter,
+    ScheduleKeyPoint,
+)
+
+EXECUTE_TASK = "execute"
+SCHEDULE_TASK = "schedule"
+
+
+class TaskMixin:
+    def _send_task(self, name: str, countdown: float = 0, **kwargs):
+        metrics.record_broker_publish()
+        eta = time.time() + countdown if countdown > 0 else 0
+        heapq.heappush(self._tasks, (eta, next(self._task_seq), name, kwargs))
+
+    def execute(
+        self,
+        process_id: int,
+        node_id: str,
+        root_pipeline_id: str,
+        parent_pipeline_id: str,
+        recover_point: Optional[ExecuteInterruptPoint] = None,
+        headers: Optional[dict] = None,
+    ):
+        """
+        派发执行任务，任务会被放入进程内的任务队列，在 run_tasks 中被执行
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        """
+        self._send_task(
+            EXECUTE_TASK,
+            process_id=process_id,
+            node_id=node_id,
+            root_pipeline_id=root_pipeline_id,
+            parent_pipeline_id=parent_pipeline_id,
+            recover_point=recover_point,
+            headers=headers or {},
+        )
+
+    def schedule(
+        self,
+        process_id: int,
+        node_id: str,
+        schedule_id: str,
+        callback_data_id: Optional[int] = None,
+        recover_point: Optional[ScheduleInterruptPoint] = None,
+        headers: Optional[dict] = None,
+    ):
+        """
+        派发调度任务，任务会被放入进程内的任务队列，在 run_tasks 中被执行
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param schedule_id: 调度 ID
+        :type schedule_id: str
+        """
+        self._send_task(
+            SCHEDULE_TASK,
+            process_id=process_id,
+            node_id=node_id,
+            schedule_id=schedule_id,
+            callback_data_id=callback_data_id,
+            recover_point=recover_point,
+            headers=headers or {},
+        )
+
+    def set_next_schedule(
+        self,
+        process_id: int,
+        node_id: str,
+        schedule_id: str,
+        schedule_after: int,
+        callback_data_id: Optional[int] = None,
+        headers: Optional[dict] = None,
+    ):
+        """
+        设置下次调度时间，runtime 的 schedule_delay 为 False 时会忽略调度倒数立即调度
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param schedule_id: 调度 ID
+        :type schedule_id: str
+        :param schedule_after: 调度倒数
+        :type schedule_after: int
+        """
+        self._send_task(
+            SCHEDULE_TASK,
+            countdown=schedule_after if self.schedule_delay else 0,
+            process_id=process_id,
+            node_id=node_id,
+            schedule_id=schedule_id,
+            callback_data_id=callback_data_id,
+            recover_point=None,
+            headers=headers or {},
+        )
+
+    def pending_tasks(self) -> int:
+        """
+        返回任务队列中尚未执行的任务数
+
+        :return: 任务数
+        :rtype: int
+        """
+        return len(self._tasks)
+
+    def run_tasks(self, max_tasks: Optional[int] = None) -> int:
+        """
+        在当前线程中依次执行任务队列中的任务，直到队列为空或执行了 max_tasks 个任务，
+        未到调度时间的任务会阻塞等待
+
+        :param max_tasks: 最多执行的任务数，为 None 时表示不限制
+        :type max_tasks: Optional[int]
+        :return: 执行的任务数
+        :rtype: int
+        """
+        engine = Engine(self)
+        executed = 0
+        while self._tasks and (max_tasks is None or executed < max_tasks):
+            eta, _, name, kwargs = heapq.heappop(self._tasks)
+            wait = eta - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+            if name == EXECUTE_TASK:
+                interrupter = ExecuteInterrupter(
+                    runtime=self,
+                    current_node_id=kwargs["node_id"],
+                    process_id=kwargs["process_id"],
+                    parent_pipeline_id=kwargs["parent_pipeline_id"],
+                    root_pipeline_id=kwargs["root_pipeline_id"],
+                    check_point=ExecuteInterruptPoint(name=ExecuteKeyPoint.ENTRY),
+                    recover_point=kwargs["recover_point"],
+                    headers=kwargs["headers"],
+                )
+                engine.execute(
+                    process_id=kwargs["process_id"],
+                    node_id=kwargs["node_id"],
+                    root_pipeline_id=kwargs["root_pipeline_id"],
+                    parent_pipeline_id=kwargs["parent_pipeline_id"],
+                    interrupter=interrupter,
+                    headers=kwargs["headers"],
+                )
+            else:
+                interrupter = ScheduleInterrupter(
+                    runtime=self,
+                    process_id=kwargs["process_id"],
+                    current_node_id=kwargs["node_id"],
+                    schedule_id=kwargs["schedule_id"],
+                    callback_data_id=kwargs["callback_data_id"],
+                    check_point=ScheduleInterruptPoint(name=ScheduleKeyPoint.ENTRY),
+                    recover_point=kwargs["recover_point"],
+                    headers=kwargs["headers"],
+                )
+                engine.schedule(
+                    process_id=kwargs["process_id"],
+                    node_id=kwargs["node_id"],
+                    schedule_id=kwargs["schedule_id"],
+                    interrupter=interrupter,
+                    callback_data_id=kwargs["callback_data_id"],
+                    headers=kwargs["headers"],
+                )
+            executed += 1
+
+        return executed
@@ -12,7 +12,7 @@ specific language governing permissions and limitations under the License.
 """
 
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 from bamboo_engine.utils.object import Representable
 
@@ -62,6 +62,22 @@ class LoopControlConfig(Representable):
         return self.loop_times is not None and inner_loop < self.loop_times
 
 
+class NodeReferences(Representable):
+    """
+    prepare 阶段计算好的节点输入或网关分支条件对流程上下文变量的引用
+    """
+
+    def __init__(self, direct: Set[str], closure: Set[str]):
+        """
+        :param direct: 直接引用的变量键
+        :type direct: Set[str]
+        :param closure: 直接及间接引用的所有变量键
+        :type closure: Set[str]
+        """
+        self.direct = direct
+        self.closure = closure
+
+
 class Node(Representable):
     """
     节点信息描述类
@@ -81,6 +97,7 @@ class Node(Representable):
         name: str = None,
         reserve_rollback: bool = False,
         loop_config: Optional[LoopControlConfig] = None,
+        references: Optional[NodeReferences] = None,
     ):
         """
         :param id: 节点 ID
@@ -103,6 +120,8 @@ class Node(Representable):
         :type can_retry: bool
         :param loop_config: 循环控制配置（不开启循环时为 ``None``）
         :type loop_config: Optional[LoopControlConfig]
+        :param references: prepare 阶段计算好的变量引用，为 ``None`` 时需要在执行时解析
+        :type references: Optional[NodeReferences]
         """
         self.id = id
         self.type = type
@@ -116,6 +135,7 @@ class Node(Representable):
         self.name = name
         self.reserve_rollback = reserve_rollback
         self.loop_config = loop_config
+        self.references = references
 
     @property
     def loop_enabled(self) -> bool:
@@ -22,6 +22,8 @@ from bamboo_engine.utils.object import Representable
 from bamboo_engine.utils.collections import FancyDict
 from bamboo_engine.exceptions import ValueError
 
+from .node import Node
+
 
 class ScheduleType(Enum):
     """
@@ -209,6 +211,31 @@ class ExecutionData(Representable):
         self.outputs = FancyDict(outputs)
 
 
+class NodeBundle(Representable):
+    """
+    节点推进时需要的节点详情、状态及节点数据的集合
+    """
+
+    def __init__(
+        self,
+        node: Node,
+        state: Optional[State],
+        data: Optional[Data] = None,
+    ):
+        """
+
+        :param node: 节点实例
+        :type node: Node
+        :param state: 节点状态，节点未执行过时为 None
+        :type state: Optional[State]
+        :param data: 节点数据，为 None 时表示未获取或不存在
+        :type data: Optional[Data]
+        """
+        self.node = node
+        self.state = state
+        self.data = data
+
+
 class ExecutionHistory(Representable):
     """
     节点执行历史
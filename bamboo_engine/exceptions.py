@@ -64,3 +64,9 @@ class StreamValidateError(TreeInvalidException):
 
 class IsolateNodeError(TreeInvalidException):
     pass
+
+
+class ReferenceCycleError(EngineException):
+    def __init__(self, keys, *args):
+        self.keys = keys
+        super(ReferenceCycleError, self).__init__(*args)
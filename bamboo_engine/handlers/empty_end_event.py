@@ -19,7 +19,6 @@ from bamboo_engine.config import Settings
 from bamboo_engine.context import Context
 from bamboo_engine.eri import ExecuteInterruptPoint, NodeType, ProcessInfo
 from bamboo_engine.handler import ExecuteResult, NodeHandler, register_handler
-from bamboo_engine.template.template import Template
 
 logger = logging.getLogger("bamboo_engine")
 
@@ -64,7 +63,10 @@ class EmptyEndEventHandler(NodeHandler):
                 context_outputs,
             )
 
-            context_values = self.runtime.get_context_values(pipeline_id=pipeline_id, keys=context_outputs)
+            # 同时获取输出变量直接或间接引用的其他变量
+            context_values = self.runtime.get_context_values_with_references(
+                pipeline_id=pipeline_id, keys=context_outputs
+            )
             logger.info(
                 "root_pipeline[%s] pipeline(%s) context values: %s",
                 root_pipeline_id,
@@ -72,25 +74,6 @@ class EmptyEndEventHandler(NodeHandler):
                 context_values,
             )
 
-            # caculate outputs values references
-            output_value_refs = set(Template([cv.value for cv in context_values]).get_reference())
-            logger.info(
-                "root_pipeline[%s] node(%s) outputs values refs: %s",
-                root_pipeline_id,
-                self.node.id,
-                output_value_refs,
-            )
-
-            additional_refs = self.runtime.get_context_key_references(pipeline_id=pipeline_id, keys=output_value_refs)
-            output_value_refs = output_value_refs.union(additional_refs)
-            logger.info(
-                "root_pipeline[%s] pipeline(%s) outputs values final refs: %s",
-                root_pipeline_id,
-                pipeline_id,
-                output_value_refs,
-            )
-            context_values.extend(self.runtime.get_context_values(pipeline_id=pipeline_id, keys=output_value_refs))
-
             context = Context(self.runtime, context_values, root_pipeline_inputs)
             try:
                 hydrated_context = context.hydrate(deformat=False)
@@ -56,28 +56,33 @@ class ExclusiveGatewayHandler(NodeHandler):
 
             root_pipeline_inputs = self._get_plain_inputs(process_info.root_pipeline_id)
 
-            # resolve conditions references
-            evaluation_refs = set()
-            for e in evaluations:
-                refs = Template(e).get_reference()
-                evaluation_refs = evaluation_refs.union(refs)
-
-            logger.info(
-                "root_pipeline[%s] node(%s) evaluation original refs: %s",
-                root_pipeline_id,
-                self.node.id,
-                evaluation_refs,
-            )
-            additional_refs = self.runtime.get_context_key_references(pipeline_id=top_pipeline_id, keys=evaluation_refs)
-            evaluation_refs = evaluation_refs.union(additional_refs)
+            # resolve conditions references and prepare context
+            if self.node.references is not None:
+                # prepare 阶段已经计算好了分支条件直接和间接引用的变量
+                evaluation_refs = self.node.references.closure
+                logger.info(
+                    "root_pipeline[%s] node(%s) evaluation final refs: %s",
+                    root_pipeline_id,
+                    self.node.id,
+                    evaluation_refs,
+                )
+                context_values = self.runtime.get_context_values(pipeline_id=top_pipeline_id, keys=evaluation_refs)
+            else:
+                evaluation_refs = set()
+                for e in evaluations:
+                    refs = Template(e).get_reference()
+                    evaluation_refs = evaluation_refs.union(refs)
 
-            logger.info(
-                "root_pipeline[%s] node(%s) evaluation final refs: %s",
-                root_pipeline_id,
-                self.node.id,
-                evaluation_refs,
-            )
-            context_values = self.runtime.get_context_values(pipeline_id=top_pipeline_id, keys=evaluation_refs)
+                logger.info(
+                    "root_pipeline[%s] node(%s) evaluation original refs: %s",
+                    root_pipeline_id,
+                    self.node.id,
+                    evaluation_refs,
+                )
+                # 同时获取直接或间接引用的其他变量
+                context_values = self.runtime.get_context_values_with_references(
+                    pipeline_id=top_pipeline_id, keys=evaluation_refs
+                )
             logger.info(
                 "root_pipeline[%s] node(%s) evaluation context values: %s",
                 root_pipeline_id,
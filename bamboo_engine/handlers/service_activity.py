@@ -88,31 +88,31 @@ class ServiceActivityHandler(NodeHandler):
             root_pipeline_inputs,
         )
 
-        # resolve inputs context references
-        inputs_refs: Set[str] = set(Template(need_render_inputs).get_reference())
-        logger.info(
-            "root_pipeline[%s] node(%s) activity original refs: %s",
-            root_pipeline_id,
-            self.node.id,
-            inputs_refs,
-        )
-
-        # 获取直接或间接引用其他变量的键
-        additional_refs: Set[str] = self.runtime.get_context_key_references(
-            pipeline_id=top_pipeline_id, keys=inputs_refs
-        )
-        inputs_refs = inputs_refs.union(additional_refs)
-        logger.info(
-            "root_pipeline[%s] node(%s) activity final refs: %s",
-            root_pipeline_id,
-            self.node.id,
-            inputs_refs,
-        )
-
-        # prepare context
-        context_values: List[ContextValue] = self.runtime.get_context_values(
-            pipeline_id=top_pipeline_id, keys=inputs_refs
-        )
+        # resolve inputs context references and prepare context
+        if self.node.references is not None:
+            # prepare 阶段已经计算好了输入直接和间接引用的变量
+            inputs_refs: Set[str] = self.node.references.closure
+            logger.info(
+                "root_pipeline[%s] node(%s) activity final refs: %s",
+                root_pipeline_id,
+                self.node.id,
+                inputs_refs,
+            )
+            context_values: List[ContextValue] = self.runtime.get_context_values(
+                pipeline_id=top_pipeline_id, keys=inputs_refs
+            )
+        else:
+            inputs_refs = set(Template(need_render_inputs).get_reference())
+            logger.info(
+                "root_pipeline[%s] node(%s) activity original refs: %s",
+                root_pipeline_id,
+                self.node.id,
+                inputs_refs,
+            )
+            # 同时获取直接或间接引用的其他变量
+            context_values = self.runtime.get_context_values_with_references(
+                pipeline_id=top_pipeline_id, keys=inputs_refs
+            )
 
         # pre extract loop outputs
         loop_value = loop + Settings.RERUN_INDEX_OFFSET
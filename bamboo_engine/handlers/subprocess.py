@@ -66,26 +66,29 @@ class SubProcessHandler(NodeHandler):
             # reset inner_loop of nodes in subprocess
             self.runtime.reset_children_state_inner_loop(self.node.id)
 
-            # resolve inputs context references
-            inputs_refs = Template(need_render_inputs).get_reference()
-            logger.info(
-                "root_pipeline[%s] node(%s) subprocess original refs: %s",
-                root_pipeline_id,
-                self.node.id,
-                inputs_refs,
-            )
-
-            additional_refs = self.runtime.get_context_key_references(pipeline_id=top_pipeline_id, keys=inputs_refs)
-            inputs_refs = inputs_refs.union(additional_refs)
-            logger.info(
-                "root_pipeline[%s] node(%s) subprocess final refs: %s",
-                root_pipeline_id,
-                self.node.id,
-                inputs_refs,
-            )
-
-            # prepare context
-            context_values = self.runtime.get_context_values(pipeline_id=top_pipeline_id, keys=inputs_refs)
+            # resolve inputs context references and prepare context
+            if self.node.references is not None:
+                # prepare 阶段已经计算好了输入直接和间接引用的变量
+                inputs_refs = self.node.references.closure
+                logger.info(
+                    "root_pipeline[%s] node(%s) subprocess final refs: %s",
+                    root_pipeline_id,
+                    self.node.id,
+                    inputs_refs,
+                )
+                context_values = self.runtime.get_context_values(pipeline_id=top_pipeline_id, keys=inputs_refs)
+            else:
+                inputs_refs = Template(need_render_inputs).get_reference()
+                logger.info(
+                    "root_pipeline[%s] node(%s) subprocess original refs: %s",
+                    root_pipeline_id,
+                    self.node.id,
+                    inputs_refs,
+                )
+                # 同时获取直接或间接引用的其他变量
+                context_values = self.runtime.get_context_values_with_references(
+                    pipeline_id=top_pipeline_id, keys=inputs_refs
+                )
 
             # pre extract loop outputs
             loop_value = loop + Settings.RERUN_INDEX_OFFSET
@@ -12,6 +12,7 @@ specific language governing permissions and limitations under the License.
 """
 
 import os
+import threading
 import time
 from functools import wraps
 from contextlib import contextmanager
@@ -27,9 +28,11 @@ def decode_buckets(buckets_list):
     return [float(x) for x in buckets_list.split(",")]
 
 
-def get_histogram_buckets_from_env(env_name):
+def get_histogram_buckets_from_env(env_name, default=None):
     if env_name in os.environ:
         buckets = decode_buckets(os.environ.get(env_name))
+    elif default is not None:
+        buckets = default
     else:
         buckets = (
             0.005,
@@ -95,6 +98,62 @@ def observe(histogram, **labels):
     histogram.labels(**labels).observe(time.perf_counter() - start)
 
 
+ROUND_TRIP_BUCKETS = (0, 1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200, 500, float("inf"))
+COMPRESS_RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, float("inf"))
+
+
+class RoundTripCounter(threading.local):
+    """
+    记录当前线程中产生的数据库查询及消息队列投递次数，由运行时在查询及投递时累加
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.broker_publishes = 0
+
+
+ROUND_TRIPS = RoundTripCounter()
+
+
+def record_db_query(count: int = 1):
+    ROUND_TRIPS.db_queries += count
+
+
+def record_broker_publish(count: int = 1):
+    ROUND_TRIPS.broker_publishes += count
+
+
+class RoundTripObservation:
+    def __init__(self):
+        self.db_queries = ROUND_TRIPS.db_queries
+        self.broker_publishes = ROUND_TRIPS.broker_publishes
+        self.label_values = None
+
+    def labels(self, **labels):
+        self.label_values = labels
+
+
+@contextmanager
+def observe_round_trips(db_queries_histogram, broker_publishes_histogram):
+    """
+    统计 with 块中产生的数据库查询及消息队列投递次数，只有在块中调用了 labels 设置标签时才会记录
+
+    :param db_queries_histogram: 数据库查询次数直方图
+    :param broker_publishes_histogram: 消息队列投递次数直方图
+    """
+    observation = RoundTripObservation()
+    try:
+        yield observation
+    finally:
+        if observation.label_values is not None:
+            db_queries_histogram.labels(**observation.label_values).observe(
+                ROUND_TRIPS.db_queries - observation.db_queries
+            )
+            broker_publishes_histogram.labels(**observation.label_values).observe(
+                ROUND_TRIPS.broker_publishes - observation.broker_publishes
+            )
+
+
 # engine metrics
 ENGINE_RUNNING_PROCESSES = Gauge(
     name="engine_running_processes", documentation="count running state processes", labelnames=["hostname"]
@@ -154,6 +213,30 @@ ENGINE_NODE_SCHEDULE_TIME = Histogram(
     buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_METRICS_BUCKETS"),
     labelnames=["type", "hostname"],
 )
+ENGINE_NODE_EXECUTE_DB_QUERIES = Histogram(
+    name="engine_node_execute_db_queries",
+    documentation="db queries of executing node",
+    buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_ROUND_TRIP_METRICS_BUCKETS", ROUND_TRIP_BUCKETS),
+    labelnames=["type", "hostname"],
+)
+ENGINE_NODE_EXECUTE_BROKER_PUBLISHES = Histogram(
+    name="engine_node_execute_broker_publishes",
+    documentation="broker publishes of executing node",
+    buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_ROUND_TRIP_METRICS_BUCKETS", ROUND_TRIP_BUCKETS),
+    labelnames=["type", "hostname"],
+)
+ENGINE_NODE_SCHEDULE_DB_QUERIES = Histogram(
+    name="engine_node_schedule_db_queries",
+    documentation="db queries of scheduling node",
+    buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_ROUND_TRIP_METRICS_BUCKETS", ROUND_TRIP_BUCKETS),
+    labelnames=["type", "hostname"],
+)
+ENGINE_NODE_SCHEDULE_BROKER_PUBLISHES = Histogram(
+    name="engine_node_schedule_broker_publishes",
+    documentation="broker publishes of scheduling node",
+    buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_ROUND_TRIP_METRICS_BUCKETS", ROUND_TRIP_BUCKETS),
+    labelnames=["type", "hostname"],
+)
 ENGINE_EXECUTE_PRE_PROCESS_DURATION = Histogram(
     name="engine_execute_pre_process_duration",
     documentation="time spent node execute pre-processing",
@@ -284,6 +367,24 @@ ENGINE_RUNTIME_CALLBACK_DATA_READ_TIME = Histogram(
     buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_METRICS_BUCKETS"),
     labelnames=["hostname"],
 )
+ENGINE_RUNTIME_DATA_COMPRESS_TIME = Histogram(
+    name="engine_runtime_data_compress_time",
+    documentation="time spent compressing serialized data",
+    buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_METRICS_BUCKETS"),
+    labelnames=["hostname", "compressor"],
+)
+ENGINE_RUNTIME_DATA_DECOMPRESS_TIME = Histogram(
+    name="engine_runtime_data_decompress_time",
+    documentation="time spent decompressing serialized data",
+    buckets=get_histogram_buckets_from_env("BAMBOO_ENGINE_METRICS_BUCKETS"),
+    labelnames=["hostname", "compressor"],
+)
+ENGINE_RUNTIME_DATA_COMPRESS_RATIO = Histogram(
+    name="engine_runtime_data_compress_ratio",
+    documentation="ratio of compressed data size to serialized data size",
+    buckets=COMPRESS_RATIO_BUCKETS,
+    labelnames=["hostname", "compressor"],
+)
 ENGINE_RUNTIME_SCHEDULE_READ_TIME = Histogram(
     name="engine_runtime_schedule_read_time",
     documentation="time spent reading schedule",
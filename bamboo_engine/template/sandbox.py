@@ -45,10 +45,25 @@ def _import_modules(sandbox: dict, modules: Dict[str, str]):
             sandbox[sub_paths[0]] = ModuleObject(sub_paths[1:], mod)
 
 
-def get() -> dict:
-    sandbox = {}
+_sandbox = None
+_sandbox_settings = None
 
-    _shield_words(sandbox, Settings.MAKO_SANDBOX_SHIELD_WORDS)
-    _import_modules(sandbox, Settings.MAKO_SANDBOX_IMPORT_MODULES)
 
-    return sandbox
+def get() -> dict:
+    """
+    获取模板渲染沙箱，只在 Settings 中的屏蔽词或导入模块配置发生变化后重新构建
+    返回的沙箱在进程内共享，调用方不能对其进行修改
+    """
+    global _sandbox, _sandbox_settings
+
+    sandbox_settings = (
+        tuple(Settings.MAKO_SANDBOX_SHIELD_WORDS),
+        tuple(Settings.MAKO_SANDBOX_IMPORT_MODULES.items()),
+    )
+    if _sandbox is None or sandbox_settings != _sandbox_settings:
+        sandbox = {}
+        _shield_words(sandbox, Settings.MAKO_SANDBOX_SHIELD_WORDS)
+        _import_modules(sandbox, Settings.MAKO_SANDBOX_IMPORT_MODULES)
+        _sandbox, _sandbox_settings = sandbox, sandbox_settings
+
+    return _sandbox
@@ -13,11 +13,14 @@ specific language governing permissions and limitations under the License.
 
 # 封装模板处理，渲染逻辑的相关模块
 
+import ast
 import copy
+import keyword
 import re
 import logging
+from collections import ChainMap
 
-from typing import Any, List, Set
+from typing import Any, Callable, List, Set
 
 from mako.template import Template as MakoTemplate
 from mako import lexer, codegen
@@ -27,6 +30,7 @@ from bamboo_engine.config import Settings
 from bamboo_engine.utils.mako_utils.checker import check_mako_template_safety
 from bamboo_engine.utils.mako_utils.exceptions import ForbiddenMakoTemplateException
 from bamboo_engine.utils import mako_safety
+from bamboo_engine.utils.collections import LRUCache
 from bamboo_engine.utils.string import deformat_var_key
 
 from . import sandbox
@@ -37,6 +41,53 @@ logger = logging.getLogger("root")
 TEMPLATE_PATTERN = re.compile(r"\${[^${}#]+}")
 NESTED_INDEX_STR_PATTERN = r'^(\w+)(?:\[(?:"\w+"|\'\w+\'|\d+)\])+$'
 INDEX_STR_PATTERN = r'\[("\w+"|\'\w+\'|\d+)\]'
+# ${a} 或 ${a.b.c} 形式的模板片段只引用了根标识符，不需要经过 Mako 解析（context 为 Mako 保留字）
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_]\w*")
+SIMPLE_REFERENCE_PATTERN = re.compile(r"^\${\s*([A-Za-z_]\w*)(?:\s*\.\s*[A-Za-z_]\w*)*\s*}$")
+# 通过 Mako 的 context/pageargs 对象可以动态访问任意变量，这类模板片段需要拿到完整的渲染上下文
+DYNAMIC_CONTEXT_PATTERN = re.compile(r"\b(?:context|pageargs)\b")
+
+# 模板片段编译结果及安全检查结论缓存，只与模板文本（及白名单）有关，可以在进程内共享
+COMPILED_TEMPLATE_CACHE = "compiled_template"
+REFERENCE_CACHE = "reference"
+SAFETY_VERDICT_CACHE = "safety_verdict"
+WHITELIST_VERDICT_CACHE = "whitelist_verdict"
+_caches = {}
+# 安全检查通过时缓存的结论，不通过时缓存异常信息
+_SAFE = object()
+
+
+def _get_cache(name: str) -> LRUCache:
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = LRUCache(maxsize=int(getattr(Settings, "MAKO_TEMPLATE_CACHE_SIZE", 0)))
+    return cache
+
+
+def clear_template_caches():
+    """
+    清空进程内的模板编译结果及安全检查结论缓存，修改模板安全相关配置后需要调用
+    """
+    _caches.clear()
+
+
+def _check_safety(template: str, cache_name: str, key: Any, node_visitor_factory: Callable[[], ast.NodeVisitor]):
+    """
+    检查模板片段的安全性并缓存结论，不安全时抛出 ForbiddenMakoTemplateException
+    """
+    cache = _get_cache(cache_name)
+    verdict = cache.get(key)
+    if verdict is None:
+        try:
+            check_mako_template_safety(template, node_visitor_factory(), mako_safety.SingleLinCodeExtractor())
+        except ForbiddenMakoTemplateException as e:
+            verdict = str(e)
+        else:
+            verdict = _SAFE
+        cache.set(key, verdict)
+
+    if verdict is not _SAFE:
+        raise ForbiddenMakoTemplateException(verdict)
 
 
 class Template:
@@ -68,50 +119,78 @@ class Template:
         :return: 模板片段列表
         :rtype: List[str]
         """
-        templates = []
-        data = self.data
-        if isinstance(data, str):
-            templates += self._get_string_templates(data)
-        if isinstance(data, (list, tuple)):
-            for item in data:
-                templates += Template(item).get_templates()
-        if isinstance(data, dict):
-            for value in list(data.values()):
-                templates += Template(value).get_templates()
-        return list(set(templates))
+        templates = set()
+        stack = [self.data]
+        while stack:
+            data = stack.pop()
+            if isinstance(data, str):
+                templates.update(self._get_string_templates(data))
+            elif isinstance(data, (list, tuple)):
+                stack.extend(data)
+            elif isinstance(data, dict):
+                stack.extend(data.values())
+        return list(templates)
 
     def render(self, context: dict) -> Any:
         """
-        渲染当前模板
+        渲染当前模板，只复制包含被渲染字符串的容器，未发生变化的子结构与原数据共享
 
         :param context: 模板渲染上下文
         :type context: dict
         :return: 模板渲染后的数据
         :rtype: Any
         """
-        data = self.data
+        return self._render_data(self.data, context)
+
+    def _render_data(self, data: Any, context: dict) -> Any:
         if isinstance(data, str):
             return self._render_string(data, context)
-        if isinstance(data, list):
-            ldata = [""] * len(data)
-            for index, item in enumerate(data):
-                ldata[index] = Template(copy.deepcopy(item)).render(context)
-            return ldata
-        if isinstance(data, tuple):
-            ldata = [""] * len(data)
+        if isinstance(data, (list, tuple)):
+            rendered = None
             for index, item in enumerate(data):
-                ldata[index] = Template(copy.deepcopy(item)).render(context)
-            return tuple(ldata)
+                value = self._render_data(item, context)
+                if value is not item:
+                    if rendered is None:
+                        rendered = list(data)
+                    rendered[index] = value
+            if rendered is None:
+                return data
+            return tuple(rendered) if isinstance(data, tuple) else rendered
         if isinstance(data, dict):
-            for key, value in list(data.items()):
-                data[key] = Template(copy.deepcopy(value)).render(context)
-            return data
+            rendered = None
+            for key, item in data.items():
+                value = self._render_data(item, context)
+                if value is not item:
+                    if rendered is None:
+                        rendered = copy.copy(data)
+                    rendered[key] = value
+            return data if rendered is None else rendered
         return data
 
     def _get_string_templates(self, string) -> List[str]:
+        if "${" not in string:
+            return []
         return list(set(TEMPLATE_PATTERN.findall(string)))
 
-    def _get_template_reference(self, template: str) -> List[str]:
+    @staticmethod
+    def _get_template_reference(template: str) -> List[str]:
+        match = SIMPLE_REFERENCE_PATTERN.match(template)
+        if (
+            match
+            and match.group(1) != "context"
+            and not any(map(keyword.iskeyword, IDENTIFIER_PATTERN.findall(template)))
+        ):
+            return [match.group(1)]
+
+        cache = _get_cache(REFERENCE_CACHE)
+        reference = cache.get(template)
+        if reference is None:
+            reference = tuple(Template._parse_template_reference(template))
+            cache.set(template, reference)
+        return list(reference)
+
+    @staticmethod
+    def _parse_template_reference(template: str) -> List[str]:
         lex = lexer.Lexer(template)
 
         try:
@@ -162,13 +241,11 @@ class Template:
                     logger.exception("render obj from nested mako string failed: {}".format(e))
                     pass
 
+        whitelist_mode = getattr(Settings, "MAKO_TEMPLATE_NAME_WHITELIST_MODE", "off")
+        allowed_names = None
         for tpl in templates:
             try:
-                check_mako_template_safety(
-                    tpl,
-                    mako_safety.SingleLineNodeVisitor(),
-                    mako_safety.SingleLinCodeExtractor(),
-                )
+                _check_safety(tpl, SAFETY_VERDICT_CACHE, tpl, mako_safety.SingleLineNodeVisitor)
             except ForbiddenMakoTemplateException as e:
                 logger.warning("forbidden template: {}, exception: {}".format(tpl, e))
                 continue
@@ -178,15 +255,24 @@ class Template:
             # 根标识符白名单（``MAKO_TEMPLATE_NAME_WHITELIST_MODE``）。off 模式下保持
             # 历史行为；warn 模式只打日志；enforce 模式命中即按 SingleLineNodeVisitor
             # 风格 inert 掉这一段模板（``logger.warning + continue``）。
-            whitelist_mode = getattr(Settings, "MAKO_TEMPLATE_NAME_WHITELIST_MODE", "off")
+            # enforce 模式的结论按模板及白名单缓存，warn 模式每次都需要检查以输出违规日志
             if whitelist_mode in ("warn", "enforce"):
-                allowed_names = mako_safety.build_allowed_names(context)
+                if allowed_names is None:
+                    allowed_names = frozenset(mako_safety.build_allowed_names(context))
                 try:
-                    check_mako_template_safety(
-                        tpl,
-                        mako_safety.WhitelistNameVisitor(allowed_names, mode=whitelist_mode),
-                        mako_safety.SingleLinCodeExtractor(),
-                    )
+                    if whitelist_mode == "enforce":
+                        _check_safety(
+                            tpl,
+                            WHITELIST_VERDICT_CACHE,
+                            (tpl, allowed_names),
+                            lambda: mako_safety.WhitelistNameVisitor(allowed_names, mode=whitelist_mode),
+                        )
+                    else:
+                        check_mako_template_safety(
+                            tpl,
+                            mako_safety.WhitelistNameVisitor(allowed_names, mode=whitelist_mode),
+                            mako_safety.SingleLinCodeExtractor(),
+                        )
                 except ForbiddenMakoTemplateException as e:
                     logger.warning("forbidden by whitelist: {}, exception: {}".format(tpl, e))
                     continue
@@ -225,15 +311,27 @@ class Template:
         :return: [description]
         :rtype: str
         """
-        data = {}
-        data.update(sandbox.get())
-        data.update(context)
         if not isinstance(template, str):
             raise TypeError("constant resolve error, template[%s] is not a string" % template)
-        try:
-            tm = MakoTemplate(template)
-        except (MakoException, SyntaxError) as e:
-            logger.error("pipeline resolve template[{}] error[{}]".format(template, e))
+        # Mako 在渲染过程中会多次复制传入的数据，所以只按 上下文 > 沙箱 的优先级挑出模板片段引用到的变量，
+        # 避免每次渲染的开销随上下文中变量的数量增长
+        sandbox_data = sandbox.get()
+        if DYNAMIC_CONTEXT_PATTERN.search(template):
+            data = {**sandbox_data, **context}
+        else:
+            layered = ChainMap(context, sandbox_data)
+            data = {name: layered[name] for name in Template._get_template_reference(template) if name in layered}
+        cache = _get_cache(COMPILED_TEMPLATE_CACHE)
+        tm = cache.get(template)
+        if tm is None:
+            try:
+                tm = MakoTemplate(template)
+            except (MakoException, SyntaxError) as e:
+                # 编译失败时缓存错误信息，避免持有异常栈帧中的渲染上下文
+                tm = str(e)
+            cache.set(template, tm)
+        if isinstance(tm, str):
+            logger.error("pipeline resolve template[{}] error[{}]".format(template, tm))
             return template
         try:
             resolved = tm.render_unicode(**data)
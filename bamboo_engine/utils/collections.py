@@ -14,7 +14,10 @@ specific language governing permissions and limitations under the License.
 # 集合类工具
 
 
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
 
 
 class FancyDict(dict):
@@ -51,3 +54,72 @@ class ConstantDict(dict):
 
     def __setitem__(self, key: str, value: Any):
         raise TypeError("'%s' object does not support item assignment" % self.__class__.__name__)
+
+
+class LRUCache:
+    """
+    线程安全的定长 LRU 缓存，maxsize 小于等于 0 时不缓存任何数据
+
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.set("a", 1)
+    >>> cache.get("a")
+    1
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        :param maxsize: 最大缓存条目数
+        :type maxsize: int
+        :param ttl: 条目有效期（秒），为空时永不过期
+        :type ttl: Optional[float]
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, self._MISSING)
+            if item is self._MISSING:
+                return default
+
+            expire_at, value = item
+            if expire_at is not None and expire_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+
+        expire_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expire_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, self._MISSING)
+            return default if item is self._MISSING else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self._MISSING) is not self._MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -36,10 +36,14 @@ class RuntimeSettings(Enum):
     PIPELINE_EXCLUSIVE_GATEWAY_EXPR_FUNC = "PIPELINE_EXCLUSIVE_GATEWAY_EXPR_FUNC"
     PIPELINE_EXCLUSIVE_GATEWAY_STRATEGY = "PIPELINE_EXCLUSIVE_GATEWAY_STRATEGY"
     PIPELINE_ENABLE_ROLLBACK = "PIPELINE_ENABLE_ROLLBACK"
+    PIPELINE_PROCESS_BEAT_INTERVAL = "PIPELINE_PROCESS_BEAT_INTERVAL"
+    PIPELINE_ENABLE_NODE_TRANSACTION = "PIPELINE_ENABLE_NODE_TRANSACTION"
 
 
 RUNTIME_ALLOWED_CONFIG = [
     RuntimeSettings.PIPELINE_EXCLUSIVE_GATEWAY_EXPR_FUNC.value,
     RuntimeSettings.PIPELINE_EXCLUSIVE_GATEWAY_STRATEGY.value,
     RuntimeSettings.PIPELINE_ENABLE_ROLLBACK.value,
+    RuntimeSettings.PIPELINE_PROCESS_BEAT_INTERVAL.value,
+    RuntimeSettings.PIPELINE_ENABLE_NODE_TRANSACTION.value,
 ]
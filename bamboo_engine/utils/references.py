@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+# 上下文变量及节点引用关系计算工具，内存 runtime 与 Django runtime 共用
+
+from typing import Dict, Set
+
+
+def caculate_final_references(original_references: Dict[str, set]) -> Dict[str, set]:
+    """
+    将变量的引用树展开，将树高减少为两层
+    convert a:b, b:c,d -> a:b,c,d b:c,d
+    """
+    final_references = {k: set() for k in original_references.keys()}
+    # resolve final references (BFS)
+    for key, references in original_references.items():
+        queue = []
+        queue.extend(references)
+
+        while queue:
+            r = queue.pop()
+
+            # processed
+            if r in final_references[key]:
+                continue
+
+            final_references[key].add(r)
+            if r in original_references:
+                queue.extend(original_references[r])
+
+    return final_references
+
+
+def caculate_node_references(direct: Set[str], final_references: Dict[str, set]) -> dict:
+    """
+    根据节点直接引用的变量及流程上下文中变量的最终引用计算节点的引用闭包，返回值保存在节点详情的 references 中
+    """
+    closure = set(direct)
+    for key in direct:
+        closure.update(final_references.get(key, ()))
+    return {"direct": sorted(direct), "closure": sorted(closure)}
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from .runner import DEFAULT_SIZES, compare, format_results, run
+from .runtimes import MEMORY, SQLITE
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.engine_core", description="bamboo_engine engine core micro benchmark"
+    )
+    parser.add_argument(
+        "--runtime", action="append", choices=[MEMORY, SQLITE], help="runtime to benchmark, default: all"
+    )
+    parser.add_argument(
+        "--topology", action="append", choices=sorted(DEFAULT_SIZES), help="topology to benchmark, default: all"
+    )
+    parser.add_argument("--size", type=int, help="override the size of every topology")
+    parser.add_argument("--repeat", type=int, default=5, help="cpu time samples of every scenario")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline json file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="allowed ratio of cpu time and allocation above baseline"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="write results into the baseline file")
+    parser.add_argument("--output", help="write results into a json file")
+    args = parser.parse_args(argv)
+
+    sizes = {
+        topology: args.size or size
+        for topology, size in DEFAULT_SIZES.items()
+        if not args.topology or topology in args.topology
+    }
+    results = run(args.runtime or [MEMORY, SQLITE], sizes, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(format_results(results, baseline))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        for runtime_name, scenarios in results.items():
+            baseline.setdefault(runtime_name, {}).update(scenarios)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for runtime_name, scenario, metric, expect, current in regressions:
+        print("REGRESSION {} {} {}: {} -> {}".format(runtime_name, scenario, metric, expect, current))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
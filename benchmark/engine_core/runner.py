@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import gc
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from bamboo_engine import api, states
+from bamboo_engine.eri import EngineRuntimeInterface
+
+from .runtimes import build_runtime
+from .topologies import TOPOLOGIES
+
+# 每种拓扑默认的规模
+DEFAULT_SIZES = {
+    "linear": 50,
+    "parallel": 20,
+    "subprocess": 5,
+    "exclusive": 10,
+    "loop": 20,
+}
+
+# 每次运行结果都应该完全一致的指标，只要比基线大就视为退化
+EXACT_METRICS = ("node_executions", "runtime_calls_per_node", "db_queries_per_node")
+# 受机器及运行环境影响的指标，超过基线一定比例才视为退化
+TOLERANT_METRICS = ("cpu_us_per_node", "alloc_kib_per_node")
+
+_ERI_METHODS = sorted(
+    name
+    for name in dir(EngineRuntimeInterface)
+    if not name.startswith("_") and callable(getattr(EngineRuntimeInterface, name))
+)
+
+
+class CallCounter:
+    """
+    通过替换运行时实例上的 ERI 方法统计引擎对运行时的调用次数，在内存运行时下作为数据库往返次数的替代指标
+    """
+
+    def __init__(self, runtime):
+        self.calls = Counter()
+        for name in _ERI_METHODS:
+            setattr(runtime, name, self._wrap(name, getattr(runtime, name)))
+
+    def _wrap(self, name, method):
+        calls = self.calls
+
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return method(*args, **kwargs)
+
+        return wrapper
+
+
+def _run_once(runtime, pipeline: dict):
+    api.run_pipeline(runtime=runtime, pipeline=pipeline)
+    runtime.run_tasks()
+    state = runtime.get_state(pipeline["id"])
+    if state.name != states.FINISHED:
+        raise RuntimeError("pipeline({}) ends with state {}".format(pipeline["id"], state.name))
+
+
+def run_scenario(runtime_name: str, topology: str, size: int, repeat: int = 5) -> Dict[str, float]:
+    """
+    在指定运行时上执行某个拓扑，返回按节点执行次数平均后的开销
+
+    :param runtime_name: 运行时类型，memory 或 sqlite
+    :type runtime_name: str
+    :param topology: 拓扑名
+    :type topology: str
+    :param size: 拓扑规模
+    :type size: int
+    :param repeat: CPU 时间的采样次数，取最小值以减少其他进程的干扰
+    :type repeat: int
+    :return: 测量结果
+    :rtype: Dict[str, float]
+    """
+    generate = TOPOLOGIES[topology]
+
+    runtime, query_counter = build_runtime(runtime_name)
+    # 预热，避免模板编译、handler 注册等一次性开销进入统计
+    _run_once(runtime, generate(size))
+
+    cpu_times = []
+    for _ in range(repeat):
+        pipeline = generate(size)
+        gc.collect()
+        start = time.process_time()
+        _run_once(runtime, pipeline)
+        cpu_times.append(time.process_time() - start)
+
+    # 关闭垃圾回收，避免循环引用对象的回收时机影响内存分配峰值
+    pipeline = generate(size)
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        _run_once(runtime, pipeline)
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+    call_counter = CallCounter(runtime)
+    with query_counter.counting():
+        _run_once(runtime, generate(size))
+
+    node_executions = call_counter.calls["get_node_bundle"]
+    return {
+        "node_executions": node_executions,
+        "cpu_us_per_node": round(min(cpu_times) * 1e6 / node_executions, 2),
+        "alloc_kib_per_node": round(alloc_peak / 1024.0 / node_executions, 2),
+        "runtime_calls_per_node": round(sum(call_counter.calls.values()) / node_executions, 2),
+        "db_queries_per_node": round(query_counter.count / node_executions, 2),
+    }
+
+
+def run(runtime_names: List[str], sizes: Dict[str, int], repeat: int = 5) -> Dict[str, Dict[str, dict]]:
+    """
+    在每个运行时上执行所有拓扑
+
+    :return: {runtime: {scenario: result}}
+    :rtype: Dict[str, Dict[str, dict]]
+    """
+    results = {}
+    for runtime_name in runtime_names:
+        results[runtime_name] = {}
+        for topology, size in sizes.items():
+            scenario = "{}-{}".format(topology, size)
+            results[runtime_name][scenario] = run_scenario(runtime_name, topology, size, repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[Tuple[str, str, str, float, float]]:
+    """
+    将测量结果与基线对比，返回退化的指标
+
+    :param results: 测量结果
+    :type results: dict
+    :param baseline: 基线
+    :type baseline: dict
+    :param tolerance: CPU 时间及内存分配允许超过基线的比例
+    :type tolerance: float
+    :return: [(runtime, scenario, metric, baseline_value, current_value)]
+    :rtype: List[Tuple[str, str, str, float, float]]
+    """
+    regressions = []
+    for runtime_name, scenarios in results.items():
+        for scenario, result in scenarios.items():
+            expect = baseline.get(runtime_name, {}).get(scenario)
+            if expect is None:
+                continue
+
+            for metric in EXACT_METRICS:
+                if result[metric] > expect[metric]:
+                    regressions.append((runtime_name, scenario, metric, expect[metric], result[metric]))
+            for metric in TOLERANT_METRICS:
+                if result[metric] > expect[metric] * (1 + tolerance):
+                    regressions.append((runtime_name, scenario, metric, expect[metric], result[metric]))
+
+    return regressions
+
+
+def format_results(results: dict, baseline: dict) -> str:
+    metrics = EXACT_METRICS + TOLERANT_METRICS
+    lines = []
+    header = ["runtime", "scenario"] + list(metrics)
+    lines.append("  ".join("{:>22}".format(h) for h in header))
+    for runtime_name, scenarios in results.items():
+        for scenario, result in scenarios.items():
+            expect = baseline.get(runtime_name, {}).get(scenario, {})
+            cells = [runtime_name, scenario]
+            for metric in metrics:
+                if metric in expect:
+                    cells.append("{} ({})".format(result[metric], expect[metric]))
+                else:
+                    cells.append(str(result[metric]))
+            lines.append("  ".join("{:>22}".format(c) for c in cells))
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import itertools
+import os
+import sys
+from contextlib import contextmanager
+
+from bamboo_engine.eri.memory import InMemoryRuntime
+
+from .services import register_services
+
+MEMORY = "memory"
+SQLITE = "sqlite"
+
+_django_ready = False
+
+
+class _NullQueryCounter:
+    count = 0
+
+    @contextmanager
+    def counting(self):
+        yield
+
+
+class _DjangoQueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def _wrapper(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def counting(self):
+        from django.db import connection
+
+        with connection.execute_wrapper(self._wrapper):
+            yield
+
+
+def _setup_django():
+    global _django_ready
+    if _django_ready:
+        return
+
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "runtime", "bamboo-pipeline")
+    )
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.configure(
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        INSTALLED_APPS=["django.contrib.contenttypes", "pipeline.eri"],
+        USE_TZ=True,
+    )
+    django.setup()
+    call_command("migrate", verbosity=0)
+    _django_ready = True
+
+
+def _sqlite_runtime_cls():
+    from pipeline.eri.runtime import BambooDjangoRuntime
+
+    from bamboo_engine.eri.memory.plugin_manager import PluginManagerMixin
+    from bamboo_engine.eri.memory.task import TaskMixin
+
+    class SqliteRuntime(TaskMixin, PluginManagerMixin, BambooDjangoRuntime):
+        """
+        数据保存在 sqlite 中的 BambooDjangoRuntime，任务及插件使用内存运行时的实现，不依赖消息队列及组件库
+        """
+
+        def __init__(self):
+            super().__init__()
+            self.schedule_delay = False
+            self._services = {}
+            self._executable_end_events = {}
+            self._compute_variables = {}
+            self._tasks = []
+            self._task_seq = itertools.count()
+
+    return SqliteRuntime
+
+
+def build_runtime(name: str):
+    """
+    创建用于基准测试的运行时及其数据库查询计数器
+
+    :param name: 运行时类型，memory 或 sqlite
+    :type name: str
+    :return: (runtime, query_counter)
+    """
+    if name == MEMORY:
+        runtime = InMemoryRuntime(schedule_delay=False)
+        counter = _NullQueryCounter()
+    elif name == SQLITE:
+        _setup_django()
+        runtime = _sqlite_runtime_cls()()
+        counter = _DjangoQueryCounter()
+    else:
+        raise ValueError("unsupported runtime: {}".format(name))
+
+    register_services(runtime)
+    return runtime, counter
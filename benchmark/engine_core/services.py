@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from bamboo_engine.eri import ScheduleType, Service
+
+NOOP_COMPONENT = "bench_noop"
+POLL_COMPONENT = "bench_poll"
+
+
+class NoopService(Service):
+    """
+    只把输入原样写到输出中的服务，用于测量引擎本身的开销
+    """
+
+    def execute(self, data, root_pipeline_data):
+        data.outputs.result = data.inputs.get("value")
+        return True
+
+    def schedule(self, schedule, data, root_pipeline_data, callback_data=None):
+        return True
+
+    def hook_dispatch(self, hook, data, root_pipeline_data, callback_data=None):
+        return True
+
+    def need_schedule(self):
+        return False
+
+    def need_run_hook(self):
+        return False
+
+    def schedule_type(self):
+        return None
+
+    def is_schedule_done(self):
+        return False
+
+    def schedule_after(self, schedule, data, root_pipeline_data):
+        return -1
+
+    def setup_runtime_attributes(self, **attrs):
+        pass
+
+
+class PollService(NoopService):
+    """
+    第一次轮询调度即完成的服务，用于覆盖 Engine.schedule 的开销
+    """
+
+    def __init__(self):
+        self._schedule_done = False
+
+    def schedule(self, schedule, data, root_pipeline_data, callback_data=None):
+        self._schedule_done = True
+        return True
+
+    def need_schedule(self):
+        return True
+
+    def schedule_type(self):
+        return ScheduleType.POLL
+
+    def is_schedule_done(self):
+        return self._schedule_done
+
+    def schedule_after(self, schedule, data, root_pipeline_data):
+        return 1
+
+
+def register_services(runtime):
+    runtime.register_service(NOOP_COMPONENT, NoopService)
+    runtime.register_service(POLL_COMPONENT, PollService)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from bamboo_engine import builder
+from bamboo_engine.builder import (
+    ConvergeGateway,
+    Data,
+    EmptyEndEvent,
+    EmptyStartEvent,
+    ExclusiveGateway,
+    NodeOutput,
+    ParallelGateway,
+    Params,
+    ServiceActivity,
+    SubProcess,
+    Var,
+)
+
+from .services import NOOP_COMPONENT, POLL_COMPONENT
+
+
+def _activity(component_code=NOOP_COMPONENT, value="${input}"):
+    act = ServiceActivity(component_code=component_code)
+    act.component.inputs.value = Var(type=Var.SPLICE, value=value)
+    return act
+
+
+def _pipeline_data():
+    data = Data()
+    data.inputs["${input}"] = Var(type=Var.PLAIN, value="1")
+    return data
+
+
+def linear(size: int) -> dict:
+    """
+    start -> act * size -> end，每个节点都引用上一个节点的输出
+    """
+    data = _pipeline_data()
+    start = EmptyStartEvent()
+    tail = start
+    value = "${input}"
+    for i in range(size):
+        act = _activity(value=value)
+        output_key = "${act_%s}" % i
+        data.inputs[output_key] = NodeOutput(source_act=act.id, source_key="result")
+        value = output_key
+        tail = tail.extend(act)
+    tail.extend(EmptyEndEvent())
+    return builder.build_tree(start, data=data)
+
+
+def parallel(size: int) -> dict:
+    """
+    start -> pg -> (act * size) -> cg -> end，其中一半分支为轮询调度节点
+    """
+    start = EmptyStartEvent()
+    pg = ParallelGateway()
+    cg = ConvergeGateway()
+    branches = [_activity(component_code=POLL_COMPONENT if i % 2 else NOOP_COMPONENT) for i in range(size)]
+    start.extend(pg).connect(*branches).to(pg).converge(cg).extend(EmptyEndEvent())
+    return builder.build_tree(start, data=_pipeline_data())
+
+
+def subprocess(size: int) -> dict:
+    """
+    嵌套 size 层的子流程，每层子流程中包含一个活动节点
+    """
+    inner = None
+    for _ in range(size):
+        start = EmptyStartEvent()
+        tail = start.extend(_activity())
+        if inner is not None:
+            tail = tail.extend(inner)
+        tail.extend(EmptyEndEvent())
+
+        sub_data = _pipeline_data()
+        inner = SubProcess(
+            start=start, data=sub_data, params=Params({"${input}": Var(type=Var.SPLICE, value="${input}")})
+        )
+
+    start = EmptyStartEvent()
+    start.extend(inner).extend(EmptyEndEvent())
+    return builder.build_tree(start, data=_pipeline_data())
+
+
+def exclusive(size: int) -> dict:
+    """
+    start -> (eg -> act_a | act_b -> cg) * size -> end
+    """
+    start = EmptyStartEvent()
+    tail = start
+    for _ in range(size):
+        eg = ExclusiveGateway(conditions={0: "${input} > 0", 1: "${input} <= 0"})
+        tail = tail.extend(eg).connect(_activity(), _activity()).to(eg).converge(ConvergeGateway())
+    tail.extend(EmptyEndEvent())
+    return builder.build_tree(start, data=_pipeline_data())
+
+
+def loop(size: int) -> dict:
+    """
+    start -> act(loop_times=size) -> end
+
+    builder 不支持声明循环配置，在生成的流程树中为活动节点加上 loop_config
+    """
+    start = EmptyStartEvent()
+    act = _activity()
+    start.extend(act).extend(EmptyEndEvent())
+    pipeline = builder.build_tree(start, data=_pipeline_data())
+    pipeline["activities"][act.id]["loop_config"] = {"enable": True, "loop_times": size}
+    return pipeline
+
+
+TOPOLOGIES = {
+    "linear": linear,
+    "parallel": parallel,
+    "subprocess": subprocess,
+    "exclusive": exclusive,
+    "loop": loop,
+}
@@ -27,6 +27,7 @@ from pipeline.contrib.rollback.models import (
 )
 from pipeline.contrib.rollback.tasks import any_rollback, token_rollback
 from pipeline.core.constants import PE
+from pipeline.eri.imp.node import update_node_detail
 from pipeline.eri.models import Node, Process, State
 from pipeline.eri.runtime import BambooDjangoRuntime
 
@@ -221,8 +222,7 @@ class BaseRollbackHandler:
 
             node_detail = json.loads(node.detail)
             node_detail["reserve_rollback"] = reserve_rollback
-            node.detail = json.dumps(node_detail)
-            node.save()
+            update_node_detail(start_node_id, node_detail)
 
     def reserve_rollback(self, start_node_id, target_node_id, **options):
         """
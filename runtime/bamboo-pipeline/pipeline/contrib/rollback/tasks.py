@@ -12,6 +12,7 @@ from pipeline.contrib.rollback.models import (
     RollbackPlan,
     RollbackSnapshot,
 )
+from pipeline.eri.imp.node import update_node_detail
 from pipeline.eri.models import CallbackData
 from pipeline.eri.models import ExecutionData as DBExecutionData
 from pipeline.eri.models import (
@@ -39,8 +40,7 @@ class RollbackCleaner:
         node = Node.objects.get(node_id=node_id)
         node_detail = json.loads(node.detail)
         node_detail["reserve_rollback"] = False
-        node.detail = json.dumps(node_detail)
-        node.save()
+        update_node_detail(node_id, node_detail)
 
     def clear_data(self):
         # 节点快照需要全部删除，可能会有下一次的回滚
@@ -142,12 +142,14 @@ class TokenRollbackTaskHandler:
                 node_id=root_pipeline_id,
                 to_state=states.RUNNING,
             )
+            self.runtime.bump_control_epoch(root_pipeline_id)
         else:
             # 流程设置为暂停状态，需要用户点击才可以继续开始
             self.runtime.set_state(
                 node_id=root_pipeline_id,
                 to_state=states.SUSPENDED,
             )
+            self.runtime.bump_control_epoch(root_pipeline_id)
 
         self.runtime.execute(
             process_id=process_info.process_id,
@@ -261,6 +263,7 @@ class AnyRollbackHandler:
                 node_id=root_pipeline_id,
                 to_state=states.SUSPENDED,
             )
+            self.runtime.bump_control_epoch(root_pipeline_id)
 
         self.runtime.execute(
             process_id=process_info.process_id,
@@ -13,6 +13,7 @@ specific language governing permissions and limitations under the License.
 
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.backends.signals import connection_created
 from pipeline.exceptions import ConfigValidationError
 
 from bamboo_engine.handlers import register
@@ -28,6 +29,18 @@ class ERIConfig(AppConfig):
 
         register()
 
+        # 统计引擎推进每个节点时产生的数据库查询次数，需要通过 BAMBOO_DJANGO_ERI_COUNT_DB_QUERIES 开启
+        if getattr(settings, "BAMBOO_DJANGO_ERI_COUNT_DB_QUERIES", False):
+            from .utils import install_db_query_counter
+
+            connection_created.connect(install_db_query_counter, dispatch_uid="bamboo_django_eri_db_query_counter")
+
+        # 开启大体积数据转存时校验 BAMBOO_DJANGO_ERI_BLOB_STORE 配置，避免到节点执行时才报错
+        if getattr(settings, "BAMBOO_DJANGO_ERI_BLOB_THRESHOLD", 0):
+            from .imp.blob import build_blob_store
+
+            build_blob_store()
+
         # 校验 PIPELINE_EXCLUSIVE_GATEWAY_EXPR_FUNC 配置
         if hasattr(settings, "PIPELINE_EXCLUSIVE_GATEWAY_EXPR_FUNC"):
 
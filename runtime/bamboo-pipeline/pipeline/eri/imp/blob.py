@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import hashlib
+import os
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from pipeline.exceptions import ConfigValidationError
+
+# worker 进程内共享的大体积数据存储后端
+_blob_store = None
+
+
+class BlobStore:
+    """
+    大体积数据的存储后端，数据表中只保存 save 返回的键
+
+    键由数据内容的 sha256 生成，相同的数据只会保存一份，重复保存是幂等的，已经写入的数据不会再被修改
+    同一份数据可能被多个数据行引用，清理时需要以数据表中 *_serializer 包含 blob 的数据行引用的键为准，不能按写入时间清理
+    """
+
+    def _content_key(self, content: str) -> str:
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        return "{}/{}".format(digest[:2], digest)
+
+    def save(self, content: str) -> str:
+        """
+        保存数据
+
+        :param content: 数据
+        :type content: str
+        :return: 数据的键
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+    def load(self, key: str) -> str:
+        """
+        读取数据
+
+        :param key: 数据的键
+        :type key: str
+        :return: 数据
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+
+class FileSystemBlobStore(BlobStore):
+    """
+    将数据保存在本地或 NFS 等共享文件系统中，多个 worker 需要挂载同一个目录
+    """
+
+    def __init__(self, location: str):
+        self.location = location
+
+    def save(self, content: str) -> str:
+        key = self._content_key(content)
+        path = os.path.join(self.location, key)
+        if os.path.exists(path):
+            return key
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 先写入临时文件再重命名，避免读取到写入了一半的数据，同时写入同一份数据时各自使用不同的临时文件
+        tmp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return key
+
+    def load(self, key: str) -> str:
+        with open(os.path.join(self.location, key), encoding="utf-8") as f:
+            return f.read()
+
+
+class S3BlobStore(BlobStore):
+    """
+    将数据保存在兼容 S3 协议的对象存储中
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        prefix: str = "",
+    ):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            "s3", endpoint_url=endpoint_url, aws_access_key_id=access_key, aws_secret_access_key=secret_key
+        )
+
+    def save(self, content: str) -> str:
+        key = self._content_key(content)
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=content.encode())
+        return key
+
+    def load(self, key: str) -> str:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read().decode()
+
+
+def build_blob_store() -> BlobStore:
+    """
+    根据 BAMBOO_DJANGO_ERI_BLOB_STORE 配置创建存储后端，默认使用 FileSystemBlobStore，配置有误时抛出 ConfigValidationError
+    """
+    config = getattr(settings, "BAMBOO_DJANGO_ERI_BLOB_STORE", {})
+    try:
+        backend = import_string(config.get("BACKEND", "pipeline.eri.imp.blob.FileSystemBlobStore"))
+        return backend(**config.get("OPTIONS", {}))
+    except (ImportError, TypeError) as e:
+        raise ConfigValidationError(
+            "config validate error, BAMBOO_DJANGO_ERI_BLOB_STORE is invalid: {}".format(e)
+        ) from e
+
+
+def get_blob_store() -> BlobStore:
+    """
+    获取 worker 进程内共享的存储后端
+    """
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = build_blob_store()
+    return _blob_store
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+from typing import Dict, List, Tuple
+
+from django.db import connections, router
+from pipeline.eri import codec
+from pipeline.eri.imp.node import cache_node, get_node_cache
+from pipeline.eri.models import Data as DBData
+from pipeline.eri.models import Node as DBNode
+from pipeline.eri.models import State as DBState
+
+from bamboo_engine import metrics
+from bamboo_engine.eri import Data, NodeBundle, State
+
+_STATE_FIELDS = (
+    "root_id",
+    "parent_id",
+    "name",
+    "version",
+    "loop",
+    "inner_loop",
+    "retry",
+    "skip",
+    "error_ignored",
+    "created_time",
+    "started_time",
+    "archived_time",
+)
+_DATA_FIELDS = ("inputs", "outputs")
+
+
+def _bundle_query(connection, node_ids: List[str], cached_revisions: Dict[str, int]) -> Tuple[str, list]:
+    """
+    通过 LEFT JOIN 在一次查询中获取节点详情及 node_ids[0] 的状态和节点数据，预取的后继节点只获取节点详情，
+    节点缓存中已有当前版本的节点不会读取节点详情
+    """
+    qn = connection.ops.quote_name
+
+    def column(alias: str, model, field: str) -> str:
+        return "{}.{}".format(alias, qn(model._meta.get_field(field).column))
+
+    node_id, revision, detail = (column("n", DBNode, field) for field in ("node_id", "revision", "detail"))
+
+    params = []
+    whens = []
+    for cached_node_id, cached_revision in cached_revisions.items():
+        whens.append("WHEN {} = %s AND {} = %s THEN NULL".format(node_id, revision))
+        params.extend([cached_node_id, cached_revision])
+    detail_select = "CASE {} ELSE {} END".format(" ".join(whens), detail) if whens else detail
+
+    columns = [node_id, revision, detail_select]
+    columns.extend(column("s", DBState, field) for field in _STATE_FIELDS)
+    columns.extend(column("d", DBData, field) for field in _DATA_FIELDS)
+
+    sql = (
+        "SELECT {columns} FROM {node_table} n "
+        "LEFT JOIN {state_table} s ON {state_node_id} = {node_id} AND {node_id} = %s "
+        "LEFT JOIN {data_table} d ON {data_node_id} = {node_id} AND {node_id} = %s "
+        "WHERE {node_id} IN ({placeholders})"
+    ).format(
+        columns=", ".join(columns),
+        node_table=qn(DBNode._meta.db_table),
+        state_table=qn(DBState._meta.db_table),
+        data_table=qn(DBData._meta.db_table),
+        node_id=node_id,
+        state_node_id=column("s", DBState, "node_id"),
+        data_node_id=column("d", DBData, "node_id"),
+        placeholders=", ".join(["%s"] * len(node_ids)),
+    )
+    params.extend([node_ids[0], node_ids[0], *node_ids])
+    return sql, params
+
+
+def _state_converters(connection) -> list:
+    # 与 ORM 一样对状态字段的原始值进行转换（如 sqlite 及 mysql 中的时间字段）
+    converters = []
+    for field in _STATE_FIELDS:
+        col = DBState._meta.get_field(field).get_col(DBState._meta.db_table)
+        converters.append((col, connection.ops.get_db_converters(col) + col.get_db_converters(connection)))
+    return converters
+
+
+class NodeBundleMixin:
+    @metrics.setup_histogram(metrics.ENGINE_RUNTIME_NODE_READ_TIME)
+    def get_node_bundle(self, node_id: str, prefetch_next: bool = False) -> NodeBundle:
+        """
+        通过一次查询获取节点详情、状态及节点数据，获取到的节点数据会暂存在当前 runtime 实例中供随后的 get_data 使用，
+        执行数据体积可能很大且推进时不会用到，所以不会被获取
+        当前节点的定义已经在节点缓存中、prefetch_next 为 True 且节点只有一个后继节点时，会在同一次查询中
+        将后继节点的定义加载到节点缓存中，后继节点的状态及节点数据可能在两次推进之间被修改，所以不会被预取
+
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param prefetch_next: 是否预取后继节点的定义
+        :type prefetch_next: bool
+        :return: NodeBundle 实例
+        :rtype: NodeBundle
+        """
+        cache = get_node_cache()
+        # 节点的后继节点不会被修改，即使缓存的节点定义已经过期也可以用来确定需要预取的后继节点
+        cached = {node_id: cache.get(node_id)}
+        if prefetch_next and cached[node_id] is not None and len(cached[node_id][1].target_nodes) == 1:
+            next_node_id = cached[node_id][1].target_nodes[0]
+            cached[next_node_id] = cache.get(next_node_id)
+
+        connection = connections[router.db_for_read(DBNode)]
+        sql, params = _bundle_query(
+            connection, list(cached), {key: item[0] for key, item in cached.items() if item is not None}
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = {row[0]: row for row in cursor.fetchall()}
+
+        if node_id not in rows:
+            raise DBNode.DoesNotExist("Node with node_id({}) does not exist".format(node_id))
+
+        nodes = {}
+        for row_node_id, (_, revision, detail, *_) in rows.items():
+            # 节点详情为 NULL 说明缓存的节点定义仍然有效
+            if detail is None:
+                nodes[row_node_id] = cached[row_node_id][1]
+                continue
+            nodes[row_node_id] = self._get_node(DBNode(node_id=row_node_id, detail=detail))
+            cache_node(row_node_id, revision, nodes[row_node_id])
+
+        row = rows[node_id]
+        state_values = row[3 : 3 + len(_STATE_FIELDS)]
+        data_inputs, data_outputs = row[3 + len(_STATE_FIELDS) :]
+
+        state = None
+        # version 字段不能为空，为 NULL 时说明节点还没有状态
+        if state_values[_STATE_FIELDS.index("version")] is not None:
+            state_kwargs = {}
+            for field, value, (col, converters) in zip(_STATE_FIELDS, state_values, _state_converters(connection)):
+                for converter in converters:
+                    value = converter(value, col, connection)
+                state_kwargs[field] = value
+            state = State(node_id=node_id, **state_kwargs)
+
+        data = None
+        if data_inputs is not None:
+            data = Data(
+                inputs=self._get_data_inputs(codec.data_json_loads(data_inputs)),
+                outputs=json.loads(data_outputs),
+            )
+        self._prefetched_data = (node_id, data) if data is not None else None
+
+        return NodeBundle(node=nodes[node_id], state=state, data=data)
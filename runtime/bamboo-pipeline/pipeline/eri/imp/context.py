@@ -12,22 +12,111 @@ specific language governing permissions and limitations under the License.
 """
 
 import json
-from typing import Dict, List, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from django.db.models import Q
-from django.db import transaction
+from django.conf import settings
+from django.db.models import F, TextField, Value
+from django.db.models.functions import Concat
+from django.db import connections, router, transaction
 
 from bamboo_engine import metrics
 from bamboo_engine.template import Template
 from bamboo_engine.eri import ContextValue, ContextValueType
+from bamboo_engine.utils.collections import LRUCache
+from bamboo_engine.utils.string import unique_id
 
-from pipeline.eri.utils import caculate_final_references
+from pipeline.eri.utils import caculate_affected_final_references
 from pipeline.eri.models import ContextValue as DBContextValue
 from pipeline.eri.models import ContextOutputs
+from pipeline.eri.imp.node import refresh_closure_references
 from pipeline.eri.imp.serializer import SerializerMixin
 
+# worker 进程内共享的上下文变量缓存，以流程 ID 为键保存各变量最近一次读取到的版本及序列化后的值
+_context_value_cache: Optional[LRUCache] = None
+
+# 每次读取的版本与缓存不一致的变量数
+_STALE_KEYS_BATCH_SIZE = 500
+
+# upsert_plain_context_values 写入及冲突时需要更新的字段
+_UPSERT_INSERT_FIELDS = ("pipeline_id", "key", "type", "serializer", "code", "value", "references", "version")
+_UPSERT_UPDATE_FIELDS = ("type", "serializer", "code", "value", "references", "version")
+# 各数据库 upsert 语句的冲突处理子句
+_UPSERT_CLAUSES = {
+    "mysql": "ON DUPLICATE KEY UPDATE {assignments}",
+    "postgresql": "ON CONFLICT ({conflict}) DO UPDATE SET {assignments}",
+    "sqlite": "ON CONFLICT ({conflict}) DO UPDATE SET {assignments}",
+}
+_UPSERT_ASSIGNMENTS = {
+    "mysql": "{0} = VALUES({0})",
+    "postgresql": "{0} = EXCLUDED.{0}",
+    "sqlite": "{0} = excluded.{0}",
+}
+
+
+def get_context_value_cache() -> LRUCache:
+    """
+    获取上下文变量缓存，缓存的最大流程数由 BAMBOO_DJANGO_ERI_CONTEXT_VALUE_CACHE_SIZE 配置，为 0 时不开启缓存
+    """
+    global _context_value_cache
+    if _context_value_cache is None:
+        _context_value_cache = LRUCache(maxsize=int(getattr(settings, "BAMBOO_DJANGO_ERI_CONTEXT_VALUE_CACHE_SIZE", 0)))
+    return _context_value_cache
+
 
 class ContextMixin(SerializerMixin):
+    def _iter_context_value_rows(self, pipeline_id: str, qs, *fields: str) -> Iterable[Tuple]:
+        """
+        读取上下文变量，返回 (key, type, serializer, value, code, *fields) 形式的行
+        开启上下文变量缓存时，版本与缓存中一致的变量不会再从数据库中读取变量值
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param qs: 该流程上下文变量的 QuerySet
+        :param fields: 额外读取的字段
+        :type fields: str
+        """
+        cache = get_context_value_cache()
+        value_fields = ("key", "version", "type", "serializer", "value", "code")
+        if not cache.enabled:
+            yield from qs.values_list("key", "type", "serializer", "value", "code", *fields)
+            return
+
+        # key -> (version, (type, serializer, value, code))，每次写入变量值都会生成新的版本，版本相同即变量值相同
+        entries = cache.get(pipeline_id)
+        if not entries:
+            entries = {}
+            cache.set(pipeline_id, entries)
+            for key, version, type_, serializer, value, code, *extra in qs.values_list(*value_fields, *fields):
+                if version:
+                    entries[key] = (version, (type_, serializer, value, code))
+                yield (key, type_, serializer, value, code, *extra)
+            return
+
+        # 先只读取变量的版本，再分批读取版本与缓存不一致的变量值，避免查询参数的数量随缓存的变量数增长
+        rows = list(qs.values_list("key", "version", *fields))
+        stale_keys = [key for key, version, *_ in rows if not version or entries.get(key, (None,))[0] != version]
+        fresh = {}
+        for i in range(0, len(stale_keys), _STALE_KEYS_BATCH_SIZE):
+            batch = stale_keys[i : i + _STALE_KEYS_BATCH_SIZE]
+            for key, version, type_, serializer, value, code in qs.filter(key__in=batch).values_list(*value_fields):
+                fresh[key] = (version, (type_, serializer, value, code))
+                if version:
+                    entries[key] = fresh[key]
+
+        for key, _, *extra in rows:
+            # 两次查询之间被删除的变量不再返回
+            item = fresh.get(key) or entries.get(key)
+            if item is not None:
+                yield (key, *item[1], *extra)
+
+    def _to_context_value(self, key: str, type_: int, serializer: str, value: str, code: str) -> ContextValue:
+        return ContextValue(
+            key=key,
+            type=ContextValueType(type_),
+            value=self._deserialize(value, serializer),
+            code=code or None,
+        )
+
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CONTEXT_VALUE_READ_TIME)
     def get_context_values(self, pipeline_id: str, keys: set) -> List[ContextValue]:
         """
@@ -40,19 +129,9 @@ class ContextMixin(SerializerMixin):
         :return: 变量值信息
         :rtype: List[ContextValue]
         """
-        qs = DBContextValue.objects.filter(pipeline_id=pipeline_id, key__in=keys).only(
-            "key", "type", "serializer", "value", "code"
-        )
+        qs = DBContextValue.objects.filter(pipeline_id=pipeline_id, key__in=keys)
 
-        return [
-            ContextValue(
-                key=cv_model.key,
-                type=ContextValueType(cv_model.type),
-                value=self._deserialize(cv_model.value, cv_model.serializer),
-                code=cv_model.code or None,
-            )
-            for cv_model in qs
-        ]
+        return [self._to_context_value(*row) for row in self._iter_context_value_rows(pipeline_id, qs)]
 
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CONTEXT_REF_READ_TIME)
     def get_context_key_references(self, pipeline_id: str, keys: set) -> set:
@@ -74,6 +153,31 @@ class ContextMixin(SerializerMixin):
 
         return set(references)
 
+    @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CONTEXT_VALUE_READ_TIME)
+    def get_context_values_with_references(self, pipeline_id: str, keys: set) -> List[ContextValue]:
+        """
+        获取某个流程上下文中 keys 所指定的变量及其直接和间接引用的其他所有变量的值
+
+        变量的引用在写入时已经计算为传递闭包，先只读取 keys 所指定变量的引用，再只读取需要的变量值
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param keys: 变量键
+        :type keys: set
+        :return: 变量值信息
+        :rtype: List[ContextValue]
+        """
+        if not keys:
+            return []
+
+        need_keys = set(keys)
+        for references in DBContextValue.objects.filter(pipeline_id=pipeline_id, key__in=keys).values_list(
+            "references", flat=True
+        ):
+            need_keys.update(json.loads(references or "[]"))
+
+        return self.get_context_values(pipeline_id, need_keys)
+
     def update_context_values(self, pipeline_id: str, context_values: List[ContextValue]):
         """
         更新上下文数据
@@ -87,42 +191,71 @@ class ContextMixin(SerializerMixin):
         for cv in context_values:
             context_value_references[cv.key] = Template(cv.value).get_reference()
 
-        # 重新计算并更新整个流程的变量引用图
-        exist_context_values = DBContextValue.objects.filter(
-            ~Q(key__in=context_value_references.keys()) & Q(pipeline_id=pipeline_id)
-        )
-        exist_context_value_references = {}
-        for ecv in exist_context_values:
-            exist_context_value_references[ecv.key] = set(json.loads(ecv.references))
-            context_value_references[ecv.key] = Template(self._deserialize(ecv.value, ecv.serializer)).get_reference()
+        # 变量保存的最终引用即为引用图的传递闭包，只有最终引用中包含被更新变量的变量才需要重新计算
+        exist_ids = {}
+        exist_final_references = {}
+        for id_, key, references in DBContextValue.objects.filter(pipeline_id=pipeline_id).values_list(
+            "id", "key", "references"
+        ):
+            exist_ids[key] = id_
+            exist_final_references[key] = set(json.loads(references or "[]"))
 
-        # convert a:b, b:c,d -> a:b,c,d b:c,d
-        final_references = caculate_final_references(context_value_references)
+        affected_keys = [
+            key
+            for key, references in exist_final_references.items()
+            if key not in context_value_references and not references.isdisjoint(context_value_references)
+        ]
+        for key, serializer, value in DBContextValue.objects.filter(
+            pipeline_id=pipeline_id, key__in=affected_keys
+        ).values_list("key", "serializer", "value"):
+            context_value_references[key] = Template(self._deserialize(value, serializer)).get_reference()
 
-        # find key which references need to be updated
-        update_references_key = []
-        for key, exist_ref_set in exist_context_value_references.items():
-            if exist_ref_set != final_references.get(key, set()):
-                update_references_key.append(key)
+        final_references = caculate_affected_final_references(context_value_references, exist_final_references)
 
-        # do update
-        with transaction.atomic():
-            # update context value
-            for cv in context_values:
-                value, serializer = self._serialize(cv.value)
-                DBContextValue.objects.filter(pipeline_id=pipeline_id, key=cv.key).update(
+        update_models = []
+        for cv in context_values:
+            if cv.key not in exist_ids:
+                continue
+            value, serializer = self._serialize(cv.value)
+            update_models.append(
+                DBContextValue(
+                    id=exist_ids[cv.key],
                     type=cv.type.value,
                     value=value,
                     serializer=serializer,
                     code=cv.code or "",
                     references=json.dumps(list(final_references[cv.key])),
+                    version=unique_id("v"),
                 )
+            )
 
-            # update references
-            for key in update_references_key:
-                DBContextValue.objects.filter(pipeline_id=pipeline_id, key=key).update(
-                    references=json.dumps(list(final_references[key]))
+        # 被动受影响的变量只在最终引用发生变化时才更新
+        update_references_models = [
+            DBContextValue(id=exist_ids[key], references=json.dumps(list(final_references[key])))
+            for key in affected_keys
+            if final_references[key] != exist_final_references[key]
+        ]
+        # 最终引用发生变化的变量，直接引用了这些变量的节点需要重新计算引用闭包
+        references_changed_keys = [
+            key
+            for key in final_references
+            if key in exist_final_references and final_references[key] != exist_final_references[key]
+        ]
+
+        # do update
+        with transaction.atomic():
+            DBContextValue.objects.bulk_update(
+                update_models,
+                fields=["type", "value", "serializer", "code", "references", "version"],
+                batch_size=500,
+            )
+            DBContextValue.objects.bulk_update(update_references_models, fields=["references"], batch_size=500)
+
+            if references_changed_keys:
+                exist_final_references.update(
+                    {key: references for key, references in final_references.items() if key in exist_final_references}
                 )
+                refresh_closure_references(pipeline_id, exist_final_references, references_changed_keys)
 
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CONTEXT_VALUE_UPSERT_TIME)
     @transaction.atomic
@@ -135,42 +268,145 @@ class ContextMixin(SerializerMixin):
         :param update: 更新数据
         :type update: Dict[str, ContextValue]
         """
-        exist_keys = DBContextValue.objects.filter(pipeline_id=pipeline_id).values_list("key", flat=True)
-        update_keys = set(update.keys()).intersection(exist_keys)
+        if not update:
+            return
 
-        # update
-        for k in update_keys:
-            context_value = update[k]
-            value, serializer = self._serialize(context_value.value)
-
-            DBContextValue.objects.filter(pipeline_id=pipeline_id, key=k).update(
-                type=ContextValueType.PLAIN.value,
-                value=value,
-                serializer=serializer,
-                code="",
-                references="[]",
-            )
-
-        # insert
-        insert_keys = set(update.keys()).difference(exist_keys)
         context_value_models = []
-        for k in insert_keys:
-            context_value = update[k]
+        for k, context_value in update.items():
             value, serializer = self._serialize(context_value.value)
-
             context_value_models.append(
                 DBContextValue(
                     pipeline_id=pipeline_id,
-                    key=context_value.key,
+                    key=k,
                     type=ContextValueType.PLAIN.value,
                     serializer=serializer,
                     value=value,
                     code="",
                     references="[]",
+                    version=unique_id("v"),
                 )
             )
 
-        DBContextValue.objects.bulk_create(context_value_models, batch_size=500)
+        self._upsert_context_value_models(pipeline_id, context_value_models)
+
+    @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CONTEXT_VALUE_UPSERT_TIME)
+    @transaction.atomic
+    def append_context_value(self, pipeline_id: str, key: str, value: Any):
+        """
+        向某个流程上下文中的列表变量末尾追加一个元素
+
+        列表以 json_lines 格式保存时每个元素占一行，追加时只需要在变量值末尾拼接新的一行，不会读取已有的元素
+
+        :param pipeline_id: 流程 ID
+        :type pipeline_id: str
+        :param key: 变量键
+        :type key: str
+        :param value: 追加的元素
+        :type value: Any
+        """
+        try:
+            line = self._serialize_json_line(value)
+        except TypeError:
+            line = None
+
+        if line is not None:
+            appended = DBContextValue.objects.filter(
+                pipeline_id=pipeline_id,
+                key=key,
+                type=ContextValueType.PLAIN.value,
+                serializer=self.JSON_LINES_SERIALIZER,
+            ).update(value=Concat(F("value"), Value(line), output_field=TextField()), version=unique_id("v"))
+            if appended:
+                return
+
+        # 变量不存在或没有以 json_lines 格式保存时，读取已有的元素后整体写入
+        exist_values = self.get_context_values(pipeline_id, {key})
+        values = exist_values[0].value if exist_values and isinstance(exist_values[0].value, list) else []
+        values.append(value)
+
+        try:
+            serialized, serializer = "".join(self._serialize_json_line(v) for v in values), self.JSON_LINES_SERIALIZER
+        except TypeError:
+            serialized, serializer = self._serialize(values)
+
+        self._upsert_context_value_models(
+            pipeline_id,
+            [
+                DBContextValue(
+                    pipeline_id=pipeline_id,
+                    key=key,
+                    type=ContextValueType.PLAIN.value,
+                    serializer=serializer,
+                    value=serialized,
+                    code="",
+                    references="[]",
+                    version=unique_id("v"),
+                )
+            ],
+        )
+
+    def _upsert_context_value_models(self, pipeline_id: str, context_value_models: List[DBContextValue]):
+        # 与 ORM 写入一样遵循数据库路由
+        connection = connections[router.db_for_write(DBContextValue)]
+        if connection.vendor in _UPSERT_CLAUSES and (
+            connection.vendor != "sqlite" or connection.Database.sqlite_version_info >= (3, 24, 0)
+        ):
+            self._insert_on_conflict_update(connection, context_value_models)
+            return
+
+        # 数据库不支持 upsert 语句时，只查询本次需要写入的变量中已经存在的部分，分别进行批量更新及批量创建
+        exist_ids = dict(
+            DBContextValue.objects.filter(
+                pipeline_id=pipeline_id, key__in=[cv_model.key for cv_model in context_value_models]
+            ).values_list("key", "id")
+        )
+        update_models = []
+        insert_models = []
+        for cv_model in context_value_models:
+            if cv_model.key in exist_ids:
+                cv_model.id = exist_ids[cv_model.key]
+                update_models.append(cv_model)
+            else:
+                insert_models.append(cv_model)
+
+        DBContextValue.objects.bulk_update(update_models, fields=_UPSERT_UPDATE_FIELDS, batch_size=500)
+        DBContextValue.objects.bulk_create(insert_models, batch_size=500)
+
+    @staticmethod
+    def _insert_on_conflict_update(connection, context_value_models: List[DBContextValue]):
+        """
+        使用数据库的 upsert 语句批量写入上下文变量，(pipeline_id, key) 已经存在时更新变量值
+        """
+        quote_name = connection.ops.quote_name
+        fields = [DBContextValue._meta.get_field(name) for name in _UPSERT_INSERT_FIELDS]
+        columns = ", ".join(quote_name(field.column) for field in fields)
+        placeholders = "({})".format(", ".join(["%s"] * len(fields)))
+        update_clause = _UPSERT_CLAUSES[connection.vendor].format(
+            conflict=", ".join(
+                quote_name(DBContextValue._meta.get_field(name).column) for name in ("pipeline_id", "key")
+            ),
+            assignments=", ".join(
+                _UPSERT_ASSIGNMENTS[connection.vendor].format(quote_name(DBContextValue._meta.get_field(name).column))
+                for name in _UPSERT_UPDATE_FIELDS
+            ),
+        )
+        batch_size = max(connection.ops.bulk_batch_size(fields, context_value_models), 1)
+
+        with connection.cursor() as cursor:
+            for i in range(0, len(context_value_models), batch_size):
+                batch = context_value_models[i : i + batch_size]
+                sql = "INSERT INTO {} ({}) VALUES {} {}".format(
+                    quote_name(DBContextValue._meta.db_table),
+                    columns,
+                    ", ".join([placeholders] * len(batch)),
+                    update_clause,
+                )
+                params = [
+                    field.get_db_prep_save(getattr(cv_model, field.attname), connection)
+                    for cv_model in batch
+                    for field in fields
+                ]
+                cursor.execute(sql, params)
 
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CONTEXT_VALUE_READ_TIME)
     def get_context(self, pipeline_id: str) -> List[ContextValue]:
@@ -182,17 +418,9 @@ class ContextMixin(SerializerMixin):
         :return: [description]
         :rtype: List[ContextValue]
         """
-        qs = DBContextValue.objects.filter(pipeline_id=pipeline_id).only("key", "type", "serializer", "value", "code")
+        qs = DBContextValue.objects.filter(pipeline_id=pipeline_id)
 
-        return [
-            ContextValue(
-                key=cv_model.key,
-                type=ContextValueType(cv_model.type),
-                value=self._deserialize(cv_model.value, cv_model.serializer),
-                code=cv_model.code or None,
-            )
-            for cv_model in qs
-        ]
+        return [self._to_context_value(*row) for row in self._iter_context_value_rows(pipeline_id, qs)]
 
     def get_context_outputs(self, pipeline_id: str) -> Set[str]:
         """
@@ -12,7 +12,7 @@ specific language governing permissions and limitations under the License.
 """
 
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from bamboo_engine import metrics, exceptions
 from bamboo_engine.eri import Data, DataInput, ExecutionData, CallbackData
@@ -21,10 +21,14 @@ from pipeline.eri import codec
 from pipeline.eri.models import Data as DBData
 from pipeline.eri.models import ExecutionData as DBExecutionData
 from pipeline.eri.models import CallbackData as DBCallbackData
+from pipeline.eri.imp.node import refresh_input_references
 from pipeline.eri.imp.serializer import SerializerMixin
 
 
 class DataMixin(SerializerMixin):
+    # 最近一次 get_node_bundle 获取到的 (节点 ID, 节点数据)，只在同一个 runtime 实例中被随后的 get_data 使用一次
+    _prefetched_data: Optional[Tuple[str, Data]] = None
+
     def _get_data_inputs(self, inputs: dict):
         return {k: DataInput(need_render=v["need_render"], value=v["value"]) for k, v in inputs.items()}
 
@@ -38,6 +42,10 @@ class DataMixin(SerializerMixin):
         :return: 数据对象实例
         :rtype: Data
         """
+        prefetched, self._prefetched_data = self._prefetched_data, None
+        if prefetched is not None and prefetched[0] == node_id:
+            return prefetched[1]
+
         try:
             data_model = DBData.objects.get(node_id=node_id)
         except DBData.DoesNotExist:
@@ -108,11 +116,13 @@ class DataMixin(SerializerMixin):
         : param data: 目标数据
         : type data: dict
         """
+        self._prefetched_data = None
         inputs = codec.data_json_dumps({k: {"need_render": v.need_render, "value": v.value} for k, v in data.items()})
         if DBData.objects.filter(node_id=node_id).exists():
             DBData.objects.filter(node_id=node_id).update(inputs=inputs)
         else:
             DBData.objects.create(node_id=node_id, inputs=inputs, outputs="{}")
+        refresh_input_references(node_id, data)
 
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_EXEC_DATA_READ_TIME)
     def get_execution_data(self, node_id: str) -> ExecutionData:
@@ -157,7 +167,7 @@ class DataMixin(SerializerMixin):
 
         :param node_id: 节点 ID
         :type node_id: str
-        :return: 执行数据输出
+        :return: 执行数据输出，部分值被转存时返回 LazyBlobDict，只访问未转存的键时不会读取外部存储
         :rtype: dict
         """
         qs = DBExecutionData.objects.filter(node_id=node_id).only("outputs_serializer", "outputs")
@@ -254,7 +264,10 @@ class DataMixin(SerializerMixin):
         :return: 回调数据 ID
         :rtype: int
         """
-        return DBCallbackData.objects.create(node_id=node_id, version=version, data=json.dumps(data)).id
+        serialized, serializer = self._serialize(data)
+        return DBCallbackData.objects.create(
+            node_id=node_id, version=version, data=serialized, serializer=serializer
+        ).id
 
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_CALLBACK_DATA_READ_TIME)
     def get_callback_data(self, data_id: int) -> CallbackData:
@@ -268,7 +281,10 @@ class DataMixin(SerializerMixin):
         """
         data_model = DBCallbackData.objects.get(id=data_id)
         return CallbackData(
-            id=data_model.id, node_id=data_model.node_id, version=data_model.version, data=json.loads(data_model.data)
+            id=data_model.id,
+            node_id=data_model.node_id,
+            version=data_model.version,
+            data=self._deserialize(data_model.data, data_model.serializer),
         )
 
     def serialize_execution_data(self, data: dict) -> (str, str):
@@ -279,7 +295,8 @@ class DataMixin(SerializerMixin):
         :param data: 执行数据实例
         :return: 序列化数据，序列化器标记
         """
-        return self._serialize(data)
+        # 序列化结果会作为中断检查点保存，不会被数据行引用，不进行转存
+        return self._serialize(data, offload=False)
 
     def deserialize_execution_data(self, data: str, serializer: str) -> dict:
         """
@@ -12,14 +12,20 @@ specific language governing permissions and limitations under the License.
 """
 
 import json
+from typing import Dict, Iterable, Optional
 
+from django.conf import settings
+from django.db.models import Case, F, Q, TextField, Value, When
+from pipeline.eri.models import ContextValue as DBContextValue
 from pipeline.eri.models import Node as DBNode
+from pipeline.eri.utils import caculate_node_references
 
 from bamboo_engine import metrics
 from bamboo_engine.eri import (
     Condition,
     ConditionalParallelGateway,
     ConvergeGateway,
+    DataInput,
     DefaultCondition,
     EmptyEndEvent,
     EmptyStartEvent,
@@ -27,11 +33,166 @@ from bamboo_engine.eri import (
     ExecutableEndEvent,
     LoopControlConfig,
     Node,
+    NodeReferences,
     NodeType,
     ParallelGateway,
     ServiceActivity,
     SubProcess,
 )
+from bamboo_engine.template import Template
+from bamboo_engine.utils.collections import LRUCache
+
+# worker 进程内共享的节点定义缓存，execute 与 schedule 任务中创建的 runtime 实例共用同一份，缓存值为 (节点详情版本, Node)
+_node_cache: Optional[LRUCache] = None
+
+
+def get_node_cache() -> LRUCache:
+    """
+    获取节点定义缓存，缓存容量和有效期分别由 BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE
+    和 BAMBOO_DJANGO_ERI_NODE_CACHE_TTL 配置，容量为 0 时不开启缓存
+    """
+    global _node_cache
+    if _node_cache is None:
+        _node_cache = LRUCache(
+            maxsize=int(getattr(settings, "BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE", 0)),
+            ttl=getattr(settings, "BAMBOO_DJANGO_ERI_NODE_CACHE_TTL", 30),
+        )
+    return _node_cache
+
+
+def get_cached_node(node_id: str, revision: int) -> Optional[Node]:
+    """
+    获取缓存中的节点定义，缓存的节点详情版本与数据库中的版本不一致时视为未命中
+
+    :param node_id: 节点 ID
+    :type node_id: str
+    :param revision: 数据库中的节点详情版本
+    :type revision: int
+    :return: Node 实例
+    :rtype: Optional[Node]
+    """
+    item = get_node_cache().get(node_id)
+    if item is None or item[0] != revision:
+        return None
+    return item[1]
+
+
+def stale_detail(cached_revision: Optional[int]):
+    """
+    只在数据库中的节点详情版本与缓存的版本不一致时读取节点详情的查询表达式，缓存命中时该表达式的值为 None
+
+    :param cached_revision: 缓存的节点详情版本，未缓存时为 None
+    :type cached_revision: Optional[int]
+    """
+    if cached_revision is None:
+        return F("detail")
+    return Case(When(revision=cached_revision, then=Value(None)), default=F("detail"), output_field=TextField())
+
+
+def cache_node(node_id: str, revision: int, node: Node):
+    get_node_cache().set(node_id, (revision, node))
+
+
+def invalidate_node_cache(*node_ids: str):
+    """
+    使当前进程中缓存的节点定义失效，其他进程中的缓存会在下次读取时因节点详情版本不一致而失效
+
+    :param node_ids: 节点 ID
+    :type node_ids: str
+    """
+    cache = get_node_cache()
+    for node_id in node_ids:
+        cache.pop(node_id)
+
+
+def update_node_detail(node_id: str, node_detail: dict):
+    """
+    更新节点详情并递增节点详情版本，节点详情被修改时都需要通过该函数进行
+
+    :param node_id: 节点 ID
+    :type node_id: str
+    :param node_detail: 新的节点详情
+    :type node_detail: dict
+    """
+    DBNode.objects.filter(node_id=node_id).update(detail=json.dumps(node_detail), revision=F("revision") + 1)
+    invalidate_node_cache(node_id)
+
+
+def _update_node_references(node_id: str, node_detail: dict, references: dict):
+    node_detail["references"] = references
+    update_node_detail(node_id, node_detail)
+
+
+def refresh_input_references(node_id: str, inputs: Dict[str, DataInput]):
+    """
+    节点输入被修改后重新计算 prepare 阶段保存在节点详情中的输入引用
+
+    :param node_id: 节点 ID
+    :type node_id: str
+    :param inputs: 新的节点输入
+    :type inputs: Dict[str, DataInput]
+    """
+    detail = DBNode.objects.filter(node_id=node_id).values_list("detail", flat=True).first()
+    if detail is None:
+        return
+
+    node_detail = json.loads(detail)
+    if "references" not in node_detail:
+        return
+
+    direct = Template({k: di.value for k, di in inputs.items() if di.need_render}).get_reference()
+    final_references = {
+        key: set(json.loads(references or "[]"))
+        for key, references in DBContextValue.objects.filter(
+            pipeline_id=node_detail["parent_pipeline_id"], key__in=direct
+        ).values_list("key", "references")
+    }
+    _update_node_references(node_id, node_detail, caculate_node_references(direct, final_references))
+
+
+def refresh_closure_references(pipeline_id: str, final_references: Dict[str, set], changed_keys: Iterable[str]):
+    """
+    流程上下文的变量引用关系发生变化后，重新计算该流程中直接引用了这些变量的节点保存的引用闭包
+
+    :param pipeline_id: 流程 ID
+    :type pipeline_id: str
+    :param final_references: 流程上下文中所有变量最新的最终引用
+    :type final_references: Dict[str, set]
+    :param changed_keys: 最终引用发生变化的变量
+    :type changed_keys: Iterable[str]
+    """
+    changed_keys = set(changed_keys)
+    if not changed_keys:
+        return
+
+    # 子流程中节点的根流程需要通过子流程节点获取
+    root_pipeline_id = (
+        DBNode.objects.filter(node_id=pipeline_id).values_list("root_pipeline_id", flat=True).first() or pipeline_id
+    )
+    # 节点详情中以 json 字符串的形式保存了直接引用的变量，先通过文本匹配过滤掉不可能引用了这些变量的节点
+    key_filter = Q()
+    for key in changed_keys:
+        key_filter |= Q(detail__contains=json.dumps(key))
+
+    update_nodes = []
+    for db_node in DBNode.objects.filter(key_filter, root_pipeline_id=root_pipeline_id).only("id", "node_id", "detail"):
+        node_detail = json.loads(db_node.detail)
+        if node_detail["parent_pipeline_id"] != pipeline_id or "references" not in node_detail:
+            continue
+
+        direct = set(node_detail["references"]["direct"])
+        if direct.isdisjoint(changed_keys):
+            continue
+
+        references = caculate_node_references(direct, final_references)
+        if references != node_detail["references"]:
+            node_detail["references"] = references
+            db_node.detail = json.dumps(node_detail)
+            db_node.revision = F("revision") + 1
+            update_nodes.append(db_node)
+
+    DBNode.objects.bulk_update(update_nodes, fields=["detail", "revision"], batch_size=500)
+    invalidate_node_cache(*[db_node.node_id for db_node in update_nodes])
 
 
 class NodeMixin:
@@ -39,6 +200,7 @@ class NodeMixin:
         node_detail = json.loads(node.detail)
         node_type = node_detail["type"]
         targets = node_detail["targets"]
+        references = node_detail.get("references")
         common_args = dict(
             id=node.node_id,
             target_flows=list(targets.keys()),
@@ -50,6 +212,9 @@ class NodeMixin:
             name=node_detail.get("name"),
             can_retry=node_detail["can_retry"],
             reserve_rollback=node_detail.get("reserve_rollback", False),
+            references=NodeReferences(direct=set(references["direct"]), closure=set(references["closure"]))
+            if references is not None
+            else None,
         )
 
         if node_type == NodeType.ServiceActivity.value:
@@ -130,8 +295,27 @@ class NodeMixin:
         :return: Node 实例
         :rtype: Node
         """
-        node = DBNode.objects.get(node_id=node_id)
-        return self._get_node(node)
+        if not get_node_cache().enabled:
+            return self._get_node(DBNode.objects.get(node_id=node_id))
+
+        # 节点详情可能在其他进程中被修改，在同一次查询中确认节点详情版本，版本一致时不读取节点详情
+        cached = get_node_cache().get(node_id)
+        row = (
+            DBNode.objects.filter(node_id=node_id)
+            .annotate(stale_detail=stale_detail(cached[0] if cached is not None else None))
+            .values_list("revision", "stale_detail")
+            .first()
+        )
+        if row is None:
+            raise DBNode.DoesNotExist("Node with node_id({}) does not exist".format(node_id))
+
+        revision, detail = row
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+
+        node = self._get_node(DBNode(node_id=node_id, detail=detail))
+        cache_node(node_id, revision, node)
+        return node
 
     @metrics.setup_histogram(metrics.ENGINE_RUNTIME_NODE_READ_TIME)
     def update_node_loop_times(self, node_id: str, loop_times: int):
@@ -157,4 +341,4 @@ class NodeMixin:
         loop_config["loop_times"] = loop_times
         node_detail["loop_config"] = loop_config
 
-        DBNode.objects.filter(node_id=node_id).update(detail=json.dumps(node_detail))
+        update_node_detail(node_id, node_detail)
@@ -205,6 +205,26 @@ class ProcessMixin:
         """
         Process.objects.filter(id=process_id).update(current_node_id=node_id)
 
+    def enter_node(self, process_id: int, node_id: str, wake_up: bool = False, beat: bool = True):
+        """
+        进程进入某个节点时通过一次更新设置进程心跳及当前处理节点，wake_up 为 True 时同时将进程标记为唤醒状态
+
+        :param process_id: 进程 ID
+        :type process_id: int
+        :param node_id: 节点 ID
+        :type node_id: str
+        :param wake_up: 是否将进程标记为唤醒状态
+        :type wake_up: bool
+        :param beat: 是否更新进程心跳
+        :type beat: bool
+        """
+        fields = {"current_node_id": node_id}
+        if beat:
+            fields["last_heartbeat"] = timezone.now()
+        if wake_up:
+            fields["asleep"] = False
+        Process.objects.filter(id=process_id).update(**fields)
+
     def child_process_finish(self, parent_id: int, process_id: int) -> bool:
         """
         标记某个进程的子进程执行完成，并返回是否能够唤醒父进程继续执行的标志位
@@ -11,26 +11,527 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import base64
 import json
 import pickle
 import codecs
-from typing import Any, Tuple
+import copy
+import io
+import re
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+from django.conf import settings
+
+from bamboo_engine import metrics
+
+from pipeline.eri.imp.blob import get_blob_store
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_JSON_TYPES = (dict, list, tuple, str, int, float, bool, type(None))
+_JSON_TYPE_SET = frozenset(_JSON_TYPES)
+# pickle 中 BINFLOAT 操作码及指数位全为 1 的浮点数（nan、inf 及 -inf）
+_NON_FINITE_FLOAT_PATTERN = re.compile(rb"G[\x7f\xff][\xf0-\xff]")
+
+
+def maybe_json_serializable(data: Any) -> bool:
+    """
+    序列化前的类型预检查，只检查数据本身及其直接包含的元素，明显无法使用 json 序列化的数据可以直接使用 pickle 序列化，
+    更深层的元素由序列化器在序列化时检查
+
+    :param data: 待序列化数据
+    :type data: Any
+    :return: 是否有可能使用 json 序列化
+    :rtype: bool
+    """
+    data_type = type(data)
+    if data_type is dict:
+        values = data.values()
+    elif data_type is list or data_type is tuple:
+        values = data
+    else:
+        return isinstance(data, _JSON_TYPES)
+
+    return _JSON_TYPE_SET.issuperset(map(type, values)) or all(isinstance(v, _JSON_TYPES) for v in values)
+
+
+class Serializer:
+    """
+    序列化器，name 会保存在数据表的 *_serializer 字段中，读取时根据该字段选择序列化器
+    """
+
+    name = None
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def dumps(self, data: Any) -> str:
+        raise NotImplementedError()
+
+    def loads(self, data: str) -> Any:
+        raise NotImplementedError()
+
+
+class JsonSerializer(Serializer):
+    name = "json"
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data)
+
+    def loads(self, data: str) -> Any:
+        return json.loads(data)
+
+
+class _OrjsonLosslessChecker(pickle.Pickler):
+    """
+    借助 C 实现的 pickle 遍历数据，None、布尔值及 int、float、str、bytes、dict、list、tuple 等内置类型
+    以外的对象（包括内置类型的子类）都会经过 reducer_override（python 3.8 及以上版本）
+    """
+
+    def reducer_override(self, obj: Any):
+        raise TypeError("{} can not be serialized by orjson without loss".format(type(obj).__name__))
+
+
+def ensure_orjson_lossless(data: Any):
+    """
+    orjson 会将 uuid 及枚举序列化为对应的值，将 nan 及 inf 序列化为 null，反序列化后无法还原，
+    数据中包含这些值或其他非 json 原生类型的值时抛出异常，由调用方退回到标准库 json 或 pickle
+
+    逐个元素检查类型的 python 循环比 orjson 序列化本身慢得多，这里借助 pickle 完成遍历：非原生类型的对象会触发
+    reducer_override，浮点数以 BINFLOAT 操作码加 8 字节大端序数据写入，指数位全为 1 即为 nan 或 inf，
+    其他数据中恰好出现相同的字节时只会多退回一次标准库 json，不影响结果
+
+    :param data: 待序列化数据
+    :type data: Any
+    """
+    buffer = io.BytesIO()
+    _OrjsonLosslessChecker(buffer, protocol=4).dump(data)
+    if _NON_FINITE_FLOAT_PATTERN.search(buffer.getbuffer()):
+        raise ValueError("out of range float values can not be serialized by orjson without loss")
+
+
+class OrjsonSerializer(Serializer):
+    """
+    只序列化由 json 原生类型组成的数据，其余数据会退回到标准库 json 或 pickle，保证反序列化结果与标准库 json 一致
+    """
+
+    name = "orjson"
+
+    @property
+    def available(self) -> bool:
+        # 无损检查依赖 python 3.8 引入的 Pickler.reducer_override
+        return orjson is not None and sys.version_info >= (3, 8)
+
+    def dumps(self, data: Any) -> str:
+        ensure_orjson_lossless(data)
+        # 与标准库 json 保持一致，datetime、dataclass 及内置类型的子类不会被序列化
+        return orjson.dumps(
+            data,
+            option=orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_PASSTHROUGH_SUBCLASS,
+        ).decode()
+
+    def loads(self, data: str) -> Any:
+        # orjson 的输出是标准的 json，未安装 orjson 时仍然可以读取
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    """
+    msgpack 序列化结果为二进制数据，以 base64 编码后保存，与 json 不同，字典的非字符串键在反序列化后会保持原有类型
+    """
+
+    name = "msgpack"
+
+    @property
+    def available(self) -> bool:
+        return msgpack is not None
+
+    def dumps(self, data: Any) -> str:
+        return codecs.encode(msgpack.packb(data), "base64").decode()
+
+    def loads(self, data: str) -> Any:
+        return msgpack.unpackb(codecs.decode(data.encode(), "base64"), strict_map_key=False)
+
+
+class PickleSerializer(Serializer):
+    name = "pickle"
+
+    def dumps(self, data: Any) -> str:
+        return codecs.encode(pickle.dumps(data), "base64").decode()
+
+    def loads(self, data: str) -> Any:
+        return pickle.loads(codecs.decode(data.encode(), "base64"))
+
+
+class JsonLinesSerializer(Serializer):
+    """
+    列表的每个元素以 json 格式保存为一行，用于只追加写入的列表变量
+    """
+
+    name = "json_lines"
+
+    def dumps(self, data: Any) -> str:
+        return "".join(self.dumps_line(item) for item in data)
+
+    def dumps_line(self, data: Any) -> str:
+        return json.dumps(data) + "\n"
+
+    def loads(self, data: str) -> Any:
+        return [json.loads(line) for line in data.split("\n") if line]
+
+
+SERIALIZERS: Dict[str, Serializer] = {
+    serializer.name: serializer
+    for serializer in (
+        JsonSerializer(),
+        OrjsonSerializer(),
+        MsgpackSerializer(),
+        PickleSerializer(),
+        JsonLinesSerializer(),
+    )
+}
+
+
+def register_serializer(serializer: Serializer):
+    """
+    注册自定义序列化器，序列化器的 name 一旦写入数据库就不应该再修改
+
+    :param serializer: 序列化器实例
+    :type serializer: Serializer
+    """
+    SERIALIZERS[serializer.name] = serializer
+
+
+def get_serializer(name: str) -> Serializer:
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError("unsupport serializer type: {}".format(name))
+
+
+class Compressor:
+    """
+    压缩器，压缩后的数据以 base64 编码保存，name 会以 {serializer}+{compressor} 的形式记录在 *_serializer 字段中
+    """
+
+    name = None
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+
+class ZlibCompressor(Compressor):
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompressor(Compressor):
+    name = "zstd"
+
+    @property
+    def available(self) -> bool:
+        return zstandard is not None
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor().compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+COMPRESSORS: Dict[str, Compressor] = {
+    compressor.name: compressor for compressor in (ZlibCompressor(), ZstdCompressor())
+}
+
+
+def register_compressor(compressor: Compressor):
+    """
+    注册自定义压缩器，压缩器的 name 一旦写入数据库就不应该再修改
+
+    :param compressor: 压缩器实例
+    :type compressor: Compressor
+    """
+    COMPRESSORS[compressor.name] = compressor
+
+
+def get_compressor(name: str) -> Compressor:
+    try:
+        return COMPRESSORS[name]
+    except KeyError:
+        raise ValueError("unsupport compressor type: {}".format(name))
+
+
+class OffloadedValue:
+    """
+    被转存到外部存储中的字典值，data 及 serializer 为 SerializerMixin._deserialize 的参数
+    """
+
+    __slots__ = ("data", "serializer")
+
+    def __init__(self, data: str, serializer: str):
+        self.data = data
+        self.serializer = serializer
+
+    def __repr__(self):
+        return "<OffloadedValue {}>".format(self.data)
+
+
+class LazyBlobDict(dict):
+    """
+    部分值被转存到外部存储中的字典，被转存的值在第一次被访问时才会从外部存储中加载，只访问未转存的键时不会读取外部存储
+
+    复制（dict(...)、json.dumps、pickle 及 deepcopy 等）时会加载所有的值，
+    未被访问过的值在重新序列化时会直接复用原有的键，不会被加载及重新转存
+    """
+
+    def __init__(self, data: dict, loader: Callable[[str, str], Any]):
+        super().__init__(data)
+        self._loader = loader
+
+    def set_offloaded(self, key: str, value: OffloadedValue):
+        dict.__setitem__(self, key, value)
+
+    def raw_items(self):
+        """
+        返回未加载转存值的键值对，未被访问过的转存值为 OffloadedValue
+        """
+        return dict.items(self)
+
+    def has_offloaded(self) -> bool:
+        return any(isinstance(v, OffloadedValue) for v in dict.values(self))
+
+    def _resolve(self, key: Any, value: Any) -> Any:
+        if isinstance(value, OffloadedValue):
+            value = self._loader(value.data, value.serializer)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def _resolve_all(self):
+        for key, value in list(dict.items(self)):
+            self._resolve(key, value)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve(key, dict.__getitem__(self, key))
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def pop(self, key: Any, *args) -> Any:
+        if key not in self:
+            return dict.pop(self, key, *args)
+        value = self[key]
+        dict.__delitem__(self, key)
+        return value
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key, value = dict.popitem(self)
+        return key, self._resolve(key, value)
+
+    # 覆盖 __iter__ 后 dict(...) 及 {**...} 会通过 keys 及 __getitem__ 复制数据，保证复制结果中不包含 OffloadedValue
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def values(self):
+        self._resolve_all()
+        return dict.values(self)
+
+    def items(self):
+        self._resolve_all()
+        return dict.items(self)
+
+    def copy(self) -> "LazyBlobDict":
+        return LazyBlobDict(dict.copy(self), self._loader)
+
+    def __eq__(self, other: Any) -> bool:
+        self._resolve_all()
+        if isinstance(other, LazyBlobDict):
+            other._resolve_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> bool:
+        return not self == other
+
+    def __or__(self, other: Any) -> dict:
+        return {**self, **other}
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return copy.deepcopy(dict(self), memo)
 
 
 class SerializerMixin:
-    JSON_SERIALIZER = "json"
-    PICKLE_SERIALIZER = "pickle"
+    JSON_SERIALIZER = JsonSerializer.name
+    PICKLE_SERIALIZER = PickleSerializer.name
+    JSON_LINES_SERIALIZER = JsonLinesSerializer.name
+    BLOB_LAYER = "blob"
+    # 值被分别转存的字典，数据表中保存未转存的值及各个转存值的键
+    BLOB_DICT_SERIALIZER = "blob_dict"
 
     def _deserialize(self, data: str, serializer: str) -> Any:
-        if serializer == self.JSON_SERIALIZER:
-            return json.loads(data)
-        elif serializer == self.PICKLE_SERIALIZER:
-            return pickle.loads(codecs.decode(data.encode(), "base64"))
-        else:
-            raise ValueError("unsupport serializer type: {}".format(serializer))
-
-    def _serialize(self, data: Any) -> Tuple[str, str]:
+        if serializer == self.BLOB_DICT_SERIALIZER:
+            envelope = json.loads(data)
+            result = LazyBlobDict(self._deserialize(*envelope["inline"]), self._deserialize)
+            for key, (blob_data, blob_serializer) in envelope["blobs"].items():
+                result.set_offloaded(key, OffloadedValue(blob_data, blob_serializer))
+            return result
+
+        if "+" in serializer:
+            # 写入时依次进行了压缩及转存，读取时按相反的顺序还原
+            serializer, *layers = serializer.split("+")
+            for layer in reversed(layers):
+                if layer == self.BLOB_LAYER:
+                    data = get_blob_store().load(data)
+                    continue
+
+                compressor = get_compressor(layer)
+                with metrics.observe(
+                    metrics.ENGINE_RUNTIME_DATA_DECOMPRESS_TIME, hostname=metrics.HOST_NAME, compressor=compressor.name
+                ):
+                    data = compressor.decompress(base64.b64decode(data)).decode()
+
+        return get_serializer(serializer).loads(data)
+
+    def _serialize(self, data: Any, offload: bool = True) -> Tuple[str, str]:
+        """
+        使用 BAMBOO_DJANGO_ERI_SERIALIZER 配置的序列化器序列化数据（默认为 json），
+        配置的序列化器无法序列化时依次退回到标准库 json 及 pickle，
+        序列化结果的长度超过 BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD 时会再进行压缩，
+        压缩后的长度仍然超过 BAMBOO_DJANGO_ERI_BLOB_THRESHOLD 时会转存到外部存储中，
+        键均为字符串的字典会将超过阈值的值分别转存，其余数据整体转存，数据表中只保存数据的键
+
+        :param data: 待序列化数据
+        :type data: Any
+        :param offload: 是否允许转存到外部存储中
+        :type offload: bool
+        :return: 序列化数据，序列化器标记
+        :rtype: Tuple[str, str]
+        """
+        blob_threshold = getattr(settings, "BAMBOO_DJANGO_ERI_BLOB_THRESHOLD", 0) if offload else 0
+
+        # 包含未加载转存值的字典直接复用原有的键，避免加载后再重新转存
+        if blob_threshold and isinstance(data, LazyBlobDict) and data.has_offloaded():
+            return self._offload_dict(data, blob_threshold)
+
+        serialized, serializer = self._dumps_and_compress(data)
+
+        if blob_threshold and len(serialized) >= blob_threshold:
+            if isinstance(data, dict) and all(type(key) is str for key in data):
+                return self._offload_dict(data, blob_threshold)
+            serialized, serializer = get_blob_store().save(serialized), "{}+{}".format(serializer, self.BLOB_LAYER)
+
+        return serialized, serializer
+
+    def _dumps_and_compress(self, data: Any) -> Tuple[str, str]:
+        serialized, serializer = self._dumps(data)
+
+        threshold = getattr(settings, "BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD", 0)
+        if threshold and len(serialized) >= threshold:
+            serialized, serializer = self._compress(serialized, serializer)
+
+        return serialized, serializer
+
+    def _offload_dict(self, data: dict, blob_threshold: int) -> Tuple[str, str]:
+        raw_items = data.raw_items() if isinstance(data, LazyBlobDict) else data.items()
+
+        inline = {}
+        blobs = {}
+        for key, value in raw_items:
+            if isinstance(value, OffloadedValue):
+                blobs[key] = [value.data, value.serializer]
+                continue
+
+            serialized, serializer = self._dumps_and_compress(value)
+            if len(serialized) >= blob_threshold:
+                blobs[key] = [get_blob_store().save(serialized), "{}+{}".format(serializer, self.BLOB_LAYER)]
+            else:
+                inline[key] = value
+
+        # 未超过阈值的值合计仍然超过阈值时整体转存
+        inline_serialized, inline_serializer = self._dumps_and_compress(inline)
+        if len(inline_serialized) >= blob_threshold:
+            inline_serialized, inline_serializer = get_blob_store().save(inline_serialized), "{}+{}".format(
+                inline_serializer, self.BLOB_LAYER
+            )
+
+        envelope = {"inline": [inline_serialized, inline_serializer], "blobs": blobs}
+        return json.dumps(envelope), self.BLOB_DICT_SERIALIZER
+
+    def _dumps(self, data: Any) -> Tuple[str, str]:
+        if not maybe_json_serializable(data):
+            return get_serializer(self.PICKLE_SERIALIZER).dumps(data), self.PICKLE_SERIALIZER
+
+        serializer = get_serializer(getattr(settings, "BAMBOO_DJANGO_ERI_SERIALIZER", self.JSON_SERIALIZER))
+        if serializer.name != self.JSON_SERIALIZER and serializer.available:
+            try:
+                return serializer.dumps(data), serializer.name
+            except (TypeError, ValueError, OverflowError):
+                pass
+
         try:
             return json.dumps(data), self.JSON_SERIALIZER
         except TypeError:
-            return codecs.encode(pickle.dumps(data), "base64").decode(), self.PICKLE_SERIALIZER
+            return get_serializer(self.PICKLE_SERIALIZER).dumps(data), self.PICKLE_SERIALIZER
+
+    def _compress(self, serialized: str, serializer: str) -> Tuple[str, str]:
+        compressor = get_compressor(getattr(settings, "BAMBOO_DJANGO_ERI_COMPRESSOR", ZlibCompressor.name))
+        if not compressor.available:
+            return serialized, serializer
+
+        start = time.perf_counter()
+        compressed = base64.b64encode(compressor.compress(serialized.encode())).decode()
+        metrics.ENGINE_RUNTIME_DATA_COMPRESS_TIME.labels(
+            hostname=metrics.HOST_NAME, compressor=compressor.name
+        ).observe(time.perf_counter() - start)
+        metrics.ENGINE_RUNTIME_DATA_COMPRESS_RATIO.labels(
+            hostname=metrics.HOST_NAME, compressor=compressor.name
+        ).observe(len(compressed) / len(serialized))
+
+        # 压缩效果不明显的数据保持原样，避免读取时额外的解压开销
+        if len(compressed) >= len(serialized):
+            return serialized, serializer
+
+        return compressed, "{}+{}".format(serializer, compressor.name)
+
+    def _serialize_json_line(self, data: Any) -> str:
+        return get_serializer(self.JSON_LINES_SERIALIZER).dumps_line(data)
@@ -13,7 +13,9 @@ specific language governing permissions and limitations under the License.
 
 from typing import Dict, List, Optional
 
+from django.db.models import F
 from django.utils import timezone
+from pipeline.eri.models import ControlEpoch
 from pipeline.eri.models import State as DBState
 from pipeline.eri.signals import post_set_state
 
@@ -139,6 +141,34 @@ class StateMixin:
         qs = DBState.objects.filter(node_id__in=node_id_list).only("node_id", "name")
         return {state.node_id: state.name for state in qs}
 
+    def get_control_epoch(self, root_pipeline_id: str) -> Optional[int]:
+        """
+        获取根流程的控制版本号
+
+        :param root_pipeline_id: 根流程 ID
+        :type root_pipeline_id: str
+        :return: 控制版本号，根流程未被暂停、撤销或继续过时返回 0
+        :rtype: Optional[int]
+        """
+        epoch = ControlEpoch.objects.filter(root_pipeline_id=root_pipeline_id).values_list("epoch", flat=True).first()
+        return epoch or 0
+
+    def bump_control_epoch(self, pipeline_id: str):
+        """
+        增加流程所属根流程的控制版本号
+
+        :param pipeline_id: 流程 ID，可以是根流程或子流程 ID
+        :type pipeline_id: str
+        """
+        root_id = DBState.objects.filter(node_id=pipeline_id).values_list("root_id", flat=True).first()
+        root_pipeline_id = root_id or pipeline_id
+
+        updated = ControlEpoch.objects.filter(root_pipeline_id=root_pipeline_id).update(epoch=F("epoch") + 1)
+        if not updated:
+            _, created = ControlEpoch.objects.get_or_create(root_pipeline_id=root_pipeline_id, defaults={"epoch": 1})
+            if not created:
+                ControlEpoch.objects.filter(root_pipeline_id=root_pipeline_id).update(epoch=F("epoch") + 1)
+
     def has_state(self, node_id: str) -> bool:
         """
         是否存在某个节点的的状态
@@ -13,9 +13,12 @@ specific language governing permissions and limitations under the License.
 
 import time
 import logging
+from contextlib import contextmanager
 from typing import Optional
 
 from celery import current_app
+from django.db import transaction
+from bamboo_engine import metrics
 from bamboo_engine.eri.models import ExecuteInterruptPoint, ScheduleInterruptPoint
 
 from pipeline.eri.celery.queues import QueueResolver
@@ -36,6 +39,27 @@ def _retry_once(action: callable):
 
 
 class TaskMixin:
+    _in_node_transaction = False
+
+    @contextmanager
+    def node_transaction(self):
+        """
+        将引擎处理一个节点时产生的所有写入放在同一个事务中，事务中派发的任务会在事务提交后发送
+        """
+        self._in_node_transaction = True
+        try:
+            with transaction.atomic():
+                yield
+        finally:
+            self._in_node_transaction = False
+
+    def _send_task(self, action: callable):
+        metrics.record_broker_publish()
+        if self._in_node_transaction:
+            transaction.on_commit(lambda: _retry_once(action=action))
+        else:
+            _retry_once(action=action)
+
     def _get_task_route_params(self, task_name: str, queue: str, priority: int):
         resolver = QueueResolver(queue)
         queue, routing_key = resolver.resolve_task_queue_and_routing_key(task_name)
@@ -98,7 +122,7 @@ class TaskMixin:
                 result.id,
             )
 
-        _retry_once(action=action)
+        self._send_task(action=action)
 
     def schedule(
         self,
@@ -139,7 +163,7 @@ class TaskMixin:
             )
             logger.info("[pipeline-trace] node(%s) schedule task %s sended", node_id, result.id)
 
-        _retry_once(action=action)
+        self._send_task(action=action)
 
     def set_next_schedule(
         self,
@@ -184,4 +208,4 @@ class TaskMixin:
             )
             logger.info("[pipeline-trace] node(%s) schedule task %s sended", node_id, result.id)
 
-        _retry_once(action=action)
+        self._send_task(action=action)
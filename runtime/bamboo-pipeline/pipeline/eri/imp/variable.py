@@ -19,15 +19,45 @@ from pipeline.core.data.var import Variable
 from bamboo_engine.eri import Variable as VariableInterface
 
 
+# 变量类的反射结果在进程内不会发生变化，每个变量类只生成一次代理类
+_proxy_classes = {}
+
+# 由 VariableProxy.__init__ 设置的实例属性，变量类中的同名函数不会复制到代理类上
+_PROXY_INSTANCE_ATTRS = frozenset(["original_value", "pipeline_data", "inner_loop"])
+
+
+def _get_proxy_class(var_cls: Type) -> Type:
+    proxy_cls = _proxy_classes.get(var_cls)
+    if proxy_cls is not None:
+        return proxy_cls
+
+    # 变量类中的函数以 staticmethod 的形式放到代理类上，访问时与设置为实例属性一样不会绑定到代理实例
+    attrs = {"get_value": staticmethod(getattr(var_cls, "get_value"))}
+    for name, value in inspect.getmembers(var_cls):
+        if (
+            not name.startswith("__")
+            and name not in attrs
+            and name not in _PROXY_INSTANCE_ATTRS
+            and not hasattr(VariableProxy, name)
+            and inspect.isfunction(value)
+        ):
+            attrs[name] = staticmethod(value)
+
+    proxy_cls = type("{}Proxy".format(var_cls.__name__), (VariableProxy,), attrs)
+    _proxy_classes[var_cls] = proxy_cls
+    return proxy_cls
+
+
 class VariableProxy:
+    def __new__(cls, original_value: Variable, var_cls: Type, pipeline_data: dict, inner_loop: int):
+        if cls is VariableProxy:
+            cls = _get_proxy_class(var_cls)
+        return super().__new__(cls)
+
     def __init__(self, original_value: Variable, var_cls: Type, pipeline_data: dict, inner_loop: int):
-        self.get_value = getattr(var_cls, "get_value")
         self.original_value = original_value
         self.pipeline_data = pipeline_data
         self.inner_loop = inner_loop
-        for name, value in inspect.getmembers(var_cls):
-            if not name.startswith("__") and not hasattr(self, name) and inspect.isfunction(value):
-                setattr(self, name, value)
 
     def get(self) -> Any:
         self.value = self.original_value.get()
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eri', '0005_auto_20220422_1048'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='node',
+            name='root_pipeline_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=33, verbose_name='根流程 ID'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eri', '0006_node_root_pipeline_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ControlEpoch',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('root_pipeline_id', models.CharField(max_length=33, unique=True, verbose_name='根流程 ID')),
+                ('epoch', models.BigIntegerField(default=0, verbose_name='控制版本号')),
+            ],
+        ),
+    ]
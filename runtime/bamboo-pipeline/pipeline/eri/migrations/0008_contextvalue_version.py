@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eri', '0007_controlepoch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contextvalue',
+            name='version',
+            field=models.CharField(blank=True, default='', max_length=33, verbose_name='变量值版本'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eri', '0008_contextvalue_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callbackdata',
+            name='serializer',
+            field=models.CharField(default='json', max_length=32, verbose_name='序列化器'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eri', '0009_callbackdata_serializer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='node',
+            name='revision',
+            field=models.IntegerField(default=0, verbose_name='节点详情版本'),
+        ),
+    ]
@@ -37,7 +37,9 @@ class Process(models.Model):
 class Node(models.Model):
     id = models.BigAutoField(_("ID"), primary_key=True)
     node_id = models.CharField(_("节点 ID"), null=False, max_length=33, db_index=True)
+    root_pipeline_id = models.CharField(_("根流程 ID"), default="", max_length=33, db_index=True, blank=True)
     detail = models.TextField(_("节点详情"), null=False)
+    revision = models.IntegerField(_("节点详情版本"), default=0)
 
 
 class State(models.Model):
@@ -57,6 +59,12 @@ class State(models.Model):
     archived_time = models.DateTimeField(_("归档时间"), null=True, blank=True)
 
 
+class ControlEpoch(models.Model):
+    id = models.BigAutoField(_("ID"), primary_key=True)
+    root_pipeline_id = models.CharField(_("根流程 ID"), null=False, max_length=33, unique=True)
+    epoch = models.BigIntegerField(_("控制版本号"), default=0)
+
+
 class Schedule(models.Model):
     id = models.BigAutoField(_("ID"), primary_key=True)
     type = models.IntegerField(_("调度类型"))
@@ -92,6 +100,7 @@ class CallbackData(models.Model):
     id = models.BigAutoField(_("ID"), primary_key=True)
     node_id = models.CharField(_("节点 ID"), null=False, max_length=33)
     version = models.CharField(_("状态版本"), null=False, max_length=33)
+    serializer = models.CharField(_("序列化器"), null=False, default="json", max_length=32)
     data = models.TextField(_("回调数据"))
 
 
@@ -104,6 +113,7 @@ class ContextValue(models.Model):
     code = models.CharField(_("计算型变量类型唯一标志"), default="", max_length=128, blank=True)
     value = models.TextField(_("变量值"))
     references = models.TextField(_("所有对其他变量直接或间接的引用"))
+    version = models.CharField(_("变量值版本"), default="", max_length=33, blank=True)
 
     class Meta:
         unique_together = ["pipeline_id", "key"]
@@ -19,6 +19,7 @@ from django.db import transaction
 from kombu import Connection, Exchange, Queue
 from pipeline.eri import codec
 from pipeline.eri.celery.queues import QueueResolver
+from pipeline.eri.imp.bundle import NodeBundleMixin
 from pipeline.eri.imp.config import ConfigMixin
 from pipeline.eri.imp.context import ContextMixin
 from pipeline.eri.imp.data import DataMixin
@@ -43,7 +44,11 @@ from pipeline.eri.models import (
     Process,
     State,
 )
-from pipeline.eri.utils import CONTEXT_VALUE_TYPE_MAP, caculate_final_references
+from pipeline.eri.utils import (
+    CONTEXT_VALUE_TYPE_MAP,
+    caculate_final_references,
+    caculate_node_references,
+)
 
 from bamboo_engine import states
 from bamboo_engine.eri import (
@@ -53,6 +58,7 @@ from bamboo_engine.eri import (
     interfaces,
 )
 from bamboo_engine.template import Template
+from bamboo_engine.utils.string import unique_id
 
 
 class BambooDjangoRuntime(
@@ -63,6 +69,7 @@ class BambooDjangoRuntime(
     ScheduleMixin,
     StateMixin,
     NodeMixin,
+    NodeBundleMixin,
     ProcessMixin,
     PipelinePluginManagerMixin,
     HooksMixin,
@@ -121,9 +128,14 @@ class BambooDjangoRuntime(
                 inputs[k]["need_render"] = False
         return inputs, context_values
 
+    @staticmethod
+    def _need_render_references(data_inputs: dict) -> set:
+        return Template({k: v["value"] for k, v in data_inputs.items() if v["need_render"]}).get_reference()
+
     def _gen_executable_end_event_node(self, event: dict, pipeline: dict, root_id: str, parent_id: str) -> Node:
         return Node(
             node_id=event["id"],
+            root_pipeline_id=root_id,
             detail=json.dumps(
                 {
                     "id": event["id"],
@@ -141,6 +153,7 @@ class BambooDjangoRuntime(
     def _gen_event_node(self, event: dict, pipeline: dict, root_id: str, parent_id: str) -> Node:
         return Node(
             node_id=event["id"],
+            root_pipeline_id=root_id,
             detail=json.dumps(
                 {
                     "id": event["id"],
@@ -226,11 +239,12 @@ class BambooDjangoRuntime(
         else:
             raise ValueError("unsupport gateway type {}: {}".format(gateway["type"], gateway))
 
-        return Node(node_id=gateway["id"], detail=json.dumps(detail))
+        return Node(node_id=gateway["id"], root_pipeline_id=root_id, detail=json.dumps(detail))
 
     def _gen_activity_node(self, act: dict, pipeline: dict, root_id: str, parent_id: str) -> Node:
         return Node(
             node_id=act["id"],
+            root_pipeline_id=root_id,
             detail=json.dumps(
                 {
                     "id": act["id"],
@@ -252,6 +266,7 @@ class BambooDjangoRuntime(
     def _gen_subproc_node(self, subproc: dict, pipeline: dict, root_id: str, parent_id: str) -> Node:
         return Node(
             node_id=subproc["id"],
+            root_pipeline_id=root_id,
             detail=json.dumps(
                 {
                     "id": subproc["id"],
@@ -280,6 +295,7 @@ class BambooDjangoRuntime(
         node_outputs = {}
         context_var_references = {}
         final_references = {}
+        node_references = {}
 
         # collect all node outputs and initial reference
         for key, input_data in pipeline["data"]["inputs"].items():
@@ -297,6 +313,7 @@ class BambooDjangoRuntime(
                         serializer=serializer,
                         value=serialized,
                         code=input_data.get("custom_type", ""),
+                        version=unique_id("v"),
                     )
                 )
             else:
@@ -317,6 +334,7 @@ class BambooDjangoRuntime(
                         serializer=serializer,
                         value=serialized,
                         code=input_data.get("custom_type", ""),
+                        version=unique_id("v"),
                     )
                 )
 
@@ -339,6 +357,7 @@ class BambooDjangoRuntime(
                 nodes.append(self._gen_activity_node(act=act, pipeline=pipeline, root_id=root_id, parent_id=parent_id))
                 # data
                 data_inputs, compute_cvs = self._data_inputs_assemble(parent_id, act["id"], act["component"]["inputs"])
+                node_references[act["id"]] = self._need_render_references(data_inputs)
                 datas.append(
                     Data(
                         node_id=act["id"],
@@ -359,6 +378,7 @@ class BambooDjangoRuntime(
                 )
                 # data
                 data_inputs, compute_cvs = self._data_inputs_assemble(parent_id, act["id"], act["params"])
+                node_references[act["id"]] = self._need_render_references(data_inputs)
                 datas.append(
                     Data(
                         node_id=act["id"],
@@ -388,6 +408,7 @@ class BambooDjangoRuntime(
                             serializer=serializer,
                             value=serialized,
                             references="[]",
+                            version=unique_id("v"),
                         )
                     )
 
@@ -427,10 +448,22 @@ class BambooDjangoRuntime(
             nodes.append(
                 self._gen_gateway_node(gateway=gateway, pipeline=pipeline, root_id=root_id, parent_id=parent_id)
             )
+            if gateway["type"] in (NodeType.ExclusiveGateway.value, NodeType.ConditionalParallelGateway.value):
+                node_references[gateway["id"]] = Template(
+                    [cond["evaluate"] for cond in gateway["conditions"].values()]
+                ).get_reference()
 
         # convert a:b, b:c,d -> a:b,c,d b:c,d
         final_references.update(caculate_final_references(context_var_references))
 
+        # 节点输入及分支条件对上下文变量的引用在 prepare 阶段就能确定，提前计算好避免每次执行时重复解析
+        for node in nodes:
+            if node.node_id not in node_references:
+                continue
+            detail = json.loads(node.detail)
+            detail["references"] = caculate_node_references(node_references[node.node_id], final_references)
+            node.detail = json.dumps(detail)
+
         for cv in context_values:
             if cv.pipeline_id != parent_id:
                 continue
@@ -491,6 +524,7 @@ class BambooDjangoRuntime(
                     serializer=serializer,
                     value=serialized,
                     references="[]",
+                    version=unique_id("v"),
                 )
             )
         batch_size = getattr(settings, "BAMBOO_DJANGO_ERI_PREPARE_BATCH_SIZE", 500)
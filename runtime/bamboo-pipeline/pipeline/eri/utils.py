@@ -13,7 +13,9 @@ specific language governing permissions and limitations under the License.
 import socket
 from typing import Dict
 
+from bamboo_engine import metrics
 from bamboo_engine.eri import ContextValueType
+from bamboo_engine.utils.references import caculate_final_references, caculate_node_references  # noqa
 from celery import current_app
 from django.conf import settings
 
@@ -30,29 +32,55 @@ CONTEXT_VALUE_TYPE_MAP = {
 }
 
 
-def caculate_final_references(original_references: Dict[str, set]) -> Dict[str, set]:
+def caculate_affected_final_references(
+    direct_references: Dict[str, set], final_references: Dict[str, set]
+) -> Dict[str, set]:
     """
-    将变量的引用树展开，将树高减少为两层
-    convert a:b, b:c,d -> a:b,c,d b:c,d
-    """
-    final_references = {k: set() for k in original_references.keys()}
-    # resolve final references (BFS)
-    for key, references in original_references.items():
-        queue = []
-        queue.extend(references)
+    部分变量的引用发生变化后，增量计算受影响变量的最终引用
+
+    受影响的变量指被更新的变量及最终引用中包含被更新变量的变量，其余变量的最终引用不会变化，
+    也不会引用受影响的变量，遍历到这些变量时直接合并其已有的最终引用即可
 
+    :param direct_references: 受影响变量的直接引用
+    :type direct_references: Dict[str, set]
+    :param final_references: 其余变量当前的最终引用
+    :type final_references: Dict[str, set]
+    :return: 受影响变量最新的最终引用
+    :rtype: Dict[str, set]
+    """
+    affected_final_references = {}
+    for key, references in direct_references.items():
+        closure = set()
+        queue = list(references)
         while queue:
             r = queue.pop()
-
-            # processed
-            if r in final_references[key]:
+            if r in closure:
                 continue
 
-            final_references[key].add(r)
-            if r in original_references:
-                queue.extend(original_references[r])
+            closure.add(r)
+            if r in direct_references:
+                queue.extend(direct_references[r])
+            else:
+                closure.update(final_references.get(r, ()))
+        affected_final_references[key] = closure
+
+    return affected_final_references
+
 
-    return final_references
+def count_db_query(execute, sql, params, many, context):
+    """
+    数据库查询包装器，将查询次数累加到 bamboo_engine.metrics 中当前线程的计数器上
+    """
+    metrics.record_db_query()
+    return execute(sql, params, many, context)
+
+
+def install_db_query_counter(sender, connection, **kwargs):
+    """
+    connection_created 信号处理函数，为新建立的数据库连接安装查询计数包装器
+    """
+    if count_db_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_db_query)
 
 
 def check_worker(connection=None):
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import os
+import tempfile
+
+from mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+
+from pipeline.eri.imp import blob as blob_module
+from pipeline.eri.imp.blob import FileSystemBlobStore, S3BlobStore, build_blob_store, get_blob_store
+from pipeline.exceptions import ConfigValidationError
+
+
+class FileSystemBlobStoreTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.store = FileSystemBlobStore(location=self.tmp_dir.name)
+
+    def test_save_and_load(self):
+        key_1 = self.store.save("中文内容")
+        key_2 = self.store.save("中文内容")
+        key_3 = self.store.save("其他内容")
+
+        # 相同的数据只会保存一份
+        self.assertEqual(key_1, key_2)
+        self.assertNotEqual(key_1, key_3)
+        self.assertEqual(self.store.load(key_1), "中文内容")
+        self.assertEqual(self.store.load(key_3), "其他内容")
+        self.assertEqual(os.listdir(os.path.dirname(os.path.join(self.tmp_dir.name, key_1))), [os.path.basename(key_1)])
+
+    def test_save__exist(self):
+        key = self.store.save("内容")
+
+        with patch("builtins.open") as mock_open:
+            self.assertEqual(self.store.save("内容"), key)
+        mock_open.assert_not_called()
+
+    def test_load__not_exist(self):
+        self.assertRaises(FileNotFoundError, self.store.load, "not_exist")
+
+
+class S3BlobStoreTestCase(TestCase):
+    def test_save_and_load(self):
+        client = MagicMock()
+        client.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value="内容".encode()))}
+
+        with patch("boto3.client", MagicMock(return_value=client)):
+            store = S3BlobStore(bucket="bucket", endpoint_url="http://s3", prefix="eri/")
+
+        key = store.save("内容")
+        client.put_object.assert_called_once_with(Bucket="bucket", Key="eri/" + key, Body="内容".encode())
+        self.assertEqual(store.load(key), "内容")
+        client.get_object.assert_called_once_with(Bucket="bucket", Key="eri/" + key)
+
+
+class GetBlobStoreTestCase(TestCase):
+    def setUp(self):
+        blob_module._blob_store = None
+        self.addCleanup(setattr, blob_module, "_blob_store", None)
+
+    @override_settings(BAMBOO_DJANGO_ERI_BLOB_STORE={"OPTIONS": {"location": "/tmp/blobs"}})
+    def test_get_blob_store(self):
+        store = get_blob_store()
+        self.assertIsInstance(store, FileSystemBlobStore)
+        self.assertEqual(store.location, "/tmp/blobs")
+        self.assertIs(get_blob_store(), store)
+
+    def test_build_blob_store__invalid_config(self):
+        # 未配置 location
+        with override_settings(BAMBOO_DJANGO_ERI_BLOB_STORE={}):
+            self.assertRaises(ConfigValidationError, build_blob_store)
+            self.assertRaises(ConfigValidationError, get_blob_store)
+
+        with override_settings(BAMBOO_DJANGO_ERI_BLOB_STORE={"BACKEND": "pipeline.eri.imp.blob.NotExist"}):
+            self.assertRaises(ConfigValidationError, build_blob_store)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+
+from mock import patch
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bamboo_engine import states
+from bamboo_engine.eri import DataInput, NodeType
+from bamboo_engine.exceptions import NotFoundError
+
+from pipeline.eri.imp import node as node_module
+from pipeline.eri.imp.node import get_node_cache
+from pipeline.eri.models import Data as DBData
+from pipeline.eri.models import Node as DBNode
+from pipeline.eri.models import State as DBState
+from pipeline.eri.runtime import BambooDjangoRuntime
+
+
+def _detail(node_id, target):
+    return {
+        "id": node_id,
+        "type": NodeType.ServiceActivity.value,
+        "targets": {"f_%s" % node_id: target},
+        "root_pipeline_id": "root",
+        "parent_pipeline_id": "root",
+        "can_skip": True,
+        "can_retry": True,
+        "code": "test_code",
+        "version": "legacy",
+        "error_ignorable": False,
+    }
+
+
+class NodeBundleMixinTestCase(TestCase):
+    def setUp(self):
+        node_module._node_cache = None
+        self.runtime = BambooDjangoRuntime()
+        for node_id, target in (("n1", "n2"), ("n2", "n3")):
+            DBNode.objects.create(node_id=node_id, root_pipeline_id="root", detail=json.dumps(_detail(node_id, target)))
+            DBData.objects.create(
+                node_id=node_id,
+                inputs=json.dumps({"a": {"need_render": True, "value": node_id}}),
+                outputs=json.dumps({"b": "c"}),
+            )
+
+    def tearDown(self):
+        node_module._node_cache = None
+
+    def test_get_node_bundle(self):
+        DBState.objects.create(node_id="n1", root_id="root", parent_id="root", name=states.RUNNING, version="v1")
+
+        with self.assertNumQueries(1):
+            bundle = self.runtime.get_node_bundle("n1", prefetch_next=True)
+
+        self.assertEqual(bundle.node.id, "n1")
+        self.assertEqual(bundle.node.target_nodes, ["n2"])
+        self.assertEqual(bundle.state.name, states.RUNNING)
+        self.assertEqual(bundle.state.version, "v1")
+        self.assertEqual(bundle.state.root_id, "root")
+        self.assertEqual(bundle.data.inputs["a"].value, "n1")
+        self.assertEqual(bundle.data.outputs, {"b": "c"})
+
+        # node data fetched in bundle will be used by get_data once
+        with self.assertNumQueries(0):
+            self.assertIs(self.runtime.get_data("n1"), bundle.data)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.runtime.get_data("n1").inputs["a"].value, "n1")
+
+    def test_get_node_bundle__state_fields(self):
+        DBState.objects.create(
+            node_id="n1",
+            root_id="root",
+            parent_id="root",
+            name=states.FINISHED,
+            version="v1",
+            loop=2,
+            skip=True,
+            started_time=timezone.now(),
+            archived_time=timezone.now(),
+        )
+
+        # state fields are converted the same way as the orm does
+        self.assertEqual(self.runtime.get_node_bundle("n1").state.__dict__, self.runtime.get_state("n1").__dict__)
+
+    def test_get_node_bundle__prefetch_row_without_state_and_data(self):
+        node_module._node_cache = None
+        with override_settings(BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE=10):
+            self.runtime.get_node_bundle("n1")
+            DBState.objects.create(node_id="n2", root_id="root", parent_id="root", name=states.READY, version="v2")
+
+            with CaptureQueriesContext(connection) as ctx:
+                bundle = self.runtime.get_node_bundle("n1", prefetch_next=True)
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIsNone(bundle.state)
+        self.assertEqual(bundle.data.inputs["a"].value, "n1")
+        self.assertIn("n2", get_node_cache())
+
+    def test_get_node_bundle__prefetched_data_scope(self):
+        self.runtime.get_node_bundle("n1")
+
+        # prefetched data is only visible to the runtime instance which fetched it
+        with self.assertNumQueries(1):
+            BambooDjangoRuntime().get_data("n1")
+
+        # only the data of the latest bundle is kept
+        self.runtime.get_node_bundle("n2")
+        with self.assertNumQueries(1):
+            self.runtime.get_data("n1")
+
+        # node inputs updated after bundle fetched
+        self.runtime.get_node_bundle("n1")
+        self.runtime.set_data_inputs("n1", {"a": DataInput(need_render=True, value="new")})
+        self.assertEqual(self.runtime.get_data("n1").inputs["a"].value, "new")
+
+    def test_get_node_bundle__state_and_data_not_exist(self):
+        DBData.objects.filter(node_id="n1").delete()
+        bundle = self.runtime.get_node_bundle("n1")
+
+        self.assertEqual(bundle.node.id, "n1")
+        self.assertIsNone(bundle.state)
+        self.assertIsNone(bundle.data)
+        self.assertRaises(NotFoundError, self.runtime.get_data, "n1")
+
+    def test_get_node_bundle__node_not_exist(self):
+        self.assertRaises(DBNode.DoesNotExist, self.runtime.get_node_bundle, "not_exist")
+
+    @override_settings(BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE=10)
+    def test_get_node_bundle__prefetch_next(self):
+        cache = get_node_cache()
+
+        self.runtime.get_node_bundle("n1", prefetch_next=True)
+        self.assertIn("n1", cache)
+        self.assertNotIn("n2", cache)
+
+        # current node definition is cached, the single target will be prefetched in the same query
+        with self.assertNumQueries(1):
+            self.runtime.get_node_bundle("n1", prefetch_next=True)
+        self.assertIn("n2", cache)
+
+        with self.assertNumQueries(1):
+            bundle = self.runtime.get_node_bundle("n2", prefetch_next=False)
+        self.assertIs(bundle.node, cache.get("n2")[1])
+        self.assertNotIn("n3", cache)
+
+    @override_settings(BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE=10)
+    def test_get_node_bundle__revision_changed(self):
+        self.assertFalse(self.runtime.get_node_bundle("n1").node.reserve_rollback)
+
+        # node detail updated by another process, local cache is not invalidated
+        detail = dict(_detail("n1", "n2"), reserve_rollback=True)
+        DBNode.objects.filter(node_id="n1").update(detail=json.dumps(detail), revision=F("revision") + 1)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.runtime.get_node_bundle("n1").node.reserve_rollback)
+
+    @override_settings(BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE=10)
+    def test_get_node_bundle__hit_cache(self):
+        node = self.runtime.get_node_bundle("n1").node
+
+        # node detail is neither fetched nor parsed again when the cached revision matches
+        with patch.object(self.runtime, "_get_node") as _get_node:
+            self.assertIs(self.runtime.get_node_bundle("n1").node, node)
+        _get_node.assert_not_called()
@@ -12,13 +12,20 @@ specific language governing permissions and limitations under the License.
 """
 import json
 
-from django.test import TransactionTestCase
+from mock import MagicMock, patch
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from bamboo_engine.eri import ContextValue, ContextValueType
 
+from pipeline.eri.imp import context as context_module
+from pipeline.eri.imp import serializer as serializer_module
 from pipeline.eri.imp.context import ContextMixin
 from pipeline.eri.models import ContextValue as DBContextValue
 from pipeline.eri.models import ContextOutputs
+from pipeline.eri.models import Node as DBNode
 from bamboo_engine.utils.string import unique_id
 
 
@@ -103,6 +110,30 @@ class ContextMixinTestCase(TransactionTestCase):
         )
         self.assertEqual(references, {"${var_1}", "${var_2}", "${var_3}"})
 
+    def test_get_context_values_with_references(self):
+        self.assertEqual(self.mixin.get_context_values_with_references(self.pipeline_id, set()), [])
+
+        context_values = self.mixin.get_context_values_with_references(self.pipeline_id, {"${var_3}"})
+        self.assertEqual({cv.key for cv in context_values}, {"${var_1}", "${var_2}", "${var_3}"})
+
+        context_values = {
+            cv.key: cv for cv in self.mixin.get_context_values_with_references(self.pipeline_id, {"${var_4}", "${e}"})
+        }
+        self.assertEqual(set(context_values), {"${var_1}", "${var_2}", "${var_3}", "${var_4}"})
+        self.assertEqual(context_values["${var_2}"].value, 123)
+        self.assertEqual(context_values["${var_4}"].type, ContextValueType.COMPUTE)
+        self.assertEqual(context_values["${var_4}"].value, {"attr1": "a", "attr2": "${var_3}"})
+        self.assertEqual(context_values["${var_4}"].code, "cv")
+
+    def test_get_context_values_with_references__only_load_needed_values(self):
+        with CaptureQueriesContext(connection) as ctx:
+            context_values = self.mixin.get_context_values_with_references(self.pipeline_id, {"${var_1}"})
+        self.assertEqual([cv.key for cv in context_values], ["${var_1}"])
+
+        # references of the given keys first, then values of the needed keys only
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('"value"', ctx.captured_queries[0]["sql"])
+
     def test_get_context(self):
         context_values = self.mixin.get_context(self.pipeline_id)
         self.assertEqual(len(context_values), 4)
@@ -164,6 +195,114 @@ class ContextMixinTestCase(TransactionTestCase):
         self.assertEqual(context_values["${var_6}"].value, "6_val")
         self.assertIsNone(context_values["${var_6}"].code)
 
+    def test_upsert_plain_context_values__one_statement(self):
+        update = {
+            "${var_3}": ContextValue(key="${var_3}", type=ContextValueType.PLAIN, value="123_123"),
+            "${var_5}": ContextValue(key="${var_5}", type=ContextValueType.PLAIN, value="5_val"),
+        }
+        old_version = DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${var_3}").version
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.mixin.upsert_plain_context_values(self.pipeline_id, update)
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"] != "BEGIN"]), 1)
+
+        var_3 = DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${var_3}")
+        self.assertEqual(var_3.type, ContextValueType.PLAIN.value)
+        self.assertEqual(var_3.references, "[]")
+        self.assertNotEqual(var_3.version, old_version)
+        self.assertEqual(DBContextValue.objects.filter(pipeline_id=self.pipeline_id).count(), 5)
+
+    def test_upsert_plain_context_values__use_router(self):
+        update = {"${var_5}": ContextValue(key="${var_5}", type=ContextValueType.PLAIN, value="5_val")}
+
+        with patch.object(context_module.router, "db_for_write", MagicMock(return_value="default")) as db_for_write:
+            self.mixin.upsert_plain_context_values(self.pipeline_id, update)
+        db_for_write.assert_called_with(DBContextValue)
+        self.assertEqual(DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${var_5}").value, '"5_val"')
+
+    def test_upsert_plain_context_values__empty_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.mixin.upsert_plain_context_values(self.pipeline_id, {})
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"] != "BEGIN"]), 0)
+
+    def test_upsert_plain_context_values__without_upsert_statement(self):
+        update = {
+            "${var_3}": ContextValue(key="${var_3}", type=ContextValueType.PLAIN, value="123_123"),
+            "${var_5}": ContextValue(key="${var_5}", type=ContextValueType.PLAIN, value="5_val"),
+        }
+
+        with patch.object(context_module, "_UPSERT_CLAUSES", {}):
+            self.mixin.upsert_plain_context_values(self.pipeline_id, update)
+
+        context_values = {cv.key: cv for cv in self.mixin.get_context(self.pipeline_id)}
+        self.assertEqual(len(context_values), 5)
+        self.assertEqual(context_values["${var_1}"].value, "123")
+        self.assertEqual(context_values["${var_3}"].type, ContextValueType.PLAIN)
+        self.assertEqual(context_values["${var_3}"].value, "123_123")
+        self.assertEqual(context_values["${var_5}"].type, ContextValueType.PLAIN)
+        self.assertEqual(context_values["${var_5}"].value, "5_val")
+
+    def test_append_context_value(self):
+        self.mixin.append_context_value(self.pipeline_id, "${loop}", {"result": True})
+        loop = DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${loop}")
+        self.assertEqual(loop.serializer, ContextMixin.JSON_LINES_SERIALIZER)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.mixin.append_context_value(self.pipeline_id, "${loop}", {"result": False})
+        # 已经以 json_lines 格式保存时只执行一次追加写入，不会读取已有的元素
+        queries = [q["sql"] for q in ctx.captured_queries if q["sql"] not in ("BEGIN", "COMMIT")]
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith("UPDATE"))
+
+        self.assertNotEqual(
+            DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${loop}").version, loop.version
+        )
+        self.assertEqual(
+            self.mixin.get_context_values(self.pipeline_id, {"${loop}"})[0].value,
+            [{"result": True}, {"result": False}],
+        )
+
+    def test_append_context_value__convert_exist_value(self):
+        self.mixin.upsert_plain_context_values(
+            self.pipeline_id, {"${loop}": ContextValue(key="${loop}", type=ContextValueType.PLAIN, value=[1, 2])}
+        )
+        self.mixin.append_context_value(self.pipeline_id, "${loop}", 3)
+        self.mixin.append_context_value(self.pipeline_id, "${var_1}", 4)
+
+        cv_dict = {cv.key: cv for cv in self.mixin.get_context(self.pipeline_id)}
+        self.assertEqual(cv_dict["${loop}"].value, [1, 2, 3])
+        self.assertEqual(cv_dict["${var_1}"].type, ContextValueType.PLAIN)
+        self.assertEqual(cv_dict["${var_1}"].value, [4])
+
+    def test_append_context_value__not_json_serializable(self):
+        self.mixin.append_context_value(self.pipeline_id, "${loop}", 1)
+        self.mixin.append_context_value(self.pipeline_id, "${loop}", {1, 2})
+        self.mixin.append_context_value(self.pipeline_id, "${loop}", 3)
+
+        loop = DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${loop}")
+        self.assertEqual(loop.serializer, ContextMixin.PICKLE_SERIALIZER)
+        self.assertEqual(self.mixin.get_context_values(self.pipeline_id, {"${loop}"})[0].value, [1, {1, 2}, 3])
+
+    def test_get_context_values__load_offloaded_value_lazily(self):
+        store = MagicMock()
+        store.save.return_value = "blob_key"
+        store.load.return_value = json.dumps("a" * 1000)
+
+        with override_settings(BAMBOO_DJANGO_ERI_BLOB_THRESHOLD=100), patch.object(
+            serializer_module, "get_blob_store", MagicMock(return_value=store)
+        ):
+            self.mixin.upsert_plain_context_values(
+                self.pipeline_id, {"${big}": ContextValue(key="${big}", type=ContextValueType.PLAIN, value="a" * 1000)}
+            )
+            big = DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${big}")
+            self.assertEqual((big.value, big.serializer), ("blob_key", "json+blob"))
+
+            self.assertEqual(self.mixin.get_context_values(self.pipeline_id, {"${var_1}"})[0].value, "123")
+            store.load.assert_not_called()
+
+            self.assertEqual(self.mixin.get_context_values(self.pipeline_id, {"${big}"})[0].value, "a" * 1000)
+            store.load.assert_called_once_with("blob_key")
+
     def test_update_context_values(self):
         DBContextValue.objects.create(
             pipeline_id=self.pipeline_id,
@@ -218,3 +357,131 @@ class ContextMixinTestCase(TransactionTestCase):
         self.assertEqual(cv_dict["${var_5}"].value, json.dumps({"attr1": "a", "attr2": "${var_3}"}))
         self.assertEqual(set(json.loads(cv_dict["${var_5}"].references)), {"${var_1}", "${var_3}"})
         self.assertEqual(cv_dict["${var_5}"].code, "cv")
+
+    def test_update_context_values__only_touch_affected_keys(self):
+        var_4_version = DBContextValue.objects.get(pipeline_id=self.pipeline_id, key="${var_4}").version
+
+        with patch.object(ContextMixin, "_deserialize", wraps=self.mixin._deserialize) as deserialize:
+            self.mixin.update_context_values(
+                pipeline_id=self.pipeline_id,
+                context_values=[ContextValue("${var_1}", ContextValueType.SPLICE, value="${var_2}")],
+            )
+
+        # 只有最终引用中包含 ${var_1} 的 ${var_3} 及 ${var_4} 需要重新解析
+        self.assertEqual(deserialize.call_count, 2)
+        cv_dict = {cv.key: cv for cv in DBContextValue.objects.filter(pipeline_id=self.pipeline_id)}
+        self.assertEqual(set(json.loads(cv_dict["${var_1}"].references)), {"${var_2}"})
+        self.assertEqual(set(json.loads(cv_dict["${var_2}"].references)), set())
+        self.assertEqual(set(json.loads(cv_dict["${var_3}"].references)), {"${var_1}", "${var_2}"})
+        self.assertEqual(set(json.loads(cv_dict["${var_4}"].references)), {"${var_1}", "${var_2}", "${var_3}"})
+        self.assertEqual(cv_dict["${var_4}"].version, var_4_version)
+
+    def test_update_context_values__refresh_node_references(self):
+        detail = {
+            "id": "n1",
+            "type": "ServiceActivity",
+            "parent_pipeline_id": self.pipeline_id,
+            "references": {"direct": ["${var_3}"], "closure": ["${var_1}", "${var_2}", "${var_3}"]},
+        }
+        DBNode.objects.create(node_id="n1", root_pipeline_id=self.pipeline_id, detail=json.dumps(detail))
+
+        self.mixin.update_context_values(
+            pipeline_id=self.pipeline_id, context_values=[ContextValue("${var_1}", ContextValueType.PLAIN, value="1")]
+        )
+        self.assertEqual(json.loads(DBNode.objects.get(node_id="n1").detail), detail)
+
+        self.mixin.update_context_values(
+            pipeline_id=self.pipeline_id,
+            context_values=[ContextValue("${var_3}", ContextValueType.SPLICE, value="${var_2}")],
+        )
+        self.assertEqual(
+            json.loads(DBNode.objects.get(node_id="n1").detail)["references"],
+            {"direct": ["${var_3}"], "closure": ["${var_2}", "${var_3}"]},
+        )
+
+
+@override_settings(BAMBOO_DJANGO_ERI_CONTEXT_VALUE_CACHE_SIZE=10)
+class ContextValueCacheTestCase(TransactionTestCase):
+    def setUp(self):
+        context_module._context_value_cache = None
+        self.mixin = ContextMixin()
+        self.pipeline_id = unique_id("p")
+        self.mixin.upsert_plain_context_values(
+            self.pipeline_id,
+            {
+                "${var_1}": ContextValue(key="${var_1}", type=ContextValueType.PLAIN, value={"rows": [1, 2]}),
+                "${var_2}": ContextValue(key="${var_2}", type=ContextValueType.PLAIN, value="2"),
+            },
+        )
+        DBContextValue.objects.create(
+            pipeline_id=self.pipeline_id,
+            key="${var_3}",
+            type=ContextValueType.SPLICE.value,
+            serializer=ContextMixin.JSON_SERIALIZER,
+            value=json.dumps("${var_1}"),
+            references='["${var_1}"]',
+        )
+
+    def tearDown(self):
+        context_module._context_value_cache = None
+
+    def _values(self, context_values):
+        return {cv.key: cv.value for cv in context_values}
+
+    def test_get_context_values__reuse_unchanged_value(self):
+        keys = {"${var_1}", "${var_2}", "${var_3}"}
+        self.assertEqual(
+            self._values(self.mixin.get_context_values(self.pipeline_id, keys)),
+            {"${var_1}": {"rows": [1, 2]}, "${var_2}": "2", "${var_3}": "${var_1}"},
+        )
+
+        # 版本没有变化时不会再读取变量值，没有版本的变量每次都会重新读取
+        DBContextValue.objects.filter(pipeline_id=self.pipeline_id).update(value=json.dumps("changed"))
+        self.assertEqual(
+            self._values(self.mixin.get_context_values(self.pipeline_id, keys)),
+            {"${var_1}": {"rows": [1, 2]}, "${var_2}": "2", "${var_3}": "changed"},
+        )
+        self.assertEqual(
+            self._values(self.mixin.get_context_values_with_references(self.pipeline_id, {"${var_3}"})),
+            {"${var_1}": {"rows": [1, 2]}, "${var_3}": "changed"},
+        )
+
+        # 每个变量值都是新的对象，修改返回值不会影响缓存
+        self.mixin.get_context_values(self.pipeline_id, {"${var_1}"})[0].value["rows"].append(3)
+        self.assertEqual(self.mixin.get_context_values(self.pipeline_id, {"${var_1}"})[0].value, {"rows": [1, 2]})
+
+    def test_get_context_values__only_load_changed_value(self):
+        keys = {"${var_1}", "${var_2}"}
+        self.mixin.get_context_values(self.pipeline_id, keys)
+
+        # versions only, query parameters do not grow with cached versions
+        with CaptureQueriesContext(connection) as ctx:
+            self.mixin.get_context_values(self.pipeline_id, keys)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('"value"', ctx.captured_queries[0]["sql"])
+
+        self.mixin.upsert_plain_context_values(
+            self.pipeline_id, {"${var_1}": ContextValue(key="${var_1}", type=ContextValueType.PLAIN, value="1")}
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            values = self._values(self.mixin.get_context_values(self.pipeline_id, keys))
+        self.assertEqual(values, {"${var_1}": "1", "${var_2}": "2"})
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_get_context_values__reload_after_write(self):
+        self.mixin.get_context_values(self.pipeline_id, {"${var_1}", "${var_2}"})
+
+        self.mixin.upsert_plain_context_values(
+            self.pipeline_id, {"${var_1}": ContextValue(key="${var_1}", type=ContextValueType.PLAIN, value="1")}
+        )
+        self.assertEqual(
+            self._values(self.mixin.get_context_values(self.pipeline_id, {"${var_1}", "${var_2}"})),
+            {"${var_1}": "1", "${var_2}": "2"},
+        )
+
+        self.mixin.update_context_values(
+            self.pipeline_id, [ContextValue(key="${var_2}", type=ContextValueType.SPLICE, value="${var_1}")]
+        )
+        [context_value] = self.mixin.get_context_values(self.pipeline_id, {"${var_2}"})
+        self.assertEqual(context_value.type, ContextValueType.SPLICE)
+        self.assertEqual(context_value.value, "${var_1}")
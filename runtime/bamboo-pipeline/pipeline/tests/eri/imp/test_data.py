@@ -12,11 +12,14 @@ specific language governing permissions and limitations under the License.
 """
 import json
 
-from django.test import TransactionTestCase
+from mock import MagicMock, patch
+
+from django.test import TransactionTestCase, override_settings
 
 from bamboo_engine import exceptions
 from bamboo_engine.eri import Data, DataInput, ExecutionData, CallbackData
 
+from pipeline.eri.imp import serializer as serializer_module
 from pipeline.eri.imp.data import DataMixin
 from pipeline.eri.models import Data as DBData
 from pipeline.eri.models import ExecutionData as DBExecutionData
@@ -348,6 +351,18 @@ class DataMixinTestCase(TransactionTestCase):
         self.assertEqual(self.mixin._deserialize(data.outputs, data.outputs_serializer), self.pickle_exec_data_outputs)
         self.assertEqual(data.outputs_serializer, self.mixin.PICKLE_SERIALIZER)
 
+    @override_settings(BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD=100)
+    def test_set_execution_data_outputs__compress(self):
+        node_id = unique_id("n")
+        outputs = {"log": "a" * 1000}
+
+        self.mixin.set_execution_data_outputs(node_id, outputs)
+        data = DBExecutionData.objects.get(node_id=node_id)
+        self.assertEqual(data.inputs_serializer, self.mixin.JSON_SERIALIZER)
+        self.assertEqual(data.outputs_serializer, "json+zlib")
+        self.assertLess(len(data.outputs), 100)
+        self.assertEqual(self.mixin.get_execution_data_outputs(node_id), outputs)
+
     def test_set_callback_data(self):
         self.raw_callback_data["c"] = 1
         data_id = self.mixin.set_callback_data(node_id=self.node_id, version=self.version, data=self.raw_callback_data)
@@ -356,6 +371,12 @@ class DataMixinTestCase(TransactionTestCase):
         self.assertEqual(data_model.version, self.version)
         self.assertEqual(json.loads(data_model.data), self.raw_callback_data)
 
+    def test_set_callback_data__pickle(self):
+        data = {"obj": Obj(1, 2)}
+        data_id = self.mixin.set_callback_data(node_id=self.node_id, version=self.version, data=data)
+        self.assertEqual(DBCallbackData.objects.get(id=data_id).serializer, self.mixin.PICKLE_SERIALIZER)
+        self.assertEqual(self.mixin.get_callback_data(data_id).data, data)
+
     def test_get_callback_data(self):
         data = self.mixin.get_callback_data(self.callback_data.id)
         self.assertIsInstance(data, CallbackData)
@@ -369,6 +390,32 @@ class DataMixinTestCase(TransactionTestCase):
         self.assertEqual(data, "{}")
         self.assertEqual(serializer, "json")
 
+    @override_settings(BAMBOO_DJANGO_ERI_BLOB_THRESHOLD=100)
+    def test_serialize_execution_data__not_offload(self):
+        store = MagicMock()
+        with patch.object(serializer_module, "get_blob_store", MagicMock(return_value=store)):
+            data, serializer = self.mixin.serialize_execution_data({"log": "a" * 1000})
+        store.save.assert_not_called()
+        self.assertEqual(serializer, "json")
+        self.assertEqual(json.loads(data), {"log": "a" * 1000})
+
+    @override_settings(BAMBOO_DJANGO_ERI_BLOB_THRESHOLD=100)
+    def test_get_execution_data_outputs__offloaded(self):
+        node_id = unique_id("n")
+        store = MagicMock()
+        store.save.return_value = "blob_key"
+        store.load.return_value = json.dumps("a" * 1000)
+
+        with patch.object(serializer_module, "get_blob_store", MagicMock(return_value=store)):
+            self.mixin.set_execution_data_outputs(node_id, {"result": True, "log": "a" * 1000})
+            outputs = self.mixin.get_execution_data_outputs(node_id)
+
+            self.assertTrue(outputs["result"])
+            store.load.assert_not_called()
+
+            self.assertEqual(outputs["log"], "a" * 1000)
+            store.load.assert_called_once_with("blob_key")
+
     def test_deserialize_execution_data(self):
         data = self.mixin.deserialize_execution_data("{}", "json")
         self.assertEqual(data, {})
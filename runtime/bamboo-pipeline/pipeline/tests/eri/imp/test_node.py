@@ -12,9 +12,13 @@ specific language governing permissions and limitations under the License.
 """
 import json
 
-from django.test import TestCase
+from mock import patch
+
+from django.db.models import F
+from django.test import TestCase, override_settings
 
 from bamboo_engine.eri import (
+    DataInput,
     NodeType,
     ServiceActivity,
     SubProcess,
@@ -27,7 +31,16 @@ from bamboo_engine.eri import (
     ExecutableEndEvent,
 )
 
-from pipeline.eri.imp.node import NodeMixin
+from pipeline.eri.imp import node as node_module
+from pipeline.eri.imp.node import (
+    NodeMixin,
+    get_node_cache,
+    invalidate_node_cache,
+    refresh_closure_references,
+    refresh_input_references,
+    update_node_detail,
+)
+from pipeline.eri.models import ContextValue as DBContextValue
 from pipeline.eri.models import Node as DBNode
 
 
@@ -259,3 +272,162 @@ class ProcessMixinTestCase(TestCase):
         self.assertEqual(node.can_skip, True)
         self.assertEqual(node.can_retry, True)
         self.assertEqual(node.code, "")
+
+
+@override_settings(BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE=10)
+class NodeCacheTestCase(TestCase):
+    def setUp(self):
+        node_module._node_cache = None
+        self.mixin = NodeMixin()
+        self.detail = {
+            "id": "n1",
+            "type": NodeType.ServiceActivity.value,
+            "targets": {"f1": "t1"},
+            "root_pipeline_id": "root",
+            "parent_pipeline_id": "parent",
+            "can_skip": True,
+            "can_retry": True,
+            "code": "test_code",
+            "version": "legacy",
+            "error_ignorable": True,
+            "loop_config": {"enable": True, "loop_times": 2},
+        }
+        DBNode.objects.create(node_id="n1", root_pipeline_id="root", detail=json.dumps(self.detail))
+
+    def tearDown(self):
+        node_module._node_cache = None
+
+    def test_get_node__hit_cache(self):
+        with self.assertNumQueries(1):
+            node = self.mixin.get_node("n1")
+
+        # revision is checked in one query and detail is not parsed again when cache hit
+        with self.assertNumQueries(1), patch.object(self.mixin, "_get_node") as _get_node:
+            self.assertIs(self.mixin.get_node("n1"), node)
+        _get_node.assert_not_called()
+
+    def test_get_node__revision_changed(self):
+        self.assertEqual(self.mixin.get_node("n1").loop_times, 2)
+
+        # node detail updated by another process, local cache is not invalidated
+        self.detail["loop_config"]["loop_times"] = 5
+        DBNode.objects.filter(node_id="n1").update(detail=json.dumps(self.detail), revision=F("revision") + 1)
+
+        self.assertEqual(self.mixin.get_node("n1").loop_times, 5)
+
+    def test_get_node__not_exist(self):
+        self.assertRaises(DBNode.DoesNotExist, self.mixin.get_node, "not_exist")
+
+    def test_update_node_detail(self):
+        self.assertFalse(self.mixin.get_node("n1").reserve_rollback)
+
+        self.detail["reserve_rollback"] = True
+        update_node_detail("n1", self.detail)
+
+        self.assertEqual(DBNode.objects.get(node_id="n1").revision, 1)
+        self.assertTrue(self.mixin.get_node("n1").reserve_rollback)
+
+    def test_update_node_loop_times__invalidate_cache(self):
+        self.assertEqual(self.mixin.get_node("n1").loop_times, 2)
+
+        self.mixin.update_node_loop_times("n1", 5)
+
+        self.assertNotIn("n1", get_node_cache())
+        self.assertEqual(self.mixin.get_node("n1").loop_times, 5)
+
+    def test_invalidate_node_cache(self):
+        self.mixin.get_node("n1")
+        self.detail["reserve_rollback"] = True
+        DBNode.objects.filter(node_id="n1").update(detail=json.dumps(self.detail))
+
+        self.assertFalse(self.mixin.get_node("n1").reserve_rollback)
+        invalidate_node_cache("n1")
+        self.assertTrue(self.mixin.get_node("n1").reserve_rollback)
+
+    @override_settings(BAMBOO_DJANGO_ERI_NODE_CACHE_SIZE=0)
+    def test_get_node__cache_disabled(self):
+        self.mixin.get_node("n1")
+
+        with self.assertNumQueries(1):
+            self.mixin.get_node("n1")
+
+
+class NodeReferencesTestCase(TestCase):
+    def setUp(self):
+        self.mixin = NodeMixin()
+        self.detail = {
+            "id": "n1",
+            "type": NodeType.ServiceActivity.value,
+            "targets": {"f1": "t1"},
+            "root_pipeline_id": "root",
+            "parent_pipeline_id": "sub",
+            "can_skip": True,
+            "can_retry": True,
+            "code": "test_code",
+            "version": "legacy",
+            "error_ignorable": True,
+            "references": {"direct": ["${a}"], "closure": ["${a}", "${b}"]},
+        }
+        DBNode.objects.create(node_id="n1", root_pipeline_id="root", detail=json.dumps(self.detail))
+        DBNode.objects.create(
+            node_id="sub",
+            root_pipeline_id="root",
+            detail=json.dumps(dict(self.detail, id="sub", parent_pipeline_id="root")),
+        )
+        DBContextValue.objects.create(
+            pipeline_id="sub", key="${c}", type=1, serializer="json", value='"${d}"', references='["${d}"]'
+        )
+
+    def test_get_node(self):
+        node = self.mixin.get_node("n1")
+        self.assertEqual(node.references.direct, {"${a}"})
+        self.assertEqual(node.references.closure, {"${a}", "${b}"})
+
+        detail = dict(self.detail, id="n2")
+        detail.pop("references")
+        DBNode.objects.create(node_id="n2", root_pipeline_id="root", detail=json.dumps(detail))
+        self.assertIsNone(self.mixin.get_node("n2").references)
+
+    def test_refresh_input_references(self):
+        refresh_input_references(
+            "n1", {"k1": DataInput(need_render=True, value="${c}"), "k2": DataInput(need_render=False, value="${e}")}
+        )
+
+        references = json.loads(DBNode.objects.get(node_id="n1").detail)["references"]
+        self.assertEqual(references, {"direct": ["${c}"], "closure": ["${c}", "${d}"]})
+
+    def test_refresh_input_references__not_precomputed(self):
+        detail = dict(self.detail, id="n2")
+        detail.pop("references")
+        DBNode.objects.create(node_id="n2", root_pipeline_id="root", detail=json.dumps(detail))
+
+        refresh_input_references("n2", {"k1": DataInput(need_render=True, value="${c}")})
+        refresh_input_references("not_exist", {"k1": DataInput(need_render=True, value="${c}")})
+
+        self.assertNotIn("references", json.loads(DBNode.objects.get(node_id="n2").detail))
+
+    def test_refresh_closure_references(self):
+        detail = dict(self.detail, id="n2", references={"direct": ["${e}"], "closure": ["${e}"]})
+        DBNode.objects.create(node_id="n2", root_pipeline_id="root", detail=json.dumps(detail))
+
+        refresh_closure_references("sub", {"${a}": {"${b}", "${c}"}, "${c}": set(), "${e}": set()}, ["${a}"])
+
+        n1 = DBNode.objects.get(node_id="n1")
+        self.assertEqual(json.loads(n1.detail)["references"], {"direct": ["${a}"], "closure": ["${a}", "${b}", "${c}"]})
+        self.assertEqual(n1.revision, 1)
+        # node of another pipeline
+        sub = DBNode.objects.get(node_id="sub")
+        self.assertEqual(json.loads(sub.detail)["references"], {"direct": ["${a}"], "closure": ["${a}", "${b}"]})
+        self.assertEqual(sub.revision, 0)
+        # node which does not reference changed keys
+        self.assertEqual(DBNode.objects.get(node_id="n2").revision, 0)
+
+    def test_refresh_closure_references__unchanged(self):
+        # select root pipeline id, select candidate nodes
+        with self.assertNumQueries(2):
+            refresh_closure_references("sub", {"${a}": {"${b}"}}, ["${a}"])
+
+        self.assertEqual(DBNode.objects.get(node_id="n1").revision, 0)
+
+        with self.assertNumQueries(0):
+            refresh_closure_references("sub", {"${a}": {"${b}"}}, [])
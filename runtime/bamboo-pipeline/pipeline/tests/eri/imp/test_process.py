@@ -37,6 +37,25 @@ class ProcessMixinTestCase(TransactionTestCase):
         self.process.refresh_from_db()
         self.assertFalse(self.process.asleep)
 
+    def test_enter_node(self):
+        last_heartbeat = self.process.last_heartbeat
+        self.mixin.enter_node(self.process.id, "n1")
+        self.process.refresh_from_db()
+        self.assertTrue(last_heartbeat < self.process.last_heartbeat)
+        self.assertEqual(self.process.current_node_id, "n1")
+        self.assertTrue(self.process.asleep)
+
+        self.mixin.enter_node(self.process.id, "n2", wake_up=True)
+        self.process.refresh_from_db()
+        self.assertEqual(self.process.current_node_id, "n2")
+        self.assertFalse(self.process.asleep)
+
+        last_heartbeat = self.process.last_heartbeat
+        self.mixin.enter_node(self.process.id, "n3", beat=False)
+        self.process.refresh_from_db()
+        self.assertEqual(self.process.current_node_id, "n3")
+        self.assertEqual(last_heartbeat, self.process.last_heartbeat)
+
     def test_sleep(self):
         self.process.asleep = False
         self.process.save()
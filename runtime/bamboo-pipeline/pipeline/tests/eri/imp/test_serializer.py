@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import base64
+import copy
+import datetime
+import enum
+import json
+import math
+import os
+import pickle
+import tempfile
+import unittest
+import uuid
+
+from mock import patch
+
+from django.test import TestCase, override_settings
+
+from pipeline.eri.imp import blob as blob_module
+from pipeline.eri.imp import serializer as serializer_module
+from pipeline.eri.imp.serializer import (
+    LazyBlobDict,
+    Serializer,
+    SerializerMixin,
+    maybe_json_serializable,
+    register_serializer,
+)
+
+
+class Unserializable:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Unserializable) and other.value == self.value
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+class IntColor(enum.IntEnum):
+    RED = 1
+
+
+class FancyDict(dict):
+    pass
+
+
+class SerializerMixinTestCase(TestCase):
+    def setUp(self):
+        self.mixin = SerializerMixin()
+
+    def test_maybe_json_serializable(self):
+        self.assertTrue(maybe_json_serializable({"a": [1, {"b": None}], "c": 1.5}))
+        self.assertTrue(maybe_json_serializable((1, "2")))
+        self.assertFalse(maybe_json_serializable(Unserializable(1)))
+        self.assertFalse(maybe_json_serializable({"a": Unserializable(1)}))
+        self.assertFalse(maybe_json_serializable([1, datetime.datetime.now()]))
+
+    def test_serialize__json(self):
+        data, serializer = self.mixin._serialize({"a": [1, 2], 1: "b"})
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+        self.assertEqual(self.mixin._deserialize(data, serializer), {"a": [1, 2], "1": "b"})
+
+    def test_serialize__pickle(self):
+        for value in (Unserializable(1), {"a": Unserializable(1)}, {"a": {"b": Unserializable(1)}}):
+            data, serializer = self.mixin._serialize(value)
+            self.assertEqual(serializer, SerializerMixin.PICKLE_SERIALIZER)
+            self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+    @unittest.skipIf(serializer_module.orjson is None, "orjson is not installed")
+    @override_settings(BAMBOO_DJANGO_ERI_SERIALIZER="orjson")
+    def test_serialize__orjson(self):
+        data, serializer = self.mixin._serialize({"a": [1, 2], 1: "b"})
+        self.assertEqual(serializer, "orjson")
+        self.assertEqual(self.mixin._deserialize(data, serializer), {"a": [1, 2], "1": "b"})
+        # orjson 的输出可以被标准库 json 读取
+        self.assertEqual(json.loads(data), {"a": [1, 2], "1": "b"})
+
+        # orjson 不支持的值退回到标准库 json 或 pickle
+        data, serializer = self.mixin._serialize({"a": 2**70})
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+        self.assertEqual(self.mixin._deserialize(data, serializer), {"a": 2**70})
+
+        now = datetime.datetime.now()
+        data, serializer = self.mixin._serialize({"a": {"b": now}})
+        self.assertEqual(serializer, SerializerMixin.PICKLE_SERIALIZER)
+        self.assertEqual(self.mixin._deserialize(data, serializer), {"a": {"b": now}})
+
+    @unittest.skipIf(serializer_module.orjson is None, "orjson is not installed")
+    @override_settings(BAMBOO_DJANGO_ERI_SERIALIZER="orjson")
+    def test_serialize__orjson_round_trip(self):
+        # orjson 序列化后无法还原的值退回到标准库 json 或 pickle
+        for value, expect_serializer in (
+            ({"a": {"b": uuid.uuid4()}}, SerializerMixin.PICKLE_SERIALIZER),
+            ({"a": [Color.RED]}, SerializerMixin.PICKLE_SERIALIZER),
+            ({"a": {"b": IntColor.RED}}, SerializerMixin.JSON_SERIALIZER),
+            ({"a": [float("inf")]}, SerializerMixin.JSON_SERIALIZER),
+            ({"a": [1.5, {"b": -float("inf")}]}, SerializerMixin.JSON_SERIALIZER),
+            ({"a": {uuid.uuid4(): 1}}, SerializerMixin.PICKLE_SERIALIZER),
+            ({"a": Color.RED}, SerializerMixin.PICKLE_SERIALIZER),
+            ({"a": FancyDict({"b": 1})}, SerializerMixin.JSON_SERIALIZER),
+        ):
+            data, serializer = self.mixin._serialize(value)
+            self.assertEqual(serializer, expect_serializer)
+            self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+        data, serializer = self.mixin._serialize({"a": [float("nan")]})
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+        self.assertTrue(math.isnan(self.mixin._deserialize(data, serializer)["a"][0]))
+
+        # json 原生类型组成的数据使用 orjson 序列化
+        value = {"a": [1, 1.5, -0.0, 1e308, "G\x7f\xf0", None, True], "b": {"c": (1, 2)}, 1: "d"}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "orjson")
+        self.assertEqual(self.mixin._deserialize(data, serializer), json.loads(json.dumps(value)))
+
+    @unittest.skipIf(serializer_module.msgpack is None, "msgpack is not installed")
+    @override_settings(BAMBOO_DJANGO_ERI_SERIALIZER="msgpack")
+    def test_serialize__msgpack(self):
+        data, serializer = self.mixin._serialize({"a": [1, 2], 1: "b"})
+        self.assertEqual(serializer, "msgpack")
+        self.assertEqual(self.mixin._deserialize(data, serializer), {"a": [1, 2], 1: "b"})
+
+    def test_serialize__custom_serializer(self):
+        class ReprSerializer(Serializer):
+            name = "test_repr"
+
+            def dumps(self, data):
+                return repr(data)
+
+            def loads(self, data):
+                return eval(data)
+
+        register_serializer(ReprSerializer())
+        self.addCleanup(serializer_module.SERIALIZERS.pop, "test_repr")
+
+        with override_settings(BAMBOO_DJANGO_ERI_SERIALIZER="test_repr"):
+            data, serializer = self.mixin._serialize({"a": (1, 2)})
+        self.assertEqual(serializer, "test_repr")
+        # 切换序列化器后已经写入的数据仍然使用其记录的序列化器读取
+        self.assertEqual(self.mixin._deserialize(data, serializer), {"a": (1, 2)})
+
+    def test_deserialize__unsupport_serializer(self):
+        self.assertRaises(ValueError, self.mixin._deserialize, "{}", "not_exist")
+
+    def test_deserialize__json_lines(self):
+        self.assertEqual(
+            self.mixin._deserialize('1\n{"a": "\\n"}\n', SerializerMixin.JSON_LINES_SERIALIZER), [1, {"a": "\n"}]
+        )
+
+    @override_settings(BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD=100)
+    def test_serialize__compress(self):
+        value = {"a": "a" * 1000}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "json+zlib")
+        self.assertLess(len(data), 100)
+        self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+        value = {"a": Unserializable("a" * 1000)}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "pickle+zlib")
+        self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+    @override_settings(BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD=100)
+    def test_serialize__compress_skip(self):
+        # 未超过阈值
+        data, serializer = self.mixin._serialize({"a": "a" * 10})
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+
+        # 压缩后没有变小
+        value = [base64.b64encode(os.urandom(200)).decode()]
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+        self.assertEqual(json.loads(data), value)
+
+    @unittest.skipIf(serializer_module.zstandard is None, "zstandard is not installed")
+    @override_settings(BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD=100, BAMBOO_DJANGO_ERI_COMPRESSOR="zstd")
+    def test_serialize__compress_zstd(self):
+        value = {"a": "a" * 1000}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "json+zstd")
+        self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+    def test_deserialize__unsupport_compressor(self):
+        self.assertRaises(ValueError, self.mixin._deserialize, "e30=", "json+not_exist")
+
+
+class SerializerMixinBlobTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        blob_module._blob_store = None
+        self.addCleanup(setattr, blob_module, "_blob_store", None)
+        override = override_settings(
+            BAMBOO_DJANGO_ERI_BLOB_THRESHOLD=100,
+            BAMBOO_DJANGO_ERI_BLOB_STORE={"OPTIONS": {"location": self.tmp_dir.name}},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.mixin = SerializerMixin()
+
+    def test_serialize__offload(self):
+        value = ["a" * 1000]
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "json+blob")
+        self.assertLess(len(data), 100)
+        self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+        # 相同的数据重复序列化时复用同一份转存数据
+        self.assertEqual(self.mixin._serialize(value), (data, serializer))
+
+        # 未超过阈值的数据仍然保存在数据表中
+        data, serializer = self.mixin._serialize({"a": 1})
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+
+        # 不允许转存时保存在数据表中
+        data, serializer = self.mixin._serialize(value, offload=False)
+        self.assertEqual(serializer, SerializerMixin.JSON_SERIALIZER)
+        self.assertEqual(json.loads(data), value)
+
+    def test_serialize__offload_dict(self):
+        value = {"small": 1, "large": "a" * 1000}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, SerializerMixin.BLOB_DICT_SERIALIZER)
+        self.assertLess(len(data), 200)
+
+        result = self.mixin._deserialize(data, serializer)
+        self.assertIsInstance(result, LazyBlobDict)
+        self.assertEqual(result, value)
+        self.assertEqual(json.loads(json.dumps(result)), value)
+        self.assertEqual(dict(result), value)
+        self.assertEqual(copy.deepcopy(result), value)
+        self.assertEqual(pickle.loads(pickle.dumps(result)), value)
+
+        # 未超过阈值的值合计超过阈值时整体转存
+        value = {str(i): "a" * 20 for i in range(10)}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, SerializerMixin.BLOB_DICT_SERIALIZER)
+        self.assertEqual(json.loads(data)["inline"][1], "json+blob")
+        self.assertEqual(self.mixin._deserialize(data, serializer), value)
+
+    def test_deserialize__offload_dict_lazy(self):
+        data, serializer = self.mixin._serialize({"small": 1, "large": "a" * 1000})
+
+        store = blob_module.get_blob_store()
+        with patch.object(store, "load", wraps=store.load) as load:
+            result = self.mixin._deserialize(data, serializer)
+            self.assertEqual(result["small"], 1)
+            self.assertEqual(result.get("small"), 1)
+            self.assertEqual(set(result), {"small", "large"})
+            self.assertIn("large", result)
+            load.assert_not_called()
+
+            self.assertEqual(result["large"], "a" * 1000)
+            self.assertEqual(result["large"], "a" * 1000)
+            load.assert_called_once()
+
+    def test_deserialize__offload_dict_merge(self):
+        data, serializer = self.mixin._serialize({"small": 1, "large": "a" * 1000})
+        result = self.mixin._deserialize(data, serializer)
+
+        merged = result | {"small": 2}
+        self.assertIs(type(merged), dict)
+        self.assertEqual(merged, {"small": 2, "large": "a" * 1000})
+
+    def test_serialize__offload_dict_reuse_offloaded_value(self):
+        data, serializer = self.mixin._serialize({"small": 1, "large": "a" * 1000})
+        result = self.mixin._deserialize(data, serializer)
+        result["ex_data"] = "error"
+
+        store = blob_module.get_blob_store()
+        with patch.object(store, "load", wraps=store.load) as load, patch.object(
+            store, "save", wraps=store.save
+        ) as save:
+            data, serializer = self.mixin._serialize(result)
+            load.assert_not_called()
+            save.assert_not_called()
+
+        self.assertEqual(
+            self.mixin._deserialize(data, serializer), {"small": 1, "large": "a" * 1000, "ex_data": "error"}
+        )
+
+    @override_settings(BAMBOO_DJANGO_ERI_COMPRESS_THRESHOLD=100)
+    def test_serialize__compress_and_offload(self):
+        # 压缩后小于转存阈值的数据不会转存
+        value = {"a": "a" * 1000}
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "json+zlib")
+
+        value = [base64.b64encode(os.urandom(300)).decode(), "a" * 1000]
+        data, serializer = self.mixin._serialize(value)
+        self.assertEqual(serializer, "json+zlib+blob")
+        self.assertEqual(self.mixin._deserialize(data, serializer), value)
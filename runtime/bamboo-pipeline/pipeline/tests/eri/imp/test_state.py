@@ -19,6 +19,7 @@ from django.utils import timezone
 from bamboo_engine.eri.models import State
 from bamboo_engine.exceptions import StateVersionNotMatchError
 
+from pipeline.eri.models import ControlEpoch
 from pipeline.eri.models import State as DBState
 from pipeline.eri.imp.state import StateMixin, states
 from bamboo_engine.utils.string import unique_id
@@ -268,6 +269,33 @@ class StateMixinTestCase(TransactionTestCase):
             state_names, {s1.node_id: s1.name, s2.node_id: s2.name, s3.node_id: s3.name, s4.node_id: s4.name}
         )
 
+    def test_get_control_epoch__not_exist(self):
+        self.assertEqual(self.mixin.get_control_epoch("not_exist"), 0)
+
+    def test_bump_control_epoch(self):
+        root_id = unique_id("n")
+        DBState.objects.create(
+            node_id=root_id,
+            root_id=root_id,
+            parent_id="",
+            name=states.RUNNING,
+            version=unique_id("v"),
+        )
+        subprocess = DBState.objects.create(
+            node_id=unique_id("n"),
+            root_id=root_id,
+            parent_id=root_id,
+            name=states.RUNNING,
+            version=unique_id("v"),
+        )
+
+        self.mixin.bump_control_epoch(root_id)
+        self.assertEqual(self.mixin.get_control_epoch(root_id), 1)
+
+        self.mixin.bump_control_epoch(subprocess.node_id)
+        self.assertEqual(self.mixin.get_control_epoch(root_id), 2)
+        self.assertFalse(ControlEpoch.objects.filter(root_pipeline_id=subprocess.node_id).exists())
+
     def test_has_state(self):
         self.assertTrue(self.mixin.has_state(self.state.node_id))
 
@@ -13,10 +13,14 @@ specific language governing permissions and limitations under the License.
 
 from mock import patch, MagicMock
 
+from django.db import connection
 from django.test import TransactionTestCase
 
+from bamboo_engine import metrics
+
 from pipeline.eri.imp.task import TaskMixin
 from pipeline.eri.models import Process
+from pipeline.eri.utils import count_db_query
 
 
 class StateMixinTestCase(TransactionTestCase):
@@ -206,3 +210,61 @@ class StateMixinTestCase(TransactionTestCase):
             priority=50,
             routing_key="er_schedule_test",
         )
+
+    def test_execute__in_node_transaction(self):
+        celery_app = MagicMock()
+        apply_async = celery_app.tasks["pipeline.eri.celery.tasks.execute"].apply_async
+
+        with patch("pipeline.eri.imp.task.current_app", celery_app):
+            with self.mixin.node_transaction():
+                self.mixin.execute(
+                    process_id=1,
+                    node_id="nid",
+                    root_pipeline_id="root_id",
+                    parent_pipeline_id="parent_id",
+                    headers={"route_info": {"queue": "test", "priority": 50}},
+                )
+                # task will be sent after transaction committed
+                apply_async.assert_not_called()
+
+        apply_async.assert_called_once()
+
+    def test_execute__in_node_transaction_rollback(self):
+        celery_app = MagicMock()
+        apply_async = celery_app.tasks["pipeline.eri.celery.tasks.execute"].apply_async
+
+        with patch("pipeline.eri.imp.task.current_app", celery_app):
+            try:
+                with self.mixin.node_transaction():
+                    Process.objects.create(id=2, priority=100, queue="test")
+                    self.mixin.execute(
+                        process_id=2,
+                        node_id="nid",
+                        root_pipeline_id="root_id",
+                        parent_pipeline_id="parent_id",
+                    )
+                    raise ValueError
+            except ValueError:
+                pass
+
+        apply_async.assert_not_called()
+        self.assertFalse(Process.objects.filter(id=2).exists())
+        self.assertFalse(self.mixin._in_node_transaction)
+
+    def test_execute__record_broker_publish(self):
+        celery_app = MagicMock()
+        publishes = metrics.ROUND_TRIPS.broker_publishes
+        queries = metrics.ROUND_TRIPS.db_queries
+
+        with patch("pipeline.eri.imp.task.current_app", celery_app), connection.execute_wrapper(count_db_query):
+            self.mixin.execute(
+                process_id=1,
+                node_id="nid",
+                root_pipeline_id="root_id",
+                parent_pipeline_id="parent_id",
+                headers={"route_info": {"queue": "test", "priority": 50}},
+            )
+            Process.objects.filter(id=1).exists()
+
+        self.assertEqual(metrics.ROUND_TRIPS.broker_publishes, publishes + 1)
+        self.assertEqual(metrics.ROUND_TRIPS.db_queries, queries + 1)
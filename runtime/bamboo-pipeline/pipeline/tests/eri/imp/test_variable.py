@@ -19,7 +19,7 @@ from bamboo_engine.eri import ContextValue, ContextValueType
 from bamboo_engine.context import Context, SpliceVariable
 
 from pipeline.core.data.var import LazyVariable
-from pipeline.eri.imp.variable import VariableWrapper
+from pipeline.eri.imp.variable import VariableProxy, VariableWrapper
 
 
 class TestVariable(LazyVariable):
@@ -32,6 +32,18 @@ class TestVariable(LazyVariable):
         return "heihei"
 
 
+class HelperVariable(LazyVariable):
+    code = "helper_test"
+    name = "helper_test"
+
+    def get_value(self):
+        return self.format_value(self.value)
+
+    @staticmethod
+    def format_value(value):
+        return "formatted_{}".format(value)
+
+
 class VariableWrapperTestCase(TestCase):
     def test_get(self):
         runtime = MagicMock()
@@ -51,3 +63,17 @@ class VariableWrapperTestCase(TestCase):
         )
 
         self.assertEqual(w.get(), "heihei")
+
+    def test_proxy_class_is_cached(self):
+        original_value = MagicMock()
+        original_value.get = MagicMock(return_value="1")
+
+        p1 = VariableProxy(original_value=original_value, var_cls=HelperVariable, pipeline_data={}, inner_loop=1)
+        p2 = VariableProxy(original_value=original_value, var_cls=HelperVariable, pipeline_data={}, inner_loop=2)
+
+        self.assertIs(type(p1), type(p2))
+        self.assertTrue(issubclass(type(p1), VariableProxy))
+        self.assertEqual(p1.inner_loop, 1)
+        self.assertEqual(p2.inner_loop, 2)
+        self.assertEqual(p1.get(), "formatted_1")
+        self.assertEqual(p1.value, "1")
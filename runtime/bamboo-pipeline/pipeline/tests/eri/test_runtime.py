@@ -148,6 +148,7 @@ class BambooDjangoRuntimeTestCase(TransactionTestCase):
         context_outputs = {co.pipeline_id: co for co in ContextOutputs.objects.all()}
 
         self.assertEqual(len(nodes), 20)
+        self.assertTrue(all([node.root_pipeline_id == pipeline["id"] for node in nodes.values()]))
         self.assertEqual(len(datas), 12)
         self.assertEqual(len(context_values["pipeline"]), 9)
         self.assertEqual(len(context_values["subproc"]), 7)
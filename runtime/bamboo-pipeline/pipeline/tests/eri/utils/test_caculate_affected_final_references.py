@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from django.test import TestCase
+
+from pipeline.eri.utils import caculate_affected_final_references, caculate_final_references
+
+
+class CaculateAffectedFinalReferencesTestCase(TestCase):
+    def test_normal(self):
+        original_references = {
+            "a": {"c", "d", "not_exist"},
+            "b": {"d", "e"},
+            "c": {"f"},
+            "d": {"f", "g"},
+            "e": set(),
+            "f": {"g", "h", "i"},
+            "h": set(),
+            "i": set(),
+        }
+        final_references = caculate_final_references(original_references)
+
+        # f 不再引用 h，a, b, c, d 的最终引用中包含 f，需要重新计算
+        direct_references = {
+            "f": {"g", "i"},
+            "a": {"c", "d", "not_exist"},
+            "b": {"d", "e"},
+            "c": {"f"},
+            "d": {"f", "g"},
+        }
+        affected = caculate_affected_final_references(direct_references, final_references)
+
+        original_references["f"] = {"g", "i"}
+        expect = caculate_final_references(original_references)
+        self.assertEqual(affected, {key: expect[key] for key in direct_references})
+
+    def test_reference_unaffected_key(self):
+        final_references = {"a": {"b", "c"}, "b": {"c"}, "c": set(), "d": {"e"}}
+        affected = caculate_affected_final_references({"a": {"b", "d"}}, final_references)
+        self.assertEqual(affected, {"a": {"b", "c", "d", "e"}})
+
+    def test_circle(self):
+        affected = caculate_affected_final_references({"a": {"b"}, "b": {"c"}, "c": {"a"}}, {})
+        self.assertEqual(affected, {"a": {"a", "b", "c"}, "b": {"a", "b", "c"}, "c": {"a", "b", "c"}})
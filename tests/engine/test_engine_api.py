@@ -76,6 +76,7 @@ def test_pause_pipeline():
     runtime.has_state.assert_called_once_with(pipeline_id)
     runtime.pre_pause_pipeline.assert_called_once_with(pipeline_id)
     runtime.set_state.assert_called_once_with(node_id=pipeline_id, to_state=states.SUSPENDED)
+    runtime.bump_control_epoch.assert_called_once_with(pipeline_id)
     runtime.post_pause_pipeline.assert_called_once_with(pipeline_id)
 
 
@@ -104,6 +105,7 @@ def test_revoke_pipeline():
     runtime.has_state.assert_called_once_with(pipeline_id)
     runtime.pre_revoke_pipeline.assert_called_once_with(pipeline_id)
     runtime.set_state.assert_called_once_with(node_id=pipeline_id, to_state=states.REVOKED)
+    runtime.bump_control_epoch.assert_called_once_with(pipeline_id)
     runtime.post_revoke_pipeline.assert_called_once_with(pipeline_id)
 
 
@@ -140,6 +142,7 @@ def test_resume_pipeline():
     runtime.get_suspended_process_info.assert_called_once_with(pipeline_id)
     runtime.pre_resume_pipeline.assert_called_once_with(pipeline_id)
     runtime.set_state.assert_called_once_with(node_id=pipeline_id, to_state=states.RUNNING)
+    runtime.bump_control_epoch.assert_called_once_with(pipeline_id)
     runtime.batch_resume.assert_called_once_with(
         process_id_list=[
             suspended_process_info[0].process_id,
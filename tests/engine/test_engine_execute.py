@@ -19,7 +19,9 @@ from bamboo_engine import states
 from bamboo_engine.engine import Engine
 from bamboo_engine.eri import (
     DispatchProcess,
+    EmptyStartEvent,
     ExecutionData,
+    NodeMixin,
     NodeType,
     ProcessInfo,
     Schedule,
@@ -33,6 +35,13 @@ from bamboo_engine.interrupt import (
     ExecuteInterruptPoint,
     ExecuteKeyPoint,
 )
+from bamboo_engine.utils.constants import RuntimeSettings
+
+
+def use_default_node_bundle(runtime):
+    runtime.get_node_bundle = MagicMock(
+        side_effect=lambda *args, **kwargs: NodeMixin.get_node_bundle(runtime, *args, **kwargs)
+    )
 
 
 @pytest.fixture
@@ -131,8 +140,7 @@ def test_execute__reach_destination_and_wake_up_failed(node_id, pi, interrupter)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
     runtime.get_process_info.assert_called_once_with(pi.process_id)
-    runtime.wake_up.assert_called_once_with(pi.process_id)
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_not_called()
     runtime.child_process_finish.assert_called_once_with(pi.parent_id, pi.process_id)
     runtime.execute.assert_not_called()
 
@@ -150,8 +158,7 @@ def test_execute__reach_destination_and_wake_up_success(node_id, pi, interrupter
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {"k": "v"})
 
     runtime.get_process_info.assert_called_once_with(pi.process_id)
-    runtime.wake_up.assert_called_once_with(pi.process_id)
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_not_called()
     runtime.child_process_finish.assert_called_once_with(pi.parent_id, pi.process_id)
     runtime.execute.assert_called_once_with(
         process_id=pi.parent_id,
@@ -172,7 +179,7 @@ def test_execute__root_pipeline_revoked(node_id, pi, interrupter):
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.die.assert_called_once_with(pi.process_id)
 
     assert interrupter.check_point.name == ExecuteKeyPoint.START_PUSH_NODE
@@ -186,7 +193,7 @@ def test_execute__root_pipeline_suspended(node_id, pi, interrupter):
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.suspend.assert_called_once_with(pi.process_id, pi.root_pipeline_id)
 
     assert interrupter.check_point.name == ExecuteKeyPoint.START_PUSH_NODE
@@ -208,7 +215,7 @@ def test_execute__suspended_in_pipeline_stack(node_id, pi, interrupter):
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.suspend.assert_called_once_with(pi.process_id, pi.pipeline_stack[1])
 
     assert interrupter.check_point.name == ExecuteKeyPoint.START_PUSH_NODE
@@ -223,13 +230,15 @@ def test_execute__exceed_rerun_limit(node_id, pi, interrupter, node, state):
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.node_rerun_limit = MagicMock(return_value=10)
     runtime.get_execution_data_outputs = MagicMock(return_value={})
 
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
+    runtime.get_node_bundle.assert_called_once_with(node_id, prefetch_next=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_called_once_with(pi.root_pipeline_id, node_id)
@@ -253,11 +262,12 @@ def test_execute__node_has_suspended_appoint(node_id, pi, interrupter, node, sta
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.node_rerun_limit = MagicMock(return_value=10)
 
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_called_once_with(pi.root_pipeline_id, node_id)
@@ -278,12 +288,13 @@ def test_execute__node_can_not_transit_to_running(node_id, pi, interrupter, node
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.node_rerun_limit = MagicMock(return_value=10)
 
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_called_once_with(pi.root_pipeline_id, node_id)
@@ -302,6 +313,7 @@ def test_execute__rerun_and_have_to_sleep(node_id, pi, interrupter, node, state)
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.node_rerun_limit = MagicMock(return_value=10)
     runtime.get_execution_data = MagicMock(return_value=execution_data)
     runtime.set_state = MagicMock(return_value=state.version)
@@ -328,7 +340,7 @@ def test_execute__rerun_and_have_to_sleep(node_id, pi, interrupter, node, state)
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_called_once_with(pi.root_pipeline_id, node_id)
@@ -386,6 +398,7 @@ def test_execute__have_to_sleep(node_id, pi, interrupter, node, state):
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_state = MagicMock(return_value=state.version)
     runtime.node_enter = MagicMock(return_value=None)
@@ -412,7 +425,7 @@ def test_execute__have_to_sleep(node_id, pi, interrupter, node, state):
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -452,12 +465,209 @@ def test_execute__have_to_sleep(node_id, pi, interrupter, node, state):
     assert interrupter.check_point.execute_result is not None
 
 
+def test_execute__beat_interval(pi, interrupter, node):
+    def _node(node_id):
+        return EmptyStartEvent(
+            id=node_id,
+            type=NodeType.EmptyStartEvent,
+            target_flows=["f"],
+            target_nodes=["t"],
+            targets={"f": "t"},
+            root_pipeline_id="root",
+            parent_pipeline_id="root",
+        )
+
+    runtime = MagicMock()
+    runtime.get_config = MagicMock(
+        side_effect=lambda name: 10 if name == RuntimeSettings.PIPELINE_PROCESS_BEAT_INTERVAL.value else False
+    )
+    runtime.get_process_info = MagicMock(return_value=pi)
+    runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
+    runtime.get_node = MagicMock(side_effect=[_node("n1"), _node("n2"), node])
+    runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
+    runtime.set_state = MagicMock(return_value="v")
+
+    def _result(next_node_id):
+        return ExecuteResult(
+            should_sleep=next_node_id is None,
+            schedule_ready=False,
+            schedule_type=None,
+            schedule_after=-1,
+            dispatch_processes=[],
+            next_node_id=next_node_id,
+            should_die=False,
+        )
+
+    handler = MagicMock()
+    handler.execute = MagicMock(side_effect=[_result("n2"), _result(node.id), _result(None)])
+
+    engine = Engine(runtime=runtime)
+
+    with mock.patch("bamboo_engine.engine.HandlerFactory.get_handler", MagicMock(return_value=handler)):
+        with mock.patch("bamboo_engine.engine.time.monotonic", MagicMock(return_value=100)):
+            engine.execute(pi.process_id, "n1", pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
+
+    runtime.enter_node.assert_has_calls(
+        [
+            call(pi.process_id, "n1", wake_up=True, beat=True),
+            call(pi.process_id, "n2", wake_up=False, beat=False),
+            call(pi.process_id, node.id, wake_up=False, beat=False),
+        ]
+    )
+    # beat before service activity execute
+    runtime.beat.assert_called_once_with(pi.process_id)
+
+
+def test_execute__control_epoch(pi, interrupter, node):
+    def _node(node_id):
+        return EmptyStartEvent(
+            id=node_id,
+            type=NodeType.EmptyStartEvent,
+            target_flows=["f"],
+            target_nodes=["t"],
+            targets={"f": "t"},
+            root_pipeline_id="root",
+            parent_pipeline_id="root",
+        )
+
+    runtime = MagicMock()
+    runtime.get_process_info = MagicMock(return_value=pi)
+    runtime.get_control_epoch = MagicMock(side_effect=[1, 1, 2])
+    runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
+    runtime.get_node = MagicMock(side_effect=[_node("n1"), _node("n2"), node])
+    runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
+    runtime.set_state = MagicMock(return_value="v")
+
+    def _result(next_node_id):
+        return ExecuteResult(
+            should_sleep=next_node_id is None,
+            schedule_ready=False,
+            schedule_type=None,
+            schedule_after=-1,
+            dispatch_processes=[],
+            next_node_id=next_node_id,
+            should_die=False,
+        )
+
+    handler = MagicMock()
+    handler.execute = MagicMock(side_effect=[_result("n2"), _result(node.id), _result(None)])
+
+    engine = Engine(runtime=runtime)
+
+    with mock.patch("bamboo_engine.engine.HandlerFactory.get_handler", MagicMock(return_value=handler)):
+        engine.execute(pi.process_id, "n1", pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
+
+    runtime.get_control_epoch.assert_has_calls([call(pi.root_pipeline_id)] * 3)
+    # state scan only happen at first hop and when epoch changed
+    assert runtime.batch_get_state_name.call_count == 2
+    assert handler.execute.call_count == 3
+
+
+def test_execute__node_transaction_rollback(node_id, pi, interrupter, node):
+    runtime = MagicMock()
+    runtime.get_config = MagicMock(
+        side_effect=lambda name: name == RuntimeSettings.PIPELINE_ENABLE_NODE_TRANSACTION.value
+    )
+    runtime.get_process_info = MagicMock(return_value=pi)
+    runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
+    runtime.get_node = MagicMock(return_value=node)
+    runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
+    runtime.set_state = MagicMock(return_value="v")
+
+    runtime.set_state = MagicMock(side_effect=ValueError)
+    interrupter.runtime.interrupt_errors = MagicMock(return_value=(ValueError,))
+
+    handler = MagicMock()
+    engine = Engine(runtime=runtime)
+
+    with mock.patch("bamboo_engine.engine.HandlerFactory.get_handler", MagicMock(return_value=handler)):
+        engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
+
+    runtime.node_transaction.assert_called_once()
+    handler.execute.assert_not_called()
+    # writes of the node are rolled back, recover from the check point before the node is pushed
+    recover_point = interrupter.runtime.execute.call_args.kwargs["recover_point"]
+    assert recover_point.name == "s1"
+    assert recover_point.running_node_version is None
+
+
+def test_execute__node_transaction_execute_failed(node_id, pi, interrupter, node):
+    runtime = MagicMock()
+    runtime.get_config = MagicMock(
+        side_effect=lambda name: name == RuntimeSettings.PIPELINE_ENABLE_NODE_TRANSACTION.value
+    )
+    runtime.get_process_info = MagicMock(return_value=pi)
+    runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
+    runtime.get_node = MagicMock(return_value=node)
+    runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
+    runtime.set_state = MagicMock(return_value="v")
+
+    handler = MagicMock()
+    handler.execute = MagicMock(side_effect=ValueError)
+    interrupter.runtime.interrupt_errors = MagicMock(return_value=(ValueError,))
+
+    engine = Engine(runtime=runtime)
+
+    with mock.patch("bamboo_engine.engine.HandlerFactory.get_handler", MagicMock(return_value=handler)):
+        engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
+
+    # transaction is committed before node execute and not reopened after execute failed
+    runtime.node_transaction.assert_called_once()
+    runtime.node_transaction.return_value.__exit__.assert_called_once()
+    assert runtime.node_transaction.return_value.__exit__.call_args.args[-3:] == (None, None, None)
+    recover_point = interrupter.runtime.execute.call_args.kwargs["recover_point"]
+    assert recover_point.name == ExecuteKeyPoint.SET_NODE_RUNNING_DONE
+    assert recover_point.running_node_version == "v"
+
+
+def test_execute__node_transaction_rollback_after_execute(node_id, pi, interrupter, node):
+    runtime = MagicMock()
+    runtime.get_config = MagicMock(
+        side_effect=lambda name: name == RuntimeSettings.PIPELINE_ENABLE_NODE_TRANSACTION.value
+    )
+    runtime.get_process_info = MagicMock(return_value=pi)
+    runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
+    runtime.get_node = MagicMock(return_value=node)
+    runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
+    runtime.set_state = MagicMock(return_value="v")
+    runtime.sleep = MagicMock(side_effect=ValueError)
+
+    handler = MagicMock()
+    execute_result = ExecuteResult(
+        should_sleep=True,
+        schedule_ready=False,
+        schedule_type=None,
+        schedule_after=-1,
+        dispatch_processes=[],
+        next_node_id=None,
+    )
+    handler.execute = MagicMock(return_value=execute_result)
+    interrupter.runtime.interrupt_errors = MagicMock(return_value=(ValueError,))
+
+    engine = Engine(runtime=runtime)
+
+    with mock.patch("bamboo_engine.engine.HandlerFactory.get_handler", MagicMock(return_value=handler)):
+        engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
+
+    assert runtime.node_transaction.call_count == 2
+    # writes after node execute are rolled back, recover with the execute result instead of executing again
+    recover_point = interrupter.runtime.execute.call_args.kwargs["recover_point"]
+    assert recover_point.name == ExecuteKeyPoint.EXECUTE_NODE_DONE
+    assert recover_point.execute_result.__dict__ == execute_result.__dict__
+
+
 def test_execute__poll_schedule_ready(node_id, pi, interrupter, node, state, schedule):
     runtime = MagicMock()
     runtime.get_process_info = MagicMock(return_value=pi)
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_schedule = MagicMock(return_value=schedule)
     runtime.set_state = MagicMock(return_value=state.version)
@@ -537,6 +747,7 @@ def test_execute__callback_schedule_ready(node_id, pi, interrupter, node, state,
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_schedule = MagicMock(return_value=schedule)
     runtime.set_state = MagicMock(return_value=state.version)
@@ -562,7 +773,7 @@ def test_execute__callback_schedule_ready(node_id, pi, interrupter, node, state,
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -614,6 +825,7 @@ def test_execute__multi_callback_schedule_ready(node_id, pi, interrupter, node,
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_schedule = MagicMock(return_value=schedule)
     runtime.set_state = MagicMock(return_value=state.version)
@@ -639,7 +851,7 @@ def test_execute__multi_callback_schedule_ready(node_id, pi, interrupter, node,
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -696,6 +908,7 @@ def test_execute__has_dispatch_processes(node_id, pi, interrupter, node, state):
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_state = MagicMock(return_value=state.version)
 
@@ -721,7 +934,7 @@ def test_execute__has_dispatch_processes(node_id, pi, interrupter, node, state):
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {"k": "v"})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -785,6 +998,7 @@ def test_execute__have_to_die(node_id, pi, interrupter, node, state):
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_state = MagicMock(return_value=state.version)
 
@@ -810,7 +1024,7 @@ def test_execute__have_to_die(node_id, pi, interrupter, node, state):
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -858,6 +1072,7 @@ def test_execute__has_reversed_rollback_plan(node_id, pi, interrupter, node, sta
     runtime.get_config = MagicMock(return_value=True)
     runtime.start_rollback = MagicMock(return_value=True)
     runtime.get_state_or_none = MagicMock(return_value=None)
+    use_default_node_bundle(runtime)
     runtime.get_state = MagicMock(return_value=state)
     runtime.set_state = MagicMock(return_value=state.version)
     handler = MagicMock()
@@ -883,7 +1098,7 @@ def test_execute__has_reversed_rollback_plan(node_id, pi, interrupter, node, sta
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -935,6 +1150,7 @@ def test_execute__recover_with_state_not_exsit(node_id, pi, interrupter, node, s
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.set_state = MagicMock()
 
     handler = MagicMock()
@@ -959,7 +1175,7 @@ def test_execute__recover_with_state_not_exsit(node_id, pi, interrupter, node, s
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -998,6 +1214,7 @@ def test_execute__recover_with_state_not_exsit_and_version_is_none(
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.set_state = MagicMock()
 
     handler = MagicMock()
@@ -1022,7 +1239,7 @@ def test_execute__recover_with_state_not_exsit_and_version_is_none(
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -1061,13 +1278,14 @@ def test_execute__recover_exceed_rerun_limit(node_id, pi, interrupter, node, sta
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.node_rerun_limit = MagicMock(return_value=10)
     runtime.get_execution_data_outputs = MagicMock(return_value={})
 
     engine = Engine(runtime=runtime)
     engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_called_once_with(pi.root_pipeline_id, node_id)
@@ -1102,6 +1320,7 @@ def test_execute__recover_with_execute_result(node_id, pi, interrupter, node, st
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.set_state = MagicMock()
 
     get_handler = MagicMock()
@@ -1114,7 +1333,7 @@ def test_execute__recover_with_execute_result(node_id, pi, interrupter, node, st
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
@@ -1155,6 +1374,7 @@ def test_execute__recover_with_set_schedule_done(node_id, pi, interrupter, node,
     runtime.batch_get_state_name = MagicMock(return_value={"root": states.RUNNING})
     runtime.get_node = MagicMock(return_value=node)
     runtime.get_state_or_none = MagicMock(return_value=state)
+    use_default_node_bundle(runtime)
     runtime.set_state = MagicMock()
 
     get_handler = MagicMock()
@@ -1167,7 +1387,7 @@ def test_execute__recover_with_set_schedule_done(node_id, pi, interrupter, node,
     ):
         engine.execute(pi.process_id, node_id, pi.root_pipeline_id, pi.top_pipeline_id, interrupter, {})
 
-    runtime.beat.assert_called_once_with(pi.process_id)
+    runtime.enter_node.assert_called_once_with(pi.process_id, node_id, wake_up=True, beat=True)
     runtime.get_node.assert_called_once_with(node_id)
     runtime.get_state_or_none.assert_called_once_with(node_id)
     runtime.node_rerun_limit.assert_not_called()
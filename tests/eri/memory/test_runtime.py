@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import pytest
+from mock import MagicMock
+
+from bamboo_engine import api, builder, states
+from bamboo_engine.builder import (
+    ConvergeGateway,
+    Data,
+    EmptyEndEvent,
+    EmptyStartEvent,
+    ExclusiveGateway,
+    NodeOutput,
+    ParallelGateway,
+    Params,
+    ServiceActivity,
+    SubProcess,
+    Var,
+)
+from bamboo_engine.eri import ContextValue, ContextValueType, DataInput, ScheduleType, Service
+from bamboo_engine.eri.memory import InMemoryRuntime
+from bamboo_engine.exceptions import NotFoundError, StateVersionNotMatchError
+
+
+class EchoService(Service):
+    def execute(self, data, root_pipeline_data):
+        data.outputs.result = data.inputs.value
+        return True
+
+    def schedule(self, schedule, data, root_pipeline_data, callback_data=None):
+        return True
+
+    def hook_dispatch(self, hook, data, root_pipeline_data, callback_data=None):
+        return True
+
+    def need_schedule(self):
+        return False
+
+    def need_run_hook(self):
+        return False
+
+    def schedule_type(self):
+        return None
+
+    def is_schedule_done(self):
+        return False
+
+    def schedule_after(self, schedule, data, root_pipeline_data):
+        return -1
+
+    def setup_runtime_attributes(self, **attrs):
+        pass
+
+
+class PollService(EchoService):
+    def __init__(self):
+        self._schedule_done = False
+
+    def schedule(self, schedule, data, root_pipeline_data, callback_data=None):
+        data.outputs.times = schedule.times
+        self._schedule_done = schedule.times >= 1
+        return True
+
+    def need_schedule(self):
+        return True
+
+    def schedule_type(self):
+        return ScheduleType.POLL
+
+    def is_schedule_done(self):
+        return self._schedule_done
+
+    def schedule_after(self, schedule, data, root_pipeline_data):
+        return 5
+
+
+@pytest.fixture
+def runtime():
+    runtime = InMemoryRuntime(schedule_delay=False)
+    runtime.register_service("echo", EchoService)
+    runtime.register_service("poll", PollService)
+    return runtime
+
+
+def test_run_pipeline(runtime):
+    start = EmptyStartEvent()
+    act_1 = ServiceActivity(component_code="echo")
+    act_1.component.inputs.value = Var(type=Var.SPLICE, value="${a}-${b}")
+    pg = ParallelGateway()
+    act_2 = ServiceActivity(component_code="echo")
+    act_2.component.inputs.value = Var(type=Var.SPLICE, value="${act_1_result}")
+    act_3 = ServiceActivity(component_code="poll")
+    act_3.component.inputs.value = Var(type=Var.PLAIN, value="poll")
+    cg = ConvergeGateway()
+    end = EmptyEndEvent()
+    start.extend(act_1).extend(pg).connect(act_2, act_3).to(pg).converge(cg).extend(end)
+
+    pipeline_data = Data()
+    pipeline_data.inputs["${a}"] = Var(type=Var.PLAIN, value="a")
+    pipeline_data.inputs["${b}"] = Var(type=Var.SPLICE, value="${a}b")
+    pipeline_data.inputs["${act_1_result}"] = NodeOutput(source_act=act_1.id, source_key="result")
+    pipeline = builder.build_tree(start, data=pipeline_data)
+
+    result = api.run_pipeline(runtime=runtime, pipeline=pipeline)
+    assert result.result is True
+    assert runtime.pending_tasks() == 1
+
+    runtime.run_tasks()
+
+    assert runtime.pending_tasks() == 0
+    assert runtime.get_state(pipeline["id"]).name == states.FINISHED
+    for node_id in (start.id, act_1.id, pg.id, act_2.id, act_3.id, cg.id, end.id):
+        assert runtime.get_state(node_id).name == states.FINISHED
+    assert runtime.get_execution_data_outputs(act_1.id)["result"] == "a-ab"
+    assert runtime.get_execution_data_outputs(act_2.id)["result"] == "a-ab"
+    assert runtime.get_execution_data_outputs(act_3.id)["times"] == 1
+    assert {cv.key: cv.value for cv in runtime.get_context(pipeline["id"])}["${act_1_result}"] == "a-ab"
+    assert len(runtime.get_histories(act_1.id)) == 0
+
+
+def test_run_pipeline__subprocess(runtime):
+    sub_start = EmptyStartEvent()
+    sub_act = ServiceActivity(component_code="echo")
+    sub_act.component.inputs.value = Var(type=Var.SPLICE, value="${sub_input}")
+    sub_end = EmptyEndEvent()
+    sub_start.extend(sub_act).extend(sub_end)
+    sub_data = Data()
+    sub_data.inputs["${sub_input}"] = Var(type=Var.PLAIN, value="")
+    sub_data.inputs["${sub_output}"] = NodeOutput(source_act=sub_act.id, source_key="result")
+    sub_data.outputs.append("${sub_output}")
+
+    start = EmptyStartEvent()
+    subprocess = SubProcess(
+        start=sub_start, data=sub_data, params=Params({"${sub_input}": Var(type=Var.SPLICE, value="${a}")})
+    )
+    end = EmptyEndEvent()
+    start.extend(subprocess).extend(end)
+
+    pipeline_data = Data()
+    pipeline_data.inputs["${a}"] = Var(type=Var.PLAIN, value="from parent")
+    pipeline_data.inputs["${b}"] = NodeOutput(source_act=subprocess.id, source_key="${sub_output}")
+    pipeline = builder.build_tree(start, data=pipeline_data)
+
+    api.run_pipeline(runtime=runtime, pipeline=pipeline)
+    runtime.run_tasks()
+
+    assert runtime.get_state(pipeline["id"]).name == states.FINISHED
+    assert runtime.get_state(subprocess.id).name == states.FINISHED
+    assert runtime.get_state(sub_act.id).parent_id == subprocess.id
+    assert runtime.get_execution_data_outputs(sub_act.id)["result"] == "from parent"
+    assert {cv.key: cv.value for cv in runtime.get_context(pipeline["id"])}["${b}"] == "from parent"
+
+
+def _references_pipeline():
+    start = EmptyStartEvent()
+    act = ServiceActivity(component_code="echo")
+    act.component.inputs.value = Var(type=Var.SPLICE, value="${b}")
+    eg = ExclusiveGateway(conditions={0: "${b} == 'ab'", 1: "${b} != 'ab'"})
+    cg = ConvergeGateway()
+    start.extend(act).extend(eg).connect(
+        ServiceActivity(component_code="echo"), ServiceActivity(component_code="echo")
+    ).to(eg).converge(cg).extend(EmptyEndEvent())
+
+    pipeline_data = Data()
+    pipeline_data.inputs["${a}"] = Var(type=Var.PLAIN, value="a")
+    pipeline_data.inputs["${b}"] = Var(type=Var.SPLICE, value="${a}b")
+    pipeline_data.inputs["${c}"] = Var(type=Var.PLAIN, value="c")
+    return builder.build_tree(start, data=pipeline_data), act, eg
+
+
+def test_prepare__node_references(runtime):
+    pipeline, act, eg = _references_pipeline()
+    runtime.prepare_run_pipeline(pipeline, {}, {}, {})
+
+    assert runtime.get_node(act.id).references.direct == {"${b}"}
+    assert runtime.get_node(act.id).references.closure == {"${a}", "${b}"}
+    assert runtime.get_node(eg.id).references.direct == {"${b}"}
+    assert runtime.get_node(eg.id).references.closure == {"${a}", "${b}"}
+    assert runtime.get_node(pipeline["start_event"]["id"]).references is None
+
+    runtime.get_context_key_references = MagicMock(wraps=runtime.get_context_key_references)
+    api.run_pipeline(runtime=runtime, pipeline=_references_pipeline()[0])
+    runtime.run_tasks()
+
+    runtime.get_context_key_references.assert_not_called()
+
+
+def test_set_data_inputs__refresh_node_references(runtime):
+    pipeline, act, _ = _references_pipeline()
+    runtime.prepare_run_pipeline(pipeline, {}, {}, {})
+
+    runtime.set_data_inputs(
+        act.id, {"value": DataInput(need_render=True, value="${c}"), "raw": DataInput(need_render=False, value="${a}")}
+    )
+
+    assert runtime.get_node(act.id).references.direct == {"${c}"}
+    assert runtime.get_node(act.id).references.closure == {"${c}"}
+
+
+def test_update_context_values__refresh_node_references(runtime):
+    pipeline, act, eg = _references_pipeline()
+    runtime.prepare_run_pipeline(pipeline, {}, {}, {})
+    node = runtime.get_node(act.id)
+
+    runtime.update_context_values(pipeline["id"], [ContextValue(key="${a}", type=ContextValueType.PLAIN, value="a")])
+    assert runtime.get_node(act.id) is node
+
+    runtime.update_context_values(
+        pipeline["id"], [ContextValue(key="${a}", type=ContextValueType.SPLICE, value="${c}")]
+    )
+    assert runtime.get_node(act.id).references.closure == {"${a}", "${b}", "${c}"}
+    assert runtime.get_node(eg.id).references.closure == {"${a}", "${b}", "${c}"}
+
+
+def test_run_pipeline__service_not_registered():
+    runtime = InMemoryRuntime()
+    start = EmptyStartEvent()
+    act = ServiceActivity(component_code="not_exist")
+    end = EmptyEndEvent()
+    start.extend(act).extend(end)
+    pipeline = builder.build_tree(start)
+
+    api.run_pipeline(runtime=runtime, pipeline=pipeline)
+    with pytest.raises(NotFoundError):
+        runtime.run_tasks()
+
+    assert runtime.get_state(act.id).name == states.RUNNING
+
+
+def test_run_tasks__max_tasks(runtime):
+    runtime.execute(process_id=1, node_id="n1", root_pipeline_id="p", parent_pipeline_id="p")
+    runtime.execute(process_id=2, node_id="n2", root_pipeline_id="p", parent_pipeline_id="p")
+
+    assert runtime.run_tasks(max_tasks=0) == 0
+    assert runtime.pending_tasks() == 2
+
+
+def test_set_state():
+    runtime = InMemoryRuntime()
+
+    version = runtime.set_state(node_id="n1", to_state=states.RUNNING, root_id="root", parent_id="root")
+    state = runtime.get_state("n1")
+    assert state.version == version
+    assert state.loop == 1
+    assert state.inner_loop == 1
+    assert state.root_id == "root"
+
+    assert runtime.set_state(node_id="n1", to_state=states.FAILED, version=version, is_retry=True) == version
+    assert runtime.get_state("n1").retry == 1
+
+    with pytest.raises(StateVersionNotMatchError):
+        runtime.set_state(node_id="n1", to_state=states.READY, version="v_not_match")
+
+    with pytest.raises(RuntimeError):
+        runtime.set_state(node_id="n1", to_state=states.SUSPENDED)
+
+    assert runtime.get_state_or_none("not_exist") is None
+    with pytest.raises(NotFoundError):
+        runtime.get_state("not_exist")
+
+
+def test_control_epoch():
+    runtime = InMemoryRuntime()
+    runtime.set_state(node_id="sub", to_state=states.RUNNING, root_id="root", parent_id="root")
+
+    assert runtime.get_control_epoch("root") == 0
+    runtime.bump_control_epoch("root")
+    runtime.bump_control_epoch("sub")
+    assert runtime.get_control_epoch("root") == 2
+
+
+def test_child_process_finish():
+    runtime = InMemoryRuntime()
+    parent_id = runtime._create_process(root_pipeline_id="root", pipeline_stack=["root"])
+    children = runtime.fork(
+        parent_id=parent_id, root_pipeline_id="root", pipeline_stack=["root"], from_to={"a": "c", "b": "c"}
+    )
+    runtime.join(parent_id, [c.process_id for c in children])
+
+    assert runtime.child_process_finish(parent_id, children[0].process_id) is False
+    assert runtime.child_process_finish(parent_id, children[1].process_id) is True
+    assert runtime.get_process_id_with_current_node_id("a") is None
+
+
+def test_context_values():
+    runtime = InMemoryRuntime()
+    runtime.upsert_plain_context_values(
+        "p",
+        {
+            "${a}": ContextValue(key="${a}", type=ContextValueType.PLAIN, value="${b}"),
+            "${b}": ContextValue(key="${b}", type=ContextValueType.PLAIN, value="${c}"),
+            "${c}": ContextValue(key="${c}", type=ContextValueType.PLAIN, value="1"),
+        },
+    )
+
+    runtime.update_context_values("p", [ContextValue(key="${a}", type=ContextValueType.SPLICE, value="${b}")])
+
+    assert runtime.get_context_key_references("p", {"${a}"}) == {"${b}", "${c}"}
+    assert {cv.key for cv in runtime.get_context_values_with_references("p", {"${a}"})} == {"${a}", "${b}", "${c}"}
+    assert runtime.get_context_values_with_references("p", {"${not_exist}"}) == []
+    [value] = runtime.get_context_values("p", {"${a}"})
+    assert value.type is ContextValueType.SPLICE
+
+    value.value = "changed"
+    assert runtime.get_context_values("p", {"${a}"})[0].value == "${b}"
+
+
+def test_append_context_value():
+    runtime = InMemoryRuntime()
+    runtime.upsert_plain_context_values(
+        "p", {"${a}": ContextValue(key="${a}", type=ContextValueType.PLAIN, value="not_list")}
+    )
+
+    item = {"result": True}
+    runtime.append_context_value("p", "${a}", item)
+    runtime.append_context_value("p", "${b}", 1)
+    runtime.append_context_value("p", "${b}", 2)
+    item["result"] = False
+
+    assert runtime.get_context_values("p", {"${a}"})[0].value == [{"result": True}]
+    assert runtime.get_context_values("p", {"${b}"})[0].value == [1, 2]
+
+
+def test_get_config():
+    runtime = InMemoryRuntime(config={"PIPELINE_PROCESS_BEAT_INTERVAL": 10})
+
+    assert runtime.get_config("PIPELINE_PROCESS_BEAT_INTERVAL") == 10
+    assert runtime.get_config("PIPELINE_ENABLE_ROLLBACK") is False
+    with pytest.raises(ValueError):
+        runtime.get_config("NOT_EXIST")
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from mock import MagicMock, call
+
+from bamboo_engine.eri import ContextValue, ContextValueType
+from bamboo_engine.eri.interfaces import ContextMixin, NodeMixin, ProcessMixin
+
+
+def test_process_mixin_enter_node__fallback():
+    mixin = ProcessMixin()
+    mixin.beat = MagicMock()
+    mixin.set_current_node = MagicMock()
+    mixin.wake_up = MagicMock()
+
+    mixin.enter_node(1, "n1")
+    mixin.enter_node(1, "n2", wake_up=True)
+
+    mixin.beat.assert_has_calls([call(1), call(1)])
+    mixin.set_current_node.assert_has_calls([call(1, "n1"), call(1, "n2")])
+    mixin.wake_up.assert_called_once_with(1)
+
+
+def test_node_mixin_get_node_bundle__fallback():
+    mixin = NodeMixin()
+    mixin.get_node = MagicMock(return_value="node")
+    mixin.get_state_or_none = MagicMock(return_value=None)
+
+    bundle = mixin.get_node_bundle("n1", prefetch_next=True)
+
+    mixin.get_node.assert_called_once_with("n1")
+    mixin.get_state_or_none.assert_called_once_with("n1")
+    assert bundle.node == "node"
+    assert bundle.state is None
+    assert bundle.data is None
+
+
+def test_context_mixin_get_context_values_with_references__fallback():
+    mixin = ContextMixin()
+    mixin.get_context_key_references = MagicMock(return_value={"${b}"})
+    mixin.get_context_values = MagicMock(return_value=["values"])
+
+    assert mixin.get_context_values_with_references("p1", {"${a}"}) == ["values"]
+
+    mixin.get_context_key_references.assert_called_once_with(pipeline_id="p1", keys={"${a}"})
+    mixin.get_context_values.assert_called_once_with(pipeline_id="p1", keys={"${a}", "${b}"})
+
+
+def test_context_mixin_append_context_value__fallback():
+    mixin = ContextMixin()
+    mixin.get_context_values = MagicMock(
+        return_value=[ContextValue(key="${l}", type=ContextValueType.PLAIN, value=[1, 2])]
+    )
+    mixin.upsert_plain_context_values = MagicMock()
+
+    mixin.append_context_value("p1", "${l}", 3)
+
+    mixin.get_context_values.assert_called_once_with(pipeline_id="p1", keys={"${l}"})
+    update = mixin.upsert_plain_context_values.call_args.kwargs["update"]
+    assert update["${l}"].type == ContextValueType.PLAIN
+    assert update["${l}"].value == [1, 2, 3]
+
+
+def test_context_mixin_append_context_value__not_list():
+    mixin = ContextMixin()
+    mixin.get_context_values = MagicMock(return_value=[])
+    mixin.upsert_plain_context_values = MagicMock()
+
+    mixin.append_context_value("p1", "${l}", 3)
+
+    assert mixin.upsert_plain_context_values.call_args.kwargs["update"]["${l}"].value == [3]
@@ -92,11 +92,8 @@ def recover_point():
     ],
 )
 def test_exclusive_gateway__context_hydrate_raise(pi, node, interrupter, recover_point):
-    additional_refs = []
-
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
 
@@ -117,8 +114,7 @@ def test_exclusive_gateway__context_hydrate_raise(pi, node, interrupter, recover
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -138,11 +134,8 @@ def test_exclusive_gateway__context_hydrate_raise(pi, node, interrupter, recover
     ],
 )
 def test_conditional_parallel_gateway__execute_bool_rule_test_raise(pi, node, interrupter, recover_point):
-    additional_refs = []
-
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -159,8 +152,7 @@ def test_conditional_parallel_gateway__execute_bool_rule_test_raise(pi, node, in
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -180,11 +172,8 @@ def test_conditional_parallel_gateway__execute_bool_rule_test_raise(pi, node, in
     ],
 )
 def test_conditional_parallel_gateway__execute_not_fork_targets(pi, node, interrupter, recover_point):
-    additional_refs = []
-
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -201,8 +190,9 @@ def test_conditional_parallel_gateway__execute_not_fork_targets(pi, node, interr
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set({"${k}"}))
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set({"${k}"}))
+    runtime.get_context_values_with_references.assert_called_once_with(
+        pipeline_id=pi.top_pipeline_id, keys=set({"${k}"})
+    )
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -229,12 +219,10 @@ def test_conditional_parallel_gateway__execute_success(pi, node, interrupter, re
         Condition(name="c2", evaluation="1 == 1", target_id="t2", flow_id="f2"),
         Condition(name="c3", evaluation="1 == 1", target_id="t3", flow_id="f3"),
     ]
-    additional_refs = []
     dispatch_processes = ["p1", "p2", "p3"]
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.fork = MagicMock(return_value=dispatch_processes)
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -251,8 +239,7 @@ def test_conditional_parallel_gateway__execute_success(pi, node, interrupter, re
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.fork.assert_called_once_with(
         parent_id=pi.process_id,
         root_pipeline_id=pi.root_pipeline_id,
@@ -279,11 +266,9 @@ def test_conditional_parallel_gateway__recover_with_dispatch_processes(pi, node,
     ]
     recover_point.handler_data.dispatch_processes = ["p1", "p2", "p3"]
     interrupter.recover_point = recover_point
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
 
@@ -299,8 +284,7 @@ def test_conditional_parallel_gateway__recover_with_dispatch_processes(pi, node,
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.fork.assert_not_called()
     runtime.set_state.assert_called_once_with(
         node_id=node.id, version="v1", to_state=states.FINISHED, set_archive_time=True, ignore_boring_set=True
@@ -325,12 +309,10 @@ def test_conditional_parallel_gateway__no_meet_target_with_default_condition(pi,
     ]
     node.default_condition = DefaultCondition(name="d1", target_id="t1", flow_id="f1")
 
-    additional_refs = []
     dispatch_processes = ["p1"]
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.fork = MagicMock(return_value=dispatch_processes)
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -347,8 +329,7 @@ def test_conditional_parallel_gateway__no_meet_target_with_default_condition(pi,
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.fork.assert_called_once_with(
         parent_id=pi.process_id,
         root_pipeline_id=pi.root_pipeline_id,
@@ -72,7 +72,7 @@ def test_empty_end_event_handler__root_pipeline_execute_success(pi, node, recove
     runtime = MagicMock()
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_context_outputs = MagicMock(return_value=context_outputs)
-    runtime.get_context_values = MagicMock(return_value=context_values)
+    runtime.get_context_values_with_references = MagicMock(return_value=context_values)
     runtime.get_state_or_none = MagicMock(return_value=pipeline_state)
 
     handler = EmptyEndEventHandler(node, runtime, MagicMock())
@@ -88,9 +88,7 @@ def test_empty_end_event_handler__root_pipeline_execute_success(pi, node, recove
 
     runtime.get_data_inputs.assert_called_once_with("root")
     runtime.get_context_outputs.assert_called_once_with("root")
-    runtime.get_context_values.assert_has_calls(
-        [call(pipeline_id="root", keys=context_outputs), call(pipeline_id="root", keys=set())]
-    )
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id="root", keys=context_outputs)
     runtime.set_execution_data_outputs.assert_called_once_with(
         node_id="root",
         outputs={
@@ -160,7 +158,7 @@ def test_empty_end_event_handler__subprocess_execute_success(pi, node, recover_p
     runtime = MagicMock()
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_context_outputs = MagicMock(return_value=context_outputs)
-    runtime.get_context_values = MagicMock(return_value=context_values)
+    runtime.get_context_values_with_references = MagicMock(return_value=context_values)
     runtime.get_node = MagicMock(return_value=subprocess_node)
     runtime.get_data_outputs = MagicMock(return_value=subprocess_outputs)
     runtime.get_state = MagicMock(return_value=state)
@@ -179,9 +177,7 @@ def test_empty_end_event_handler__subprocess_execute_success(pi, node, recover_p
 
     runtime.get_data_inputs.assert_called_once_with("root")
     runtime.get_context_outputs.assert_called_once_with("sub1")
-    runtime.get_context_values.assert_has_calls(
-        [call(pipeline_id="sub1", keys=context_outputs), call(pipeline_id="sub1", keys=set())]
-    )
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id="sub1", keys=context_outputs)
     runtime.set_execution_data_outputs.assert_called_once_with(
         node_id="sub1",
         outputs={"${a}": "1", "${b}": "2", "${c}": "3", "${d}": "${d}", "_loop": 1, "_inner_loop": 1},
@@ -226,16 +222,12 @@ def test_empty_end_event_handler__outputs_context_values_refs(pi, node, recover_
     runtime = MagicMock()
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_context_outputs = MagicMock(return_value=context_outputs)
-    runtime.get_context_values = MagicMock(
-        side_effect=[
-            [
-                ContextValue(key="${a}", value="1", type=ContextValueType.PLAIN),
-                ContextValue(key="${b}", value="2", type=ContextValueType.PLAIN),
-                ContextValue(key="${c}", value="3_${e}", type=ContextValueType.SPLICE),
-            ],
-            [
-                ContextValue(key="${e}", value="4", type=ContextValueType.PLAIN),
-            ],
+    runtime.get_context_values_with_references = MagicMock(
+        return_value=[
+            ContextValue(key="${a}", value="1", type=ContextValueType.PLAIN),
+            ContextValue(key="${b}", value="2", type=ContextValueType.PLAIN),
+            ContextValue(key="${c}", value="3_${e}", type=ContextValueType.SPLICE),
+            ContextValue(key="${e}", value="4", type=ContextValueType.PLAIN),
         ]
     )
     runtime.get_state_or_none = MagicMock(return_value=pipeline_state)
@@ -253,9 +245,7 @@ def test_empty_end_event_handler__outputs_context_values_refs(pi, node, recover_
 
     runtime.get_data_inputs.assert_called_once_with("root")
     runtime.get_context_outputs.assert_called_once_with("root")
-    runtime.get_context_values.assert_has_calls(
-        [call(pipeline_id="root", keys=context_outputs), call(pipeline_id="root", keys={"${e}"})]
-    )
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id="root", keys=context_outputs)
     runtime.set_execution_data_outputs.assert_called_once_with(
         node_id="root",
         outputs={
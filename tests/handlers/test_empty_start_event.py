@@ -96,8 +96,7 @@ def test_empty_start_event_handler__execute_success(recover_point):
     )
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value={"${c}"})
-    runtime.get_context_values = MagicMock(return_value=context_values)
+    runtime.get_context_values_with_references = MagicMock(return_value=context_values)
     runtime.get_data = MagicMock(return_value=data)
 
     handler = EmptyStartEventHandler(node, runtime, MagicMock())
@@ -118,5 +117,7 @@ def test_empty_start_event_handler__execute_success(recover_point):
         set_archive_time=True,
         ignore_boring_set=recover_point is not None,
     )
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${a}", "${b}", "${c}"})
+    runtime.get_context_values_with_references.assert_called_once_with(
+        pipeline_id=pi.top_pipeline_id, keys={"${a}", "${b}"}
+    )
     runtime.upsert_plain_context_values.assert_called_once_with(pi.top_pipeline_id, upsert_context_dict)
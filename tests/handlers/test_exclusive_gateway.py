@@ -57,11 +57,9 @@ def test_exclusive_gateway__context_hydrate_raise(recover_point):
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -83,8 +81,7 @@ def test_exclusive_gateway__context_hydrate_raise(recover_point):
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -126,11 +123,9 @@ def test_exclusive_gateway__execute_bool_rule_test_raise(recover_point):
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -147,8 +142,7 @@ def test_exclusive_gateway__execute_bool_rule_test_raise(recover_point):
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k}"})
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -190,11 +184,9 @@ def test_exclusive_gateway__execute_not_meet_targets(recover_point):
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -211,8 +203,7 @@ def test_exclusive_gateway__execute_not_meet_targets(recover_point):
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -258,11 +249,9 @@ def test_exclusive_gateway__execute_not_meet_targets_with_default(recover_point)
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -279,8 +268,7 @@ def test_exclusive_gateway__execute_not_meet_targets_with_default(recover_point)
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
         version="v1",
@@ -320,11 +308,9 @@ def test_exclusive_gateway__execute_mutiple_meet_targets(recover_point):
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_execution_data_outputs = MagicMock(return_value={})
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
@@ -341,8 +327,7 @@ def test_exclusive_gateway__execute_mutiple_meet_targets(recover_point):
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.get_execution_data_outputs.assert_called_once_with(node.id)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -387,11 +372,9 @@ def test_exclusive_gateway__execute_success(recover_point):
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_config = MagicMock(return_value=default_expr_func)
 
@@ -407,8 +390,7 @@ def test_exclusive_gateway__execute_success(recover_point):
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
         version="v1",
@@ -449,11 +431,9 @@ def test_exclusive_gateway_first_strategy_success(recover_point):
         pipeline_stack=["root"],
         parent_id="parent",
     )
-    additional_refs = []
 
     runtime = MagicMock()
-    runtime.get_context_key_references = MagicMock(return_value=additional_refs)
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_data_inputs = MagicMock(return_value={})
 
     def get_config(config_name):
@@ -476,8 +456,7 @@ def test_exclusive_gateway_first_strategy_success(recover_point):
     assert result.should_die == False
 
     runtime.get_data_inputs.assert_called_once_with("root")
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
         version="v1",
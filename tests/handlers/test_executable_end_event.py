@@ -119,7 +119,7 @@ def test_executable_end_event_handler__event_execute_success(pi, node, recover_p
     runtime.get_executable_end_event = MagicMock(return_value=event)
     runtime.get_data_inputs = MagicMock(return_value={})
     runtime.get_context_outputs = MagicMock(return_value=context_outputs)
-    runtime.get_context_values = MagicMock(return_value=context_values)
+    runtime.get_context_values_with_references = MagicMock(return_value=context_values)
     runtime.get_state_or_none = MagicMock(return_value=pipeline_state)
 
     handler = ExecutableEndEventHandler(node, runtime, MagicMock())
@@ -137,9 +137,7 @@ def test_executable_end_event_handler__event_execute_success(pi, node, recover_p
     event.execute.assert_called_once_with(pipeline_stack=["root"], root_pipeline_id="root")
     runtime.get_data_inputs.assert_called_once_with("root")
     runtime.get_context_outputs.assert_called_once_with("root")
-    runtime.get_context_values.assert_has_calls(
-        [call(pipeline_id="root", keys=context_outputs), call(pipeline_id="root", keys=set())]
-    )
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id="root", keys=context_outputs)
     runtime.set_execution_data_outputs.assert_called_once_with(
         node_id="root",
         outputs={
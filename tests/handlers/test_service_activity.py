@@ -21,6 +21,7 @@ from bamboo_engine.eri import (
     ExecuteInterruptPoint,
     ExecutionData,
     HookType,
+    NodeReferences,
     NodeType,
     ProcessInfo,
     Schedule,
@@ -130,8 +131,7 @@ def test_execute__raise_not_ignore(pi, node, interrupter, recover_point):
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set())
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_service = MagicMock(return_value=service)
     runtime.serialize_execution_data = MagicMock(return_value=("{}", "json"))
 
@@ -148,8 +148,7 @@ def test_execute__raise_not_ignore(pi, node, interrupter, recover_point):
 
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.get_service.assert_called_once_with(code=node.code, version=node.version, name=None)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -208,8 +207,7 @@ def test_execute__raise_ignore(pi, node, interrupter, recover_point):
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set())
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_service = MagicMock(return_value=service)
     runtime.serialize_execution_data = MagicMock(return_value=("{}", "json"))
 
@@ -226,8 +224,7 @@ def test_execute__raise_ignore(pi, node, interrupter, recover_point):
 
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.get_service.assert_called_once_with(code=node.code, version=node.version, name=None)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -284,8 +281,7 @@ def test_context_hydrate__raise(pi, node, interrupter, recover_point):
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set())
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
 
     raise_context = MagicMock()
     raise_context.hydrate = MagicMock(side_effect=Exception)
@@ -304,8 +300,7 @@ def test_context_hydrate__raise(pi, node, interrupter, recover_point):
 
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
         version="v1",
@@ -351,8 +346,7 @@ def test_execute__success_and_schedule(pi, node, interrupter, recover_point):
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set())
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_service = MagicMock(return_value=service)
     runtime.serialize_execution_data = MagicMock(return_value=("{}", "json"))
 
@@ -369,8 +363,7 @@ def test_execute__success_and_schedule(pi, node, interrupter, recover_point):
 
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.get_service.assert_called_once_with(code=node.code, version=node.version, name=None)
     runtime.set_state.assert_not_called()
     assert runtime.set_execution_data.call_args.kwargs["node_id"] == node.id
@@ -454,8 +447,7 @@ def test_execute__success_and_no_schedule(pi, node, interrupter, recover_point,
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set(["${k6}"]))
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_service = MagicMock(return_value=service)
     runtime.serialize_execution_data = MagicMock(return_value=("{}", "json"))
 
@@ -473,19 +465,13 @@ def test_execute__success_and_no_schedule(pi, node, interrupter, recover_point,
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
 
-    get_context_key_references_keys = {"${k4}"}
-    if loop_key:
-        get_context_key_references_keys.add("${loop_key}")
-
-    runtime.get_context_key_references.assert_called_once_with(
-        pipeline_id=pi.top_pipeline_id, keys=get_context_key_references_keys
-    )
-
-    get_context_values_keys = {"${k4}", "${k6}"}
+    get_context_values_keys = {"${k4}"}
     if loop_key:
         get_context_values_keys.add("${loop_key}")
 
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=get_context_values_keys)
+    runtime.get_context_values_with_references.assert_called_once_with(
+        pipeline_id=pi.top_pipeline_id, keys=get_context_values_keys
+    )
     runtime.get_service.assert_called_once_with(code=node.code, version=node.version, name=None)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -538,6 +524,31 @@ def test_execute__success_and_no_schedule(pi, node, interrupter, recover_point,
     assert interrupter.check_point.handler_data.execute_outputs_serializer == "json"
 
 
+def test_execute__precomputed_references(pi, node, interrupter):
+    node.references = NodeReferences(direct={"${k4}"}, closure={"${k4}", "${k6}"})
+    data = Data({"k1": DataInput(need_render=True, value="${k4}")}, {})
+
+    service = MagicMock()
+    service.need_schedule = MagicMock(return_value=False)
+    service.execute = MagicMock(return_value=True)
+    service.need_run_hook = MagicMock(return_value=False)
+
+    runtime = MagicMock()
+    runtime.get_data = MagicMock(return_value=data)
+    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_service = MagicMock(return_value=service)
+    runtime.serialize_execution_data = MagicMock(return_value=("{}", "json"))
+
+    handler = ServiceActivityHandler(node, runtime, interrupter)
+    with patch("bamboo_engine.handlers.service_activity.Template.get_reference") as get_reference:
+        result = handler.execute(pi, 1, 1, "v1")
+
+    assert result.next_node_id == node.target_nodes[0]
+    get_reference.assert_not_called()
+    runtime.get_context_key_references.assert_not_called()
+    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys={"${k4}", "${k6}"})
+
+
 @pytest.mark.parametrize(
     "recover_point",
     [
@@ -571,8 +582,7 @@ def test_execute__fail_and_schedule(pi, node, interrupter, recover_point):
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set())
-    runtime.get_context_values = MagicMock(return_value=[])
+    runtime.get_context_values_with_references = MagicMock(return_value=[])
     runtime.get_service = MagicMock(return_value=service)
     runtime.serialize_execution_data = MagicMock(return_value=("{}", "json"))
 
@@ -589,8 +599,7 @@ def test_execute__fail_and_schedule(pi, node, interrupter, recover_point):
 
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
-    runtime.get_context_values.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
+    runtime.get_context_values_with_references.assert_called_once_with(pipeline_id=pi.top_pipeline_id, keys=set())
     runtime.get_service.assert_called_once_with(code=node.code, version=node.version, name=None)
     runtime.set_state.assert_called_once_with(
         node_id=node.id,
@@ -85,8 +85,7 @@ def test_subprocess_handler__execute_success(recover_point):
 
     runtime = MagicMock()
     runtime.get_data = MagicMock(return_value=data)
-    runtime.get_context_key_references = MagicMock(return_value=set())
-    runtime.get_context_values = MagicMock(return_value=context_values)
+    runtime.get_context_values_with_references = MagicMock(return_value=context_values)
 
     handler = SubProcessHandler(node, runtime, interrupter)
     result = handler.execute(pi, 1, 1, "v1", recover_point)
@@ -101,8 +100,9 @@ def test_subprocess_handler__execute_success(recover_point):
 
     runtime.get_data.assert_called_once_with(node.id)
     runtime.get_data_inputs.assert_called_once_with(pi.root_pipeline_id)
-    runtime.get_context_key_references.assert_called_once_with(pipeline_id="root", keys={"${v1}", "${sub_loop}"})
-    runtime.get_context_values.assert_called_once_with(pipeline_id="root", keys={"${v1}", "${sub_loop}"})
+    runtime.get_context_values_with_references.assert_called_once_with(
+        pipeline_id="root", keys={"${v1}", "${sub_loop}"}
+    )
     runtime.reset_children_state_inner_loop.assert_called_once_with(node.id)
     runtime.set_execution_data_inputs.assert_called_once_with(node.id, {"${k1}": "var", "${k2}": 1})
     upsert_call_args = runtime.upsert_plain_context_values.call_args.args
@@ -14,10 +14,14 @@ specific language governing permissions and limitations under the License.
 import datetime
 
 import pytest
+from mako import lexer
 from mako.template import Template as MakoTemplate
+from mock import patch
 
 from bamboo_engine.config import Settings
 from bamboo_engine.template import Template
+from bamboo_engine.template import sandbox
+from bamboo_engine.template import template as template_module
 from bamboo_engine.utils import mako_safety
 from bamboo_engine.utils.mako_utils.checker import check_mako_template_safety
 from bamboo_engine.utils.mako_utils.exceptions import ForbiddenMakoTemplateException
@@ -85,7 +89,7 @@ def test_render():
     assert simple_dict_template.render({"a": {"a": "b"}}) == {"a": "b"}
 
     nested_dict_template = Template("${a[0][3]['a']}")
-    assert nested_dict_template.render({"a": [[1, 2, 3, {"a": [1,2,3]}], [5, 6, 7, 8]]}) == [1,2,3]
+    assert nested_dict_template.render({"a": [[1, 2, 3, {"a": [1, 2, 3]}], [5, 6, 7, 8]]}) == [1, 2, 3]
 
     type_error_template = Template("${a[1]}")
     assert type_error_template.render({"a": 1}) == "${a[1]}"
@@ -421,10 +425,7 @@ def test_mako_format_private_lookup_is_blocked(payload):
         # BinOp 字符串拼接绕过字面量 dunder 检测
         "${getattr('', '__cl' + 'ass__')}",
         # 完整 subclasses RCE 链（多重 getattr + 字符串拼接）
-        (
-            "${getattr(getattr(getattr('', '__cl' + 'ass__'), '__ba' + 'se__'),"
-            " '__sub' + 'classes__')()}"
-        ),
+        ("${getattr(getattr(getattr('', '__cl' + 'ass__'), '__ba' + 'se__')," " '__sub' + 'classes__')()}"),
         # 通过 dir(0)[0][0] 间接得到下划线字符再拼出 __class__
         "${getattr('', dir(0)[0][0] + dir(0)[0][0] + 'class' + dir(0)[0][0] + dir(0)[0][0])}",
         # type / object / vars 等 callable 走 Name 调用
@@ -450,3 +451,114 @@ def test_mako_latent_bypass_is_inert_at_render(payload):
         "Mako sandbox bypass regression: payload {!r} rendered to {!r}, expected inert echo. "
         "Check Settings.MAKO_SANDBOX_SHIELD_WORDS completeness."
     ).format(payload, rendered)
+
+
+# ---------------------------------------------------------------------------
+# 模板编译结果及安全检查结论缓存
+# ---------------------------------------------------------------------------
+
+
+def test_render__reuse_compiled_template():
+    template_module.clear_template_caches()
+    with patch("bamboo_engine.template.template.MakoTemplate", wraps=MakoTemplate) as mako_template:
+        assert Template("${a + 1}-${a + 2}").render({"a": 1}) == "2-3"
+        assert Template("${a + 1}").render({"a": 2}) == "3"
+
+    assert mako_template.call_count == 2
+
+
+def test_render__reuse_safety_verdict():
+    template_module.clear_template_caches()
+    payload = "${a.__class__}"
+    with patch("bamboo_engine.template.template.check_mako_template_safety", wraps=check_mako_template_safety) as check:
+        assert Template(payload).render({"a": 1}) == payload
+        assert Template(payload).render({"a": 1}) == payload
+
+    assert check.call_count == 1
+
+
+def test_render__whitelist_verdict_keyed_by_allowed_names(whitelist_mode):
+    whitelist_mode("enforce")
+    template_module.clear_template_caches()
+    payload = "${b}-x"
+
+    assert Template(payload).render({"a": 1}) == payload
+    assert Template(payload).render({"b": 1}) == "1-x"
+    assert Template(payload).render({"a": 1}) == payload
+
+
+@pytest.mark.parametrize(
+    "tpl, reference",
+    [
+        ("${a}", {"a"}),
+        ("${ a.b.c }", {"a"}),
+        ("${a.if}", set()),
+        ("${None}", set()),
+        ("${context.a}", set()),
+        ("${a + int(b)}", {"a", "b", "int"}),
+    ],
+)
+def test_get_reference__simple_fragment(tpl, reference):
+    assert Template(tpl).get_reference(deformat=True) == reference
+
+
+def test_get_reference__reuse_parse_result():
+    template_module.clear_template_caches()
+    with patch("bamboo_engine.template.template.lexer.Lexer", wraps=lexer.Lexer) as mako_lexer:
+        assert Template(["${a}", "${a + b}"]).get_reference() == {"${a}", "${b}"}
+        assert Template("${a + b}-${a.c}").get_reference() == {"${a}", "${b}"}
+
+    assert mako_lexer.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# 渲染沙箱及渲染数据
+# ---------------------------------------------------------------------------
+
+
+def test_sandbox__rebuild_after_settings_changed():
+    sandbox_data = sandbox.get()
+    assert sandbox.get() is sandbox_data
+    assert sandbox_data["getattr"] is None
+
+    with patch.object(Settings, "MAKO_SANDBOX_IMPORT_MODULES", {"datetime": "datetime"}):
+        assert sandbox.get()["datetime"] is datetime
+
+    assert "datetime" not in sandbox.get()
+
+
+def test_render__pass_referenced_names_only():
+    context = {"a": 1, "b": 2, "c": 3}
+    with patch.object(Settings, "MAKO_SANDBOX_IMPORT_MODULES", {"datetime": "datetime"}), patch.object(
+        MakoTemplate, "render_unicode", autospec=True, side_effect=MakoTemplate.render_unicode
+    ) as render:
+        assert Template("${a + b}-${datetime.date(2020, c, 1)}").render(context) == "3-2020-03-01"
+
+    render_kwargs = [c.kwargs for c in render.call_args_list]
+    assert len(render_kwargs) == 2
+    assert {"a": 1, "b": 2} in render_kwargs
+    assert {"datetime": datetime, "c": 3} in render_kwargs
+
+
+def test_render__dynamic_context_access(whitelist_mode):
+    whitelist_mode("off")
+
+    assert Template("${context.get('a')}-x").render({"a": 1}) == "1-x"
+    assert Template("${context['a']}-x").render({"a": 1}) == "1-x"
+
+
+def test_render__share_unchanged_containers():
+    rows = [{"name": "row%s" % i, "tags": ["x", "y"]} for i in range(3)]
+    data = {"rows": rows, "title": "${a}", "nested": ({"v": "${b}"}, ["plain"])}
+
+    rendered = Template(data).render({"a": 1, "b": 2})
+
+    assert rendered == {"rows": rows, "title": 1, "nested": ({"v": 2}, ["plain"])}
+    assert rendered is not data
+    assert data["title"] == "${a}"
+    assert data["nested"][0] == {"v": "${b}"}
+    assert rendered["rows"] is rows
+    assert rendered["nested"][1] is data["nested"][1]
+
+    plain = {"rows": rows}
+    assert Template(plain).render({"a": 1}) is plain
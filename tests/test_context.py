@@ -11,10 +11,12 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import pytest
 from mock import MagicMock
 
 from bamboo_engine.eri import ContextValue, ContextValueType, Variable
 from bamboo_engine.context import Context, PlainVariable, SpliceVariable
+from bamboo_engine.exceptions import ReferenceCycleError
 
 
 def test_hydrate():
@@ -68,6 +70,72 @@ def test_hydrate():
     }
 
 
+def test_hydrate__evaluate_each_variable_once():
+    class CV(Variable):
+        def __init__(self, value):
+            self.value = value
+            self.calls = 0
+
+        def get(self):
+            self.calls += 1
+            return "compute_%s" % self.value.get()
+
+    compute_vars = []
+
+    def get_compute_variable(code, key, value, additional_data, inner_loop):
+        compute_vars.append(CV(value))
+        return compute_vars[-1]
+
+    runtime = MagicMock()
+    runtime.get_compute_variable = get_compute_variable
+
+    values = [
+        ContextValue("${d}", type=ContextValueType.SPLICE, value="${b}-${c}"),
+        ContextValue("${c}", type=ContextValueType.SPLICE, value="${a}c"),
+        ContextValue("${b}", type=ContextValueType.SPLICE, value="${a}b"),
+        ContextValue("${a}", type=ContextValueType.COMPUTE, value="${x}", code="compute_var"),
+        ContextValue("${x}", type=ContextValueType.PLAIN, value="1"),
+    ]
+
+    context = Context(runtime, values, {})
+    hydrated = context.hydrate()
+    assert list(hydrated) == ["${d}", "${c}", "${b}", "${a}", "${x}"]
+    assert hydrated == {
+        "${d}": "compute_1b-compute_1c",
+        "${c}": "compute_1c",
+        "${b}": "compute_1b",
+        "${a}": "compute_1",
+        "${x}": "1",
+    }
+    assert compute_vars[0].calls == 1
+
+    context.hydrate()
+    assert compute_vars[0].calls == 2
+
+
+def test_hydrate__reference_cycle():
+    runtime = MagicMock()
+    values = [
+        ContextValue("${a}", type=ContextValueType.SPLICE, value="${b}"),
+        ContextValue("${b}", type=ContextValueType.SPLICE, value="${a}"),
+        ContextValue("${c}", type=ContextValueType.SPLICE, value="${a}-${d}"),
+        ContextValue("${d}", type=ContextValueType.PLAIN, value="1"),
+        ContextValue("${e}", type=ContextValueType.SPLICE, value="${d}-${e}"),
+    ]
+
+    context = Context(runtime, values, {})
+    with pytest.raises(ReferenceCycleError) as exc_info:
+        context.hydrate()
+    assert exc_info.value.keys == {"${a}", "${b}", "${e}"}
+
+    hydrated = context.hydrate(mute_error=True)
+    assert hydrated["${d}"] == "1"
+    assert hydrated["${c}"] == hydrated["${a}"]
+    assert "cycle" in hydrated["${a}"]
+    assert "cycle" in hydrated["${b}"]
+    assert "cycle" in hydrated["${e}"]
+
+
 def test_extract_outputs():
     pipeline_id = "pipeline"
     data_outputs = {"a": "b", "c": "d", "e": "f"}
@@ -87,3 +155,22 @@ def test_extract_outputs():
     assert upsert_call_args["update"]["f"].key == "f"
     assert upsert_call_args["update"]["f"].type == ContextValueType.PLAIN
     assert upsert_call_args["update"]["f"].value == 2
+
+
+def test_extract_outputs__loop_node():
+    pipeline_id = "pipeline"
+    node = MagicMock()
+    node.loop_enabled = True
+    node.loop_outputs_key = "${_loop_outputs}"
+    execution_data_outputs = {"outputs": {"a": 1}, "_result": True, "_inner_loop": 2}
+
+    runtime = MagicMock()
+
+    context = Context(runtime, [], {})
+    context.extract_outputs(pipeline_id, {"a": "${a}"}, execution_data_outputs, node=node)
+
+    runtime.append_context_value.assert_called_once_with(
+        pipeline_id=pipeline_id, key="${_loop_outputs}", value={"a": 1, "result": True, "inner_loop": 2}
+    )
+    runtime.get_context_values.assert_not_called()
+    runtime.upsert_plain_context_values.assert_not_called()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from mock import MagicMock
+
+from bamboo_engine import metrics
+
+
+def test_observe_round_trips():
+    db_queries = MagicMock()
+    broker_publishes = MagicMock()
+
+    with metrics.observe_round_trips(db_queries, broker_publishes) as round_trips:
+        metrics.record_db_query()
+        metrics.record_db_query(2)
+        metrics.record_broker_publish()
+        round_trips.labels(type="empty_start_event", hostname="host")
+
+    db_queries.labels.assert_called_once_with(type="empty_start_event", hostname="host")
+    db_queries.labels.return_value.observe.assert_called_once_with(3)
+    broker_publishes.labels.assert_called_once_with(type="empty_start_event", hostname="host")
+    broker_publishes.labels.return_value.observe.assert_called_once_with(1)
+
+
+def test_observe_round_trips__without_labels():
+    db_queries = MagicMock()
+    broker_publishes = MagicMock()
+
+    with metrics.observe_round_trips(db_queries, broker_publishes):
+        metrics.record_db_query()
+
+    db_queries.labels.assert_not_called()
+    broker_publishes.labels.assert_not_called()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from mock import patch
+
+from bamboo_engine.utils.collections import LRUCache
+
+
+def test_lru_cache__get_and_set():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", 2) == 2
+    assert "a" in cache
+    assert "b" not in cache
+
+
+def test_lru_cache__evict_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_cache__disabled():
+    cache = LRUCache(maxsize=0)
+    cache.set("a", 1)
+
+    assert not cache.enabled
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_lru_cache__ttl():
+    cache = LRUCache(maxsize=2, ttl=10)
+    with patch("bamboo_engine.utils.collections.time.monotonic", return_value=100):
+        cache.set("a", 1)
+
+    with patch("bamboo_engine.utils.collections.time.monotonic", return_value=105):
+        assert cache.get("a") == 1
+
+    with patch("bamboo_engine.utils.collections.time.monotonic", return_value=111):
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_lru_cache__pop_and_clear():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
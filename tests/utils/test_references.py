@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from bamboo_engine.utils.references import caculate_final_references, caculate_node_references
+
+
+def test_caculate_final_references():
+    assert caculate_final_references({"a": {"b"}, "b": {"c", "d"}, "c": set(), "d": {"a"}}) == {
+        "a": {"a", "b", "c", "d"},
+        "b": {"a", "b", "c", "d"},
+        "c": set(),
+        "d": {"a", "b", "c", "d"},
+    }
+
+
+def test_caculate_node_references():
+    final_references = {"a": {"b", "c"}, "b": {"c"}, "c": set()}
+    assert caculate_node_references({"b", "x"}, final_references) == {"direct": ["b", "x"], "closure": ["b", "c", "x"]}